@@ -0,0 +1,138 @@
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .caching import get_versions
+from .models.user import User
+
+
+# Columns kept per cached user; every other field is deferred and only
+# loaded from the database if a view actually touches it.
+CACHED_USER_FIELDS = (
+    'id', 'username', 'email', 'bio', 'image',
+    'is_active', 'is_staff', 'is_superuser',
+)
+
+
+class UserRecordCache:
+    """
+    A bounded, thread-safe, per-process LRU of user rows. Each entry remembers
+    the ``profile:<id>`` cache version it was read under. A save bumps that
+    version, which invalidates the entry in every process sharing the cache
+    backend (``CACHE_URL``). With a per-process cache only the saving process
+    sees the bump, so entries also expire after ``AUTH_USER_CACHE_TIMEOUT``
+    seconds, a few seconds by default unless ``CACHE_URL`` is set.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._records = OrderedDict()
+
+    def get(self, user_id, version):
+        with self._lock:
+            entry = self._records.get(user_id)
+            if entry is None:
+                return None
+            values, entry_version, expires = entry
+            if entry_version != version or expires < time.monotonic():
+                del self._records[user_id]
+                return None
+            self._records.move_to_end(user_id)
+            return values
+
+    def set(self, user_id, version, values):
+        expires = time.monotonic() + settings.AUTH_USER_CACHE_TIMEOUT
+        with self._lock:
+            self._records[user_id] = (values, version, expires)
+            self._records.move_to_end(user_id)
+            while len(self._records) > settings.AUTH_USER_CACHE_SIZE:
+                self._records.popitem(last=False)
+
+    def evict(self, user_id):
+        with self._lock:
+            self._records.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+
+
+user_records = UserRecordCache()
+
+
+def cached_field_names():
+    return [f.attname for f in User._meta.concrete_fields if f.attname in CACHED_USER_FIELDS]
+
+
+class CachedUserJWTAuthentication(JWTAuthentication):
+    """
+    ``JWTAuthentication`` that resolves the token's user from ``user_records``
+    instead of loading the row on every request. The returned object is a real
+    ``User`` instance with only ``CACHED_USER_FIELDS`` populated.
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # Revocation compares the password hash, which is never cached.
+            return super().get_user(validated_token)
+
+        user_id, version, values = self.get_cached_record(validated_token)
+        if values is None:
+            values = self.get_record_queryset(user_id).first()
+            self.remember_record(user_id, version, values)
+        return self.build_user(values)
+
+    async def aauthenticate(self, request):
+        """Async ``authenticate``; the database is only hit on an LRU miss."""
+        if api_settings.CHECK_REVOKE_TOKEN:
+            return await sync_to_async(self.authenticate)(request)
+
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        user_id, version, values = self.get_cached_record(validated_token)
+        if values is None:
+            values = await self.get_record_queryset(user_id).afirst()
+            self.remember_record(user_id, version, values)
+        return self.build_user(values), validated_token
+
+    def get_cached_record(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            ) from e
+
+        namespace = f'profile:{user_id}'
+        version = get_versions(namespace)[namespace]
+        return user_id, version, user_records.get(user_id, version)
+
+    def get_record_queryset(self, user_id):
+        return User.objects.filter(
+            **{api_settings.USER_ID_FIELD: user_id}
+        ).values_list(*cached_field_names())
+
+    def remember_record(self, user_id, version, values):
+        if values is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        user_records.set(user_id, version, values)
+
+    def build_user(self, values):
+        user = User.from_db(router.db_for_read(User), cached_field_names(), values)
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return user
@@ -0,0 +1,116 @@
+import hashlib
+import json
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+VERSION_KEY_FORMAT = 'version:%s'
+
+
+def _initial_version():
+    # Seed from the clock so a version key evicted from the cache never comes
+    # back with a value that matches entries written before the eviction.
+    return time.time_ns()
+
+
+def get_versions(*namespaces):
+    """Return the current version of each namespace, creating missing ones."""
+    keys = {VERSION_KEY_FORMAT % namespace: namespace for namespace in namespaces}
+    found = cache.get_many(keys)
+    versions = {}
+    for key, namespace in keys.items():
+        if key not in found:
+            cache.add(key, _initial_version(), None)
+            found[key] = cache.get(key)
+        versions[namespace] = found[key]
+    return versions
+
+
+def bump_version(namespace):
+    """Invalidate every key built from ``namespace``."""
+    key = VERSION_KEY_FORMAT % namespace
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, _initial_version(), None)
+
+
+def versioned_key(prefix, namespaces, params):
+    """
+    Build a cache key from ``params`` and the current versions of
+    ``namespaces``; bumping any of them makes the key unreachable.
+    """
+    payload = {
+        'versions': get_versions(*namespaces),
+        'params': params,
+    }
+    digest = hashlib.sha1(
+        json.dumps(payload, sort_keys=True, default=str).encode()
+    ).hexdigest()
+    return f'{prefix}:{digest}'
+
+
+_MISSING = object()
+_stats_lock = threading.Lock()
+_stats = defaultdict(lambda: {'hits': 0, 'misses': 0})
+
+
+def get_stats():
+    """Hit/miss counters of every ``VersionedCache`` in this process."""
+    with _stats_lock:
+        return {prefix: dict(counts) for prefix, counts in _stats.items()}
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+class VersionedCache:
+    """
+    A cache region whose keys embed the versions of the namespaces the value
+    depends on. Writers call ``bump_version`` (usually from a model signal)
+    and every dependent entry is invalidated at once, in every process that
+    shares the cache backend. Entries still expire after ``timeout`` seconds
+    (``VERSIONED_CACHE_TIMEOUT`` by default), which bounds staleness when
+    processes do not share one, as with the default LocMemCache.
+    """
+
+    def __init__(self, prefix, namespaces=(), timeout=None):
+        self.prefix = prefix
+        self.namespaces = tuple(namespaces)
+        self.timeout = timeout
+
+    def make_key(self, params=None, namespaces=()):
+        return versioned_key(self.prefix, self.namespaces + tuple(namespaces), params)
+
+    def get(self, key, default=None):
+        value = cache.get(key, _MISSING)
+        with _stats_lock:
+            _stats[self.prefix]['misses' if value is _MISSING else 'hits'] += 1
+        return default if value is _MISSING else value
+
+    def set(self, key, value):
+        timeout = self.timeout if self.timeout is not None else settings.VERSIONED_CACHE_TIMEOUT
+        cache.set(key, value, timeout)
+
+    def get_or_set(self, builder, params=None, namespaces=()):
+        key = self.make_key(params, namespaces)
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = builder()
+            self.set(key, value)
+        return value
+
+    async def aget_or_set(self, builder, params=None, namespaces=()):
+        """``get_or_set`` for a coroutine ``builder``."""
+        key = self.make_key(params, namespaces)
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = await builder()
+            self.set(key, value)
+        return value
@@ -0,0 +1,73 @@
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+from .caching import bump_version
+from .models.favorite import FavoriteIntent
+
+
+class FavoriteBuffer:
+    """
+    Write-behind buffer for favorite toggles, enabled by
+    ``FAVORITES_WRITE_BEHIND``. Each toggle upserts one ``FavoriteIntent``
+    row instead of touching ``favorited_by`` and the article counter. The
+    intents are applied in batches outside the request path, by
+    ``flush_favorites --loop`` or any other worker calling ``flush``.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    @property
+    def enabled(self):
+        return settings.FAVORITES_WRITE_BEHIND
+
+    def reset(self):
+        with self._lock:
+            self.recorded = 0
+            self.flushed = 0
+            self.flushes = 0
+            self.last_flush_seconds = None
+
+    def record(self, user, article, favorited):
+        FavoriteIntent.objects.record(user, article, favorited)
+        # Counts of the user's own ?favorited= listing include pending intents.
+        bump_version(f'favorites:{user.pk}')
+        with self._lock:
+            self.recorded += 1
+
+    def flush(self):
+        """Apply every pending intent in batches. Returns the number applied."""
+        started = time.monotonic()
+        applied = 0
+        while True:
+            batch = FavoriteIntent.objects.apply_batch(settings.FAVORITES_FLUSH_BATCH_SIZE)
+            applied += batch
+            if batch < settings.FAVORITES_FLUSH_BATCH_SIZE:
+                break
+        if applied:
+            bump_version('favorites')
+        with self._lock:
+            self.flushed += applied
+            self.flushes += 1
+            self.last_flush_seconds = time.monotonic() - started
+        return applied
+
+    def stats(self):
+        """Buffer depth and age, plus this process's flush counters."""
+        oldest = FavoriteIntent.objects.oldest()
+        with self._lock:
+            return {
+                'depth': FavoriteIntent.objects.count(),
+                'oldest_age': (timezone.now() - oldest).total_seconds() if oldest else None,
+                'recorded': self.recorded,
+                'flushed': self.flushed,
+                'flushes': self.flushes,
+                'last_flush_seconds': self.last_flush_seconds,
+            }
+
+
+favorite_buffer = FavoriteBuffer()
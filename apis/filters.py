@@ -1,22 +1,73 @@
 import django_filters
+from django.conf import settings
+from django.db.models import Count, OuterRef, Q, Subquery, Sum
 from django_filters import rest_framework as filters
+from rest_framework.filters import BaseFilterBackend
 from .models.article import Article
-from .models.user import User
-from .models.tag import Tag
+from .models.favorite import FavoriteIntent
+from .models.search import ArticleTerm
+from .search import query_terms
 
 
 class ArticleFilter(filters.FilterSet):
-    tag = filters.CharFilter(field_name='tags__name', lookup_expr='iexact')
-    author = filters.CharFilter(field_name='author__username', lookup_expr='iexact')
+    tag = filters.CharFilter(method='filter_tag')
+    author = filters.CharFilter(method='filter_author')
     favorited = filters.CharFilter(method='filter_favorited')
     
     class Meta:
         model = Article
         fields = ['tag', 'author', 'favorited']
     
+    # Case-insensitive matches go through the indexed lowercase columns;
+    # ``iexact`` would compare with LIKE or UPPER() and skip the index.
+    def filter_tag(self, queryset, name, value):
+        return queryset.filter(tags__name_lower=value.lower())
+
+    def filter_author(self, queryset, name, value):
+        return queryset.filter(author__username_lower=value.lower())
+
     def filter_favorited(self, queryset, name, value):
-        try:
-            user = User.objects.get(username=value)
-            return queryset.filter(favorited_by=user)
-        except User.DoesNotExist:
-            return queryset.none()
+        user = getattr(self.request, 'user', None)
+        if not viewer_has_pending_favorites(user, value):
+            # A join rather than a user lookup, so filtering stays lazy and
+            # can be evaluated from async views.
+            return queryset.filter(favorited_by__username=value)
+
+        # The viewer's own favorites include their unflushed toggles.
+        stored = Article.favorited_by.through.objects.filter(user_id=user.pk)
+        intents = FavoriteIntent.objects.filter(user_id=user.pk)
+        return queryset.filter(
+            Q(pk__in=stored.values('article_id'))
+            & ~Q(pk__in=intents.filter(favorited=False).values('article_id'))
+            | Q(pk__in=intents.filter(favorited=True).values('article_id'))
+        )
+
+
+def viewer_has_pending_favorites(user, username):
+    """Whether ``?favorited=<username>`` lists the favorites of ``user`` under write-behind."""
+    return (settings.FAVORITES_WRITE_BEHIND and user is not None
+            and user.is_authenticated and user.username == username)
+
+
+class ArticleSearchFilter(BaseFilterBackend):
+    """
+    Full-text search over the ``ArticleTerm`` inverted index. Every query
+    term must match; results are ranked by the summed term weights, with the
+    existing ordering used as a tie-breaker.
+    """
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        terms = query_terms(request.query_params.get(self.search_param, ''))
+        if not terms:
+            return queryset
+
+        matches = ArticleTerm.objects.filter(term__in=terms).order_by()
+        matched_ids = matches.values('article_id').annotate(
+            hits=Count('pk')).filter(hits=len(terms)).values('article_id')
+        ranks = matches.filter(article_id=OuterRef('pk')).values(
+            'article_id').annotate(rank=Sum('weight')).values('rank')
+
+        return queryset.filter(pk__in=matched_ids).annotate(
+            search_rank=Subquery(ranks)
+        ).order_by('-search_rank', *queryset.query.order_by)
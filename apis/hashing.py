@@ -0,0 +1,99 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, get_hasher, identify_hasher, make_password
+
+from .instrumentation import annotate
+
+
+class HasherPoolFull(Exception):
+    """Raised when more hashing jobs are waiting than the queue allows."""
+
+
+class HasherPool:
+    """
+    A bounded thread pool for password hashing so login/registration bursts
+    cannot occupy every request worker. PBKDF2 releases the GIL, so the
+    threads hash in parallel while the event loop keeps serving requests.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=settings.PASSWORD_HASHER_WORKERS,
+                    thread_name_prefix='hasher',
+                )
+            return self._executor
+
+    def stats(self):
+        """Pool occupancy: jobs beyond ``workers`` are waiting in the queue."""
+        with self._lock:
+            workers = settings.PASSWORD_HASHER_WORKERS
+            return {
+                'workers': workers,
+                'in_flight': self.in_flight,
+                'queued': max(self.in_flight - workers, 0),
+                'completed': self.completed,
+                'rejected': self.rejected,
+            }
+
+    async def run(self, func, *args):
+        executor = self.executor
+        with self._lock:
+            queued = self.in_flight - settings.PASSWORD_HASHER_WORKERS
+            admitted = queued < settings.PASSWORD_HASHER_MAX_QUEUE
+            if admitted:
+                self.in_flight += 1
+            else:
+                self.rejected += 1
+        # Occupancy as this job found it, in the request's metrics log line.
+        annotate(hasher=self.stats())
+        if not admitted:
+            raise HasherPoolFull
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self.completed += 1
+
+
+hasher_pool = HasherPool()
+
+
+async def ahash_password(raw_password):
+    return await hasher_pool.run(make_password, raw_password)
+
+
+def _verify(raw_password, encoded):
+    """Check a password and report whether it should be rehashed."""
+    if not check_password(raw_password, encoded):
+        return False, False
+    preferred = get_hasher('default')
+    hasher = identify_hasher(encoded)
+    must_update = hasher.algorithm != preferred.algorithm or preferred.must_update(encoded)
+    return True, must_update
+
+
+async def averify_password(user, raw_password):
+    """
+    Verify ``raw_password`` for ``user`` on the hasher pool. When the stored
+    hash does not use the preferred configured hasher (or its current work
+    factor), the password is rehashed and saved, like ``User.check_password``.
+    """
+    valid, must_update = await hasher_pool.run(_verify, raw_password, user.password)
+    if valid and must_update:
+        user.password = await ahash_password(raw_password)
+        await type(user).objects.filter(pk=user.pk).aupdate(password=user.password)
+    return valid
@@ -0,0 +1,206 @@
+import json
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+# Metrics of the request being handled, if it was sampled. A context
+# variable follows the request into sync_to_async threads and coroutines.
+current_metrics = ContextVar('request_metrics', default=None)
+
+IN_LIST_RE = re.compile(r'\(\s*%s(?:\s*,\s*%s)*\s*\)')
+NUMBER_RE = re.compile(r'\b\d+\b')
+IGNORED_STATEMENTS = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+
+
+def query_shape(sql):
+    """``sql`` with IN lists and inlined numbers (LIMIT, OFFSET) collapsed."""
+    return NUMBER_RE.sub('?', IN_LIST_RE.sub('(%s...)', sql))
+
+
+class RequestMetrics:
+    """Query count and time, and serializer and render time, of one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view = None
+        self.queries = 0
+        self.db_time = 0.0
+        self.shapes = Counter()
+        self.phases = Counter()
+        self.depth = Counter()
+        # Extra fields of the log line, added through ``annotate``.
+        self.fields = {}
+
+    def add_query(self, sql, duration):
+        if sql.startswith(IGNORED_STATEMENTS):
+            return
+        self.queries += 1
+        self.db_time += duration
+        self.shapes[query_shape(sql)] += 1
+
+    def repeated_queries(self):
+        """Query shapes run at least ``REQUEST_METRICS_REPEAT_THRESHOLD`` times: likely N+1s."""
+        threshold = settings.REQUEST_METRICS_REPEAT_THRESHOLD
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+    def server_timing(self, total):
+        parts = [f'db;dur={self.db_time * 1000:.2f};desc="{self.queries} queries"']
+        parts += [f'{phase};dur={seconds * 1000:.2f}' for phase, seconds in self.phases.items()]
+        parts.append(f'total;dur={total * 1000:.2f}')
+        return ', '.join(parts)
+
+    def as_log_record(self, request, response, total):
+        return {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'view': self.view,
+            'queries': self.queries,
+            'db_ms': round(self.db_time * 1000, 2),
+            **{f'{phase}_ms': round(seconds * 1000, 2) for phase, seconds in self.phases.items()},
+            'total_ms': round(total * 1000, 2),
+            'streamed': response.streaming,
+            **self.fields,
+            'repeated_queries': [
+                {'count': count, 'sql': shape[:300]} for shape, count in self.repeated_queries()
+            ],
+        }
+
+
+@contextmanager
+def collecting(metrics):
+    """Record into ``metrics`` for the duration of the block."""
+    token = current_metrics.set(metrics)
+    try:
+        yield metrics
+    finally:
+        current_metrics.reset(token)
+
+
+def annotate(**fields):
+    """Add ``fields`` to the current request's log line, if it is sampled."""
+    metrics = current_metrics.get()
+    if metrics is not None:
+        metrics.fields.update(fields)
+
+
+@contextmanager
+def timed(phase):
+    """
+    Add the duration of the block to ``phase`` of the current request's
+    metrics. Nested blocks of the same phase (a list serializer's items)
+    are only counted once.
+    """
+    metrics = current_metrics.get()
+    if metrics is None:
+        yield
+        return
+    metrics.depth[phase] += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.depth[phase] -= 1
+        if not metrics.depth[phase]:
+            metrics.phases[phase] += time.perf_counter() - started
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.add_query(sql, time.perf_counter() - started)
+
+
+def install_query_recorder(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+connection_created.connect(install_query_recorder)
+
+
+def view_name(view_func, method):
+    """``ViewSet.action`` for DRF viewsets, ``View.method`` for other views."""
+    cls = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    if cls is None:
+        return f'{view_func.__module__}.{view_func.__qualname__}'
+    actions = getattr(view_func, 'actions', None)
+    if actions:
+        return f'{cls.__name__}.{actions.get(method.lower(), method.lower())}'
+    return f'{cls.__name__}.{method.lower()}'
+
+
+class RequestMetricsMiddleware:
+    """
+    For a ``REQUEST_METRICS_SAMPLE_RATE`` fraction of requests, count SQL
+    queries and time the database, serializers and rendering, then report
+    them in a ``Server-Timing`` header and one JSON log line on the
+    ``apis.instrumentation`` logger. Query shapes repeated within one
+    request are listed with the view action, and the line is logged as a
+    warning. Unsampled requests only pay for one random draw.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        metrics = self.start(request)
+        if metrics is None:
+            return self.get_response(request)
+        with collecting(metrics):
+            response = self.get_response(request)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = self.start(request)
+        if metrics is None:
+            return await self.get_response(request)
+        with collecting(metrics):
+            response = await self.get_response(request)
+        return self.finish(request, response, metrics)
+
+    def start(self, request):
+        rate = settings.REQUEST_METRICS_SAMPLE_RATE
+        if rate <= 0 or (rate < 1 and random.random() >= rate):
+            return None
+        # Connections opened before this module was imported have no recorder yet.
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(connection)
+        request.metrics = RequestMetrics()
+        return request.metrics
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = getattr(request, 'metrics', None)
+        if metrics is not None:
+            metrics.view = view_name(view_func, request.method)
+
+    def finish(self, request, response, metrics):
+        total = time.perf_counter() - metrics.started
+        response['Server-Timing'] = metrics.server_timing(total)
+        record = metrics.as_log_record(request, response, total)
+        level = logging.WARNING if record['repeated_queries'] else logging.INFO
+        logger.log(level, json.dumps(record))
+        return response
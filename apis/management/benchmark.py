@@ -0,0 +1,159 @@
+"""Datasets, scenarios and statistics of the ``benchmark`` command."""
+import json
+import math
+import time
+from contextlib import contextmanager
+
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.throttling import SimpleRateThrottle
+
+
+# Password of every seeded user, used by the login scenario.
+PASSWORD = 'benchmark-password'
+
+# Timing differences below this many milliseconds are never regressions.
+NOISE_FLOOR_MS = 2.0
+
+
+class Scenario:
+    """
+    One measured endpoint. ``path`` is a format string filled from the
+    run's parameters plus the iteration number ``i``; ``body`` is called
+    with the same values. ``methods`` are cycled through per iteration
+    (favorite, then unfavorite).
+    """
+
+    def __init__(self, name, path, methods=('get',), body=None, auth=False, status=200,
+                 weight=1.0):
+        self.name = name
+        self.path = path
+        self.methods = methods
+        self.body = body
+        self.auth = auth
+        self.status = status
+        # Fraction of --iterations run; password hashing scenarios are slow by design.
+        self.weight = weight
+
+    def iterations(self, iterations):
+        return max(1, math.ceil(iterations * self.weight))
+
+    def request(self, client, params, i, headers):
+        method = self.methods[i % len(self.methods)]
+        path = '/v1' + self.path.format(i=i, **params)
+        if self.body is None:
+            return getattr(client, method)(path, **headers)
+        return getattr(client, method)(
+            path, data=json.dumps(self.body(i=i, **params)), content_type='application/json',
+            **headers)
+
+
+SCENARIOS = [
+    Scenario('register', '/api/users/', ('post',), status=201, weight=0.2,
+             body=lambda i, run, **params: {'user': {
+                 'username': f'bench-{run}-{i}', 'email': f'bench-{run}-{i}@example.com',
+                 'password': f'Bench-password-{i}'}}),
+    Scenario('login', '/api/users/login/', ('post',), weight=0.2,
+             body=lambda viewer_email, **params: {'user': {
+                 'email': viewer_email, 'password': PASSWORD}}),
+    Scenario('articles_list', '/api/articles/?limit=20'),
+    Scenario('articles_list_100', '/api/articles/?limit=100'),
+    Scenario('articles_offset', '/api/articles/?limit=20&offset={deep_offset}'),
+    Scenario('articles_cursor', '/api/articles/?cursor=&limit=20'),
+    Scenario('articles_by_tag', '/api/articles/?tag={tag}'),
+    Scenario('articles_by_author', '/api/articles/?author={author}'),
+    Scenario('articles_favorited', '/api/articles/?favorited={author}'),
+    Scenario('articles_search', '/api/articles/?search={search}'),
+    Scenario('article_detail', '/api/articles/{slug}/'),
+    Scenario('article_detail_auth', '/api/articles/{slug}/', auth=True),
+    Scenario('feed', '/api/articles/feed/', auth=True),
+    Scenario('favorite', '/api/articles/{slug}/favorite/', ('post', 'delete'), auth=True),
+    Scenario('comments', '/api/articles/{slug}/comments/'),
+    Scenario('comment_create', '/api/articles/{slug}/comments/', ('post',), auth=True,
+             status=201, body=lambda i, **params: {'comment': {'body': f'Benchmark comment {i}'}}),
+    Scenario('profile', '/api/profiles/{author}/', auth=True),
+    Scenario('tags', '/api/tags/'),
+]
+
+
+@contextmanager
+def unthrottled(rate='1000000/second'):
+    """
+    Raise every throttle scope to ``rate`` for the duration of the block,
+    so no measured request is rejected while the throttles still run.
+    """
+    rates = SimpleRateThrottle.THROTTLE_RATES
+    SimpleRateThrottle.THROTTLE_RATES = {scope: rate for scope in rates}
+    try:
+        yield
+    finally:
+        SimpleRateThrottle.THROTTLE_RATES = rates
+
+
+def percentile(ordered, fraction):
+    """Linear-interpolated percentile of an ascending, non-empty list."""
+    position = (len(ordered) - 1) * fraction
+    lower = math.floor(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(timings, queries):
+    """Latency percentiles (ms), sequential throughput and queries per request."""
+    ordered = sorted(timings)
+    total = sum(ordered)
+    return {
+        'iterations': len(ordered),
+        'mean_ms': round(total / len(ordered) * 1000, 3),
+        'p50_ms': round(percentile(ordered, 0.50) * 1000, 3),
+        'p90_ms': round(percentile(ordered, 0.90) * 1000, 3),
+        'p99_ms': round(percentile(ordered, 0.99) * 1000, 3),
+        'max_ms': round(ordered[-1] * 1000, 3),
+        'throughput_rps': round(len(ordered) / total, 1) if total else None,
+        'queries_mean': round(sum(queries) / len(queries), 2),
+        'queries_max': max(queries),
+    }
+
+
+def measure(client, scenario, params, iterations, warmup, headers):
+    """Run ``scenario`` and return its summary; any unexpected status is an error."""
+    timings, queries = [], []
+    for i in range(-warmup, scenario.iterations(iterations)):
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            response = scenario.request(client, params, i, headers)
+            if response.streaming:
+                b''.join(response.streaming_content)
+            elapsed = time.perf_counter() - started
+        if response.status_code != scenario.status:
+            raise CommandError(
+                f'{scenario.name}: expected HTTP {scenario.status}, got {response.status_code}')
+        if i >= 0:
+            timings.append(elapsed)
+            queries.append(len(ctx.captured_queries))
+    return summarize(timings, queries)
+
+
+def compare(results, baseline, tolerance):
+    """
+    Return one line per regression against ``baseline``: more queries per
+    request than before, or a p50/p90 slower by more than ``tolerance``
+    (a fraction) and ``NOISE_FLOOR_MS``. Scenarios missing from either side
+    are not compared.
+    """
+    regressions = []
+    for scale, scenarios in results.items():
+        for name, current in scenarios.items():
+            previous = baseline.get(scale, {}).get(name)
+            if previous is None:
+                continue
+            if current['queries_max'] > previous['queries_max']:
+                regressions.append(
+                    f"{scale}/{name}: queries {previous['queries_max']} -> {current['queries_max']}")
+            for metric in ('p50_ms', 'p90_ms'):
+                limit = max(previous[metric] * (1 + tolerance), previous[metric] + NOISE_FLOOR_MS)
+                if current[metric] > limit:
+                    regressions.append(
+                        f'{scale}/{name}: {metric} {previous[metric]:.2f} -> {current[metric]:.2f}')
+    return regressions
@@ -0,0 +1,157 @@
+import json
+import platform
+import sqlite3
+from io import StringIO
+
+import django
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import Count
+from django.test import Client
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from ...authentication import user_records
+from ...models.article import Article
+from ...models.tag import Tag
+from ...models.user import User
+from ..benchmark import PASSWORD, SCENARIOS, compare, measure, unthrottled
+from ..synthetic import SCALES, WORDS
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed the seed_data dataset of each --scale into a local SQLite '
+        'database, measure latency percentiles, throughput and queries per '
+        'request of the API endpoints in-process, write the results as JSON '
+        'and compare them with a baseline. The database is flushed first; '
+        'run with --settings=realworld.settings_benchmark.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', nargs='+', choices=list(SCALES), default=['small'],
+                            help='Dataset scales to run, in order (default: small).')
+        parser.add_argument('--seed', type=int, default=42,
+                            help='Seed of the generated dataset.')
+        parser.add_argument('--iterations', type=int, default=30,
+                            help='Measured requests per scenario (password scenarios run fewer).')
+        parser.add_argument('--warmup', type=int, default=3,
+                            help='Unmeasured requests per scenario before measuring.')
+        parser.add_argument('--scenario', action='append', dest='scenarios',
+                            choices=[scenario.name for scenario in SCENARIOS],
+                            help='Only run this scenario; repeatable.')
+        parser.add_argument('--output', default='benchmark-results.json',
+                            help='Results file; "-" writes them to stdout.')
+        parser.add_argument('--baseline',
+                            help='Results file of an earlier run to compare against.')
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help='Allowed p50/p90 slowdown against the baseline, as a fraction.')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError(
+                'The benchmark flushes the database and only runs on SQLite; '
+                'use --settings=realworld.settings_benchmark.')
+        scenarios = [
+            scenario for scenario in SCENARIOS
+            if not options['scenarios'] or scenario.name in options['scenarios']
+        ]
+        self.migrate()
+        with unthrottled():
+            results = self.run(scenarios, options)
+
+        self.write_results(options, results)
+        if options['baseline']:
+            self.check_baseline(options['baseline'], results, options['tolerance'])
+
+    def run(self, scenarios, options):
+        results = {}
+        for scale in options['scale']:
+            self.seed(scale, options['seed'])
+            params = self.get_params(scale)
+            token = RefreshToken.for_user(User.objects.get(email=params['viewer_email']))
+            auth = {'HTTP_AUTHORIZATION': f'Bearer {token.access_token}'}
+            client = Client()
+            results[scale] = {}
+            for scenario in scenarios:
+                summary = measure(
+                    client, scenario, params, options['iterations'], options['warmup'],
+                    auth if scenario.auth else {})
+                results[scale][scenario.name] = summary
+                self.stderr.write(
+                    f"{scale:>6} {scenario.name:<22} p50 {summary['p50_ms']:8.2f}ms  "
+                    f"p90 {summary['p90_ms']:8.2f}ms  {summary['throughput_rps'] or 0:8.1f} req/s  "
+                    f"{summary['queries_mean']:5.1f} queries")
+        return results
+
+    def migrate(self):
+        executor = MigrationExecutor(connection)
+        if executor.migration_plan(executor.loader.graph.leaf_nodes()):
+            call_command('migrate', interactive=False, verbosity=0)
+
+    def seed(self, scale, seed):
+        """Replace the database contents with the ``seed_data`` dataset of ``scale``."""
+        call_command('flush', interactive=False, verbosity=0)
+        cache.clear()
+        # Primary keys are reused after the flush.
+        user_records.clear()
+        call_command('seed_data', scale=scale, seed=seed, password=PASSWORD, stderr=StringIO())
+        self.stderr.write(f'Seeded {scale}: ' + ', '.join(
+            f'{size} {name}' for name, size in SCALES[scale].items()))
+
+    def get_params(self, scale):
+        """Deterministic targets picked from the seeded data."""
+        busiest_author = User.objects.annotate(articles_count=Count('articles')).order_by(
+            '-articles_count', 'pk').values_list('username', flat=True).first()
+        busiest_tag = Tag.objects.annotate(articles_count=Count('articles')).order_by(
+            '-articles_count', 'pk').values_list('name', flat=True).first()
+        articles = Article.objects.count()
+        return {
+            'run': scale,
+            'viewer_email': 'user0@example.com',
+            'author': busiest_author,
+            'tag': busiest_tag,
+            'slug': Article.objects.order_by('-created_at', '-pk').values_list(
+                'slug', flat=True)[articles // 2],
+            'search': ' '.join(WORDS[:2]),
+            'deep_offset': max(articles // 2 - 20, 0),
+        }
+
+    def write_results(self, options, results):
+        document = {
+            'meta': {
+                'created_at': timezone.now().isoformat(),
+                'seed': options['seed'],
+                'iterations': options['iterations'],
+                'warmup': options['warmup'],
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'sqlite': sqlite3.sqlite_version,
+                'machine': platform.machine(),
+                'renderers': settings.REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'],
+            },
+            'results': results,
+        }
+        content = json.dumps(document, indent=2)
+        if options['output'] == '-':
+            self.stdout.write(content)
+        else:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                output.write(content + '\n')
+            self.stderr.write(f"Wrote {options['output']}")
+
+    def check_baseline(self, path, results, tolerance):
+        try:
+            with open(path, encoding='utf-8') as source:
+                baseline = json.load(source)['results']
+        except (OSError, ValueError, KeyError) as exc:
+            raise CommandError(f'Cannot read baseline {path}: {exc}')
+        regressions = compare(results, baseline, tolerance)
+        if regressions:
+            raise CommandError(
+                f'{len(regressions)} regression(s) against {path}:\n' + '\n'.join(regressions))
+        self.stderr.write(self.style.SUCCESS(f'No regressions against {path}.'))
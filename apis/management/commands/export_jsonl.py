@@ -0,0 +1,99 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand
+
+from ...models.article import Article
+from ...models.comment import Comment
+from ...models.tag import Tag
+from ...models.user import User
+from ..jsonl import RECORD_TYPES, Progress, pk_chunks
+
+
+class Command(BaseCommand):
+    help = (
+        'Stream users, tags, articles, follows, favorites and comments to a '
+        'JSONL file, one record per line, reading each table in primary key chunks.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='-',
+                            help='Output file; "-" (the default) writes to stdout.')
+        parser.add_argument('--chunk-size', type=int, default=2000,
+                            help='Rows fetched per query.')
+
+    def handle(self, *args, **options):
+        self.chunk_size = options['chunk_size']
+        # Progress goes to stderr so it never mixes with records on stdout.
+        self.progress = Progress(self.stderr, 'Exported')
+        if options['path'] == '-':
+            self.export(sys.stdout)
+        else:
+            with open(options['path'], 'w', encoding='utf-8') as output:
+                self.export(output)
+        self.stderr.write(self.style.SUCCESS(self.progress.summary()))
+
+    def export(self, output):
+        for record_type in RECORD_TYPES:
+            written = 0
+            for record in getattr(self, f'{record_type}_records')():
+                record['type'] = record_type
+                output.write(json.dumps(record, separators=(',', ':')))
+                output.write('\n')
+                written += 1
+                if written == self.chunk_size:
+                    self.progress.add(record_type, written)
+                    written = 0
+            if written:
+                self.progress.add(record_type, written)
+
+    def user_records(self):
+        rows = User.objects.values_list(
+            'pk', 'username', 'email', 'password', 'bio', 'image', 'is_active', 'date_joined')
+        for _, username, email, password, bio, image, is_active, date_joined in pk_chunks(
+                rows, self.chunk_size):
+            yield {
+                'username': username, 'email': email, 'password': password,
+                'bio': bio, 'image': image, 'isActive': is_active,
+                'dateJoined': date_joined.isoformat(),
+            }
+
+    def tag_records(self):
+        for _, name in pk_chunks(Tag.objects.values_list('pk', 'name'), self.chunk_size):
+            yield {'name': name}
+
+    def article_records(self):
+        articles = Article.objects.select_related('author').only(
+            'slug', 'title', 'description', 'body', 'created_at', 'updated_at',
+            'author__username',
+        ).prefetch_related('tags')
+        for article in pk_chunks(articles, self.chunk_size):
+            yield {
+                'slug': article.slug, 'title': article.title,
+                'description': article.description, 'body': article.body,
+                'tagList': [tag.name for tag in article.tags.all()],
+                'author': article.author.username,
+                'createdAt': article.created_at.isoformat(),
+                'updatedAt': article.updated_at.isoformat(),
+            }
+
+    def follow_records(self):
+        rows = User.following.through.objects.values_list(
+            'pk', 'from_user__username', 'to_user__username')
+        for _, follower, following in pk_chunks(rows, self.chunk_size):
+            yield {'follower': follower, 'following': following}
+
+    def favorite_records(self):
+        rows = Article.favorited_by.through.objects.values_list(
+            'pk', 'user__username', 'article__slug')
+        for _, username, slug in pk_chunks(rows, self.chunk_size):
+            yield {'user': username, 'article': slug}
+
+    def comment_records(self):
+        rows = Comment.objects.values_list(
+            'pk', 'article__slug', 'author__username', 'body', 'created_at', 'updated_at')
+        for _, slug, username, body, created_at, updated_at in pk_chunks(rows, self.chunk_size):
+            yield {
+                'article': slug, 'author': username, 'body': body,
+                'createdAt': created_at.isoformat(), 'updatedAt': updated_at.isoformat(),
+            }
@@ -0,0 +1,41 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ...favorites import favorite_buffer
+
+
+class Command(BaseCommand):
+    help = 'Apply buffered write-behind favorite toggles to Article.favorited_by.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep flushing every --interval seconds until interrupted.')
+        parser.add_argument('--interval', type=float, default=None,
+                            help='Seconds between flushes with --loop '
+                                 '(default: FAVORITES_FLUSH_INTERVAL).')
+        parser.add_argument('--stats', action='store_true',
+                            help='Only report the buffer depth and age.')
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self.report()
+            return
+
+        interval = options['interval'] or settings.FAVORITES_FLUSH_INTERVAL
+        while True:
+            applied = favorite_buffer.flush()
+            stats = favorite_buffer.stats()
+            self.stdout.write(
+                f"Applied {applied} favorite intent(s) in {stats['last_flush_seconds']:.3f}s; "
+                f"{stats['depth']} pending."
+            )
+            if not options['loop']:
+                break
+            time.sleep(interval)
+
+    def report(self):
+        stats = favorite_buffer.stats()
+        age = 'n/a' if stats['oldest_age'] is None else f"{stats['oldest_age']:.1f}s"
+        self.stdout.write(f"{stats['depth']} pending favorite intent(s), oldest {age}.")
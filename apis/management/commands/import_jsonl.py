@@ -0,0 +1,205 @@
+import json
+import sys
+from collections import defaultdict
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from ...caching import bump_version
+from ...models.article import Article
+from ...models.comment import Comment
+from ...models.feed import FeedEntry
+from ...models.search import ArticleTerm
+from ...models.tag import Tag
+from ...models.user import User
+from ...search import article_terms
+from ..jsonl import RECORD_TYPES, Progress, explicit_timestamps
+
+
+class Command(BaseCommand):
+    help = (
+        'Stream-import a JSONL dump written by export_jsonl with chunked '
+        'bulk_create. Users, tags, articles, follows and favorites that already '
+        'exist are left untouched; comments have no natural key and are always '
+        'inserted.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='-',
+                            help='Input file; "-" (the default) reads from stdin.')
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='Records inserted per transaction.')
+
+    def handle(self, *args, **options):
+        self.chunk_size = options['chunk_size']
+        self.progress = Progress(self.stderr, 'Imported')
+        self.skipped = 0
+        if options['path'] == '-':
+            self.load(sys.stdin)
+        else:
+            with open(options['path'], encoding='utf-8') as source:
+                self.load(source)
+
+        for namespace in ('articles', 'tags', 'favorites'):
+            bump_version(namespace)
+        self.stderr.write(self.style.SUCCESS(self.progress.summary()))
+        if self.skipped:
+            self.stderr.write(self.style.WARNING(
+                f'Skipped {self.skipped} record(s) referencing missing users or articles.'))
+
+    def load(self, source):
+        # Only one chunk is held at a time: a record of another type flushes
+        # the current one first, so references to earlier lines always resolve.
+        record_type, chunk = None, []
+        for line_number, line in enumerate(source, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as exc:
+                raise CommandError(f'Line {line_number}: {exc}')
+            if record.get('type') not in RECORD_TYPES:
+                raise CommandError(f'Line {line_number}: unknown record type {record.get("type")!r}')
+
+            if record['type'] != record_type or len(chunk) >= self.chunk_size:
+                self.flush(record_type, chunk)
+                record_type, chunk = record['type'], []
+            chunk.append(record)
+        self.flush(record_type, chunk)
+
+    def flush(self, record_type, chunk):
+        if not chunk:
+            return
+        with transaction.atomic():
+            getattr(self, f'import_{record_type}s')(chunk)
+        self.progress.add(record_type, len(chunk))
+
+    def user_ids(self, usernames):
+        return dict(User.objects.filter(username__in=set(usernames)).values_list('username', 'pk'))
+
+    def article_ids(self, slugs):
+        return dict(Article.objects.filter(slug__in=set(slugs)).values_list('slug', 'pk'))
+
+    def timestamp(self, value):
+        return parse_datetime(value) if value else timezone.now()
+
+    def import_users(self, chunk):
+        User.objects.bulk_create([
+            User(
+                username=record['username'],
+                email=record.get('email', ''),
+                password=record.get('password') or make_password(None),
+                bio=record.get('bio'),
+                image=record.get('image'),
+                is_active=record.get('isActive', True),
+                date_joined=self.timestamp(record.get('dateJoined')),
+            )
+            for record in chunk
+        ], ignore_conflicts=True)
+
+    def import_tags(self, chunk):
+        Tag.objects.bulk_create(
+            [Tag(name=record['name']) for record in chunk], ignore_conflicts=True)
+
+    def import_articles(self, chunk):
+        authors = self.user_ids(record['author'] for record in chunk)
+        articles = []
+        for record in chunk:
+            if record['author'] not in authors:
+                self.skipped += 1
+                continue
+            articles.append(Article(
+                slug=record['slug'], title=record['title'],
+                description=record['description'], body=record['body'],
+                author_id=authors[record['author']],
+                created_at=self.timestamp(record.get('createdAt')),
+                updated_at=self.timestamp(record.get('updatedAt')),
+            ))
+        with explicit_timestamps(Article):
+            Article.objects.bulk_create(articles, ignore_conflicts=True)
+
+        # ignore_conflicts returns no primary keys, so read them back by slug.
+        article_ids = self.article_ids(article.slug for article in articles)
+        tag_names = {name for record in chunk for name in record.get('tagList', ())}
+        Tag.objects.bulk_create([Tag(name=name) for name in tag_names], ignore_conflicts=True)
+        tag_ids = dict(Tag.objects.filter(name__in=tag_names).values_list('name', 'pk'))
+        Article.tags.through.objects.bulk_create([
+            Article.tags.through(article_id=article_ids[record['slug']], tag_id=tag_ids[name])
+            for record in chunk if record['slug'] in article_ids
+            for name in record.get('tagList', ())
+        ], ignore_conflicts=True)
+
+        # bulk_create sends no post_save, so index the stored text here.
+        stored = Article.objects.filter(pk__in=article_ids.values()).values_list(
+            'pk', 'title', 'description', 'body')
+        ArticleTerm.objects.filter(article_id__in=article_ids.values()).delete()
+        ArticleTerm.objects.bulk_create([
+            ArticleTerm(article_id=pk, term=term, weight=weight)
+            for pk, title, description, body in stored
+            for term, weight in article_terms(title, description, body).items()
+        ], batch_size=5000)
+
+    def import_follows(self, chunk):
+        users = self.user_ids(
+            username for record in chunk for username in (record['follower'], record['following']))
+        resolved = [
+            record for record in chunk
+            if record['follower'] in users and record['following'] in users
+        ]
+        self.skipped += len(chunk) - len(resolved)
+        pairs = {
+            (users[record['follower']], users[record['following']])
+            for record in resolved if record['follower'] != record['following']
+        }
+        User.following.through.objects.bulk_create([
+            User.following.through(from_user_id=follower_id, to_user_id=following_id)
+            for follower_id, following_id in pairs
+        ], ignore_conflicts=True)
+
+        authors = User.objects.only('pk', 'pull_feed').in_bulk(
+            {following_id for _, following_id in pairs})
+        followed = defaultdict(list)
+        for follower_id, following_id in pairs:
+            followed[follower_id].append(authors[following_id])
+        for follower_id, followed_authors in followed.items():
+            FeedEntry.objects.backfill_many(User(pk=follower_id), followed_authors)
+            bump_version(f'follows:{follower_id}')
+        User.objects.recount_follows({user_id for pair in pairs for user_id in pair})
+
+    def import_favorites(self, chunk):
+        users = self.user_ids(record['user'] for record in chunk)
+        articles = self.article_ids(record['article'] for record in chunk)
+        resolved = [
+            record for record in chunk
+            if record['user'] in users and record['article'] in articles
+        ]
+        self.skipped += len(chunk) - len(resolved)
+        favorites = {
+            (users[record['user']], articles[record['article']]) for record in resolved
+        }
+        Article.favorited_by.through.objects.bulk_create([
+            Article.favorited_by.through(user_id=user_id, article_id=article_id)
+            for user_id, article_id in favorites
+        ], ignore_conflicts=True)
+        Article.objects.filter(pk__in={article_id for _, article_id in favorites}).update(
+            favorites_count=Article.objects.actual_favorites_count())
+
+    def import_comments(self, chunk):
+        users = self.user_ids(record['author'] for record in chunk)
+        articles = self.article_ids(record['article'] for record in chunk)
+        comments = [
+            Comment(
+                article_id=articles[record['article']], author_id=users[record['author']],
+                body=record['body'],
+                created_at=self.timestamp(record.get('createdAt')),
+                updated_at=self.timestamp(record.get('updatedAt')),
+            )
+            for record in chunk
+            if record['author'] in users and record['article'] in articles
+        ]
+        self.skipped += len(chunk) - len(comments)
+        with explicit_timestamps(Comment):
+            Comment.objects.bulk_create(comments)
@@ -0,0 +1,69 @@
+import pstats
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...profiling import ProfileStore
+
+SORT_KEYS = {'tottime': 2, 'cumtime': 3, 'calls': 1}
+
+
+def location(function):
+    filename, line, name = function
+    if filename == '~':
+        return name
+    for path in sorted(sys.path, key=len, reverse=True):
+        if path and filename.startswith(path + '/'):
+            filename = filename[len(path) + 1:]
+            break
+    return f'{filename}:{line}({name})'
+
+
+class Command(BaseCommand):
+    help = (
+        'Merge the profiles collected by the on-demand profiler (PROFILING_DIR) '
+        'and print the top hotspots per view action and across all of them.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dir', help='Profile directory; defaults to PROFILING_DIR.')
+        parser.add_argument('--view', action='append', default=[],
+                            help='Only this view action (e.g. ArticleViewSet.list); repeatable.')
+        parser.add_argument('--sort', choices=list(SORT_KEYS), default='tottime',
+                            help='Rank functions by own time, time including callees or calls.')
+        parser.add_argument('--limit', type=int, default=15,
+                            help='Functions listed per section.')
+
+    def handle(self, *args, **options):
+        store = ProfileStore.from_settings()
+        if options['dir']:
+            store = ProfileStore(options['dir'], store.max_files)
+        actions = store.actions()
+        if options['view']:
+            actions = [name for name in actions if name in options['view']]
+        actions = [name for name in actions if store.files(name)]
+        if not actions:
+            raise CommandError(f'No profiles found in {store.directory}.')
+
+        combined = None
+        for name in actions:
+            files = store.files(name)
+            stats = pstats.Stats(*files)
+            self.write_section(f'{name} ({len(files)} profile file(s))', stats, options)
+            if combined is None:
+                combined = pstats.Stats(*files)
+            else:
+                combined.add(*files)
+        if len(actions) > 1:
+            self.write_section('All views', combined, options)
+
+    def write_section(self, title, stats, options):
+        key = SORT_KEYS[options['sort']]
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][key], reverse=True)
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'{title}: {stats.total_calls} calls in {stats.total_tt * 1000:.1f} ms'))
+        self.stdout.write(f"{'tottime_ms':>11} {'cumtime_ms':>11} {'calls':>9}  function")
+        for function, (primitive, calls, tottime, cumtime, callers) in rows[:options['limit']]:
+            self.stdout.write(
+                f'{tottime * 1000:11.2f} {cumtime * 1000:11.2f} {calls:9d}  {location(function)}')
+        self.stdout.write('')
@@ -0,0 +1,13 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...models.throttle import ThrottleBucket
+
+
+class Command(BaseCommand):
+    help = 'Delete throttle buckets that have fully refilled.'
+
+    def handle(self, *args, **options):
+        deleted = ThrottleBucket.objects.prune(time.time())
+        self.stdout.write(self.style.SUCCESS(f'Pruned {deleted} throttle bucket(s).'))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ...models.article import Article
+from ...models.search import ArticleTerm
+from ...search import article_terms
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the ArticleTerm full-text index from article text.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500,
+                            help='Number of articles reindexed per transaction.')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        indexed = 0
+        last_pk = 0
+        while True:
+            chunk = list(
+                Article.objects.filter(pk__gt=last_pk).order_by('pk')
+                .values_list('pk', 'title', 'description', 'body')[:chunk_size]
+            )
+            if not chunk:
+                break
+
+            terms = [
+                ArticleTerm(article_id=pk, term=term, weight=weight)
+                for pk, title, description, body in chunk
+                for term, weight in article_terms(title, description, body).items()
+            ]
+            with transaction.atomic():
+                ArticleTerm.objects.filter(article_id__in=[row[0] for row in chunk]).delete()
+                ArticleTerm.objects.bulk_create(terms, batch_size=5000)
+
+            indexed += len(chunk)
+            last_pk = chunk[-1][0]
+            self.stdout.write(f'Indexed {indexed} article(s)...')
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt search index for {indexed} article(s).'))
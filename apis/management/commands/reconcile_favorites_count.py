@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Max, Min
+
+from ...models.article import Article
+
+
+class Command(BaseCommand):
+    help = 'Recompute drifted Article.favorites_count values in primary key chunks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='Number of primary keys scanned per chunk.')
+        parser.add_argument('--sleep', type=float, default=0.0,
+                            help='Seconds to pause between chunks to spread load.')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report drifted articles without updating them.')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        bounds = Article.objects.aggregate(low=Min('pk'), high=Max('pk'))
+        if bounds['low'] is None:
+            self.stdout.write('No articles to reconcile.')
+            return
+
+        fixed = 0
+        start = bounds['low']
+        while start <= bounds['high']:
+            stop = start + chunk_size
+            chunk = Article.objects.filter(pk__gte=start, pk__lt=stop)
+            # Read without locks; only drifted rows are touched, each chunk in
+            # its own short transaction, and the value written is recomputed by
+            # the UPDATE itself so concurrent favorites are not lost.
+            drifted = list(
+                chunk.annotate(actual=Article.objects.actual_favorites_count())
+                .exclude(favorites_count=F('actual'))
+                .values_list('pk', flat=True)
+            )
+            if drifted and not options['dry_run']:
+                with transaction.atomic():
+                    Article.objects.filter(pk__in=drifted).update(
+                        favorites_count=Article.objects.actual_favorites_count())
+            fixed += len(drifted)
+            start = stop
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        verb = 'Found' if options['dry_run'] else 'Reconciled'
+        self.stdout.write(self.style.SUCCESS(f'{verb} {fixed} drifted article(s).'))
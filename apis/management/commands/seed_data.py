@@ -0,0 +1,241 @@
+import random
+from collections import defaultdict, deque
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+
+from ...caching import bump_version
+from ...models.article import Article
+from ...models.comment import Comment
+from ...models.feed import FeedEntry
+from ...models.search import ArticleTerm
+from ...models.tag import Tag
+from ...models.user import User
+from ...search import article_terms
+from ..jsonl import Progress, explicit_timestamps
+from ..synthetic import SCALES, WORDS, ZipfSampler, pareto_count
+
+
+# Generated timestamps end here unless --until is given, so a seed always
+# produces the same rows.
+DEFAULT_UNTIL = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a deterministic synthetic dataset with bulk inserts: '
+        'power-law follower counts and authorship, long-tail tags, viral '
+        'articles with huge favorite and comment counts, materialized feeds '
+        'and the search index. Every user gets the same precomputed password '
+        'hash. Rows are added to existing data; use a new --prefix per run.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=list(SCALES), default='small',
+                            help='Preset for --users, --articles and --tags.')
+        parser.add_argument('--users', type=int)
+        parser.add_argument('--articles', type=int)
+        parser.add_argument('--tags', type=int)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--prefix', default='',
+                            help='Prepended to usernames, tag names and slugs.')
+        parser.add_argument('--password', default='password',
+                            help='Password of every generated user, hashed once.')
+        parser.add_argument('--days', type=int, default=365,
+                            help='Articles are spread over this many days before --until.')
+        parser.add_argument('--until', type=datetime.fromisoformat, default=DEFAULT_UNTIL,
+                            help='Timestamp of the newest article (ISO 8601, UTC if naive).')
+        parser.add_argument('--followers-mean', type=float, default=20,
+                            help='Average followers per user.')
+        parser.add_argument('--followers-alpha', type=float, default=1.6,
+                            help='Pareto shape of follower counts; lower means bigger celebrities.')
+        parser.add_argument('--author-exponent', type=float, default=1.0,
+                            help='Zipf exponent of articles per author.')
+        parser.add_argument('--tag-exponent', type=float, default=1.1,
+                            help='Zipf exponent of tag usage.')
+        parser.add_argument('--max-tags', type=int, default=4,
+                            help='Most tags on one article.')
+        parser.add_argument('--favorites-mean', type=float, default=5)
+        parser.add_argument('--favorites-alpha', type=float, default=1.4)
+        parser.add_argument('--comments-mean', type=float, default=2)
+        parser.add_argument('--comments-alpha', type=float, default=1.4)
+        parser.add_argument('--max-comments', type=int, default=2000,
+                            help='Most comments on a non-viral article.')
+        parser.add_argument('--viral-fraction', type=float, default=0.001,
+                            help='Share of articles that go viral (at least one if above 0).')
+        parser.add_argument('--viral-favorites-share', type=float, default=0.3,
+                            help='Share of all users who favorite a viral article.')
+        parser.add_argument('--viral-comments', type=int, default=5000,
+                            help='Comments on each viral article.')
+        parser.add_argument('--body-words', type=int, default=60)
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Rows per bulk INSERT.')
+        parser.add_argument('--skip-feed', action='store_true',
+                            help='Do not materialize followers\' feeds.')
+
+    def handle(self, *args, **options):
+        self.options = options
+        for name in ('users', 'articles', 'tags'):
+            if options[name] is None:
+                options[name] = SCALES[options['scale']][name]
+        if options['users'] < 2:
+            raise CommandError('At least two users are needed.')
+        for name in ('followers_alpha', 'favorites_alpha', 'comments_alpha'):
+            if options[name] <= 1:
+                raise CommandError(f"--{name.replace('_', '-')} must be greater than 1.")
+        prefix = options['prefix']
+        if (User.objects.filter(username=f'{prefix}user0').exists()
+                or Article.objects.filter(slug=f'{prefix}article-0').exists()):
+            raise CommandError(f'Data with prefix {prefix!r} exists already; pick another --prefix.')
+
+        self.rng = random.Random(options['seed'])
+        self.progress = Progress(self.stderr, 'Inserted')
+        self.pending = defaultdict(list)
+        self.password = make_password(options['password'])
+        until = options['until']
+        self.until = until if until.tzinfo else until.replace(tzinfo=timezone.utc)
+        self.since = self.until - timedelta(days=options['days'])
+
+        with explicit_timestamps(Article, Comment):
+            self.generate_users()
+            self.generate_tags()
+            self.generate_articles()
+            self.generate_follows()
+            self.flush()
+        User.objects.filter(pk__gte=self.first_user_id).update(
+            following_count=User.objects.actual_follow_count('from_user_id'))
+
+        for namespace in ('articles', 'tags', 'favorites'):
+            bump_version(namespace)
+        self.stderr.write(self.style.SUCCESS(self.progress.summary()))
+
+    # Rows are buffered per model and inserted parents first, so foreign keys
+    # always resolve, one transaction per batch.
+    write_order = (
+        User, Tag, Article, Article.tags.through, ArticleTerm,
+        Article.favorited_by.through, Comment, User.following.through, FeedEntry,
+    )
+
+    def add(self, row):
+        rows = self.pending[type(row)]
+        rows.append(row)
+        if len(rows) >= self.options['batch_size']:
+            self.flush()
+
+    def flush(self):
+        with transaction.atomic():
+            for model in self.write_order:
+                rows = self.pending.pop(model, None)
+                if rows:
+                    model.objects.bulk_create(rows, batch_size=self.options['batch_size'])
+                    self.progress.add(model._meta.model_name, len(rows))
+
+    def next_id(self, model):
+        return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+    def sentence(self, words):
+        choice = self.rng.choice
+        return ' '.join(choice(WORDS) for _ in range(words))
+
+    def generate_users(self):
+        options, rng = self.options, self.rng
+        count = options['users']
+        self.first_user_id = self.next_id(User)
+        # Follower counts are drawn up front so they and pull_feed are stored
+        # with the user; generate_follows then picks that many followers.
+        self.followers_counts = [
+            pareto_count(rng, options['followers_mean'], options['followers_alpha'], count - 1)
+            for _ in range(count)
+        ]
+        for index, followers_count in enumerate(self.followers_counts):
+            username = f"{options['prefix']}user{index}"
+            self.add(User(
+                pk=self.first_user_id + index, username=username, email=f'{username}@example.com',
+                password=self.password, bio=self.sentence(8),
+                date_joined=self.since - timedelta(seconds=rng.randrange(365 * 86400)),
+                followers_count=followers_count,
+                pull_feed=followers_count > settings.FEED_FANOUT_LIMIT,
+            ))
+
+    def generate_tags(self):
+        first_tag_id = self.next_id(Tag)
+        self.tag_ids = []
+        for index in range(self.options['tags']):
+            self.tag_ids.append(first_tag_id + index)
+            self.add(Tag(pk=first_tag_id + index, name=f"{self.options['prefix']}tag{index}"))
+
+    def generate_articles(self):
+        options, rng = self.options, self.rng
+        users, count = options['users'], options['articles']
+        first_article_id = self.next_id(Article)
+        authors = ZipfSampler(rng, users, options['author_exponent'])
+        tags = ZipfSampler(rng, len(self.tag_ids), options['tag_exponent'])
+        viral_count = round(count * options['viral_fraction'])
+        if options['viral_fraction'] > 0:
+            viral_count = max(viral_count, 1)
+        viral = set(rng.sample(range(count), min(viral_count, count)))
+        span = (self.until - self.since) / count
+        # The newest FEED_BACKFILL_LIMIT articles of each author, for the feeds.
+        self.recent = defaultdict(lambda: deque(maxlen=settings.FEED_BACKFILL_LIMIT))
+
+        for index in range(count):
+            pk = first_article_id + index
+            author_id = self.first_user_id + authors()
+            created_at = self.since + span * (index + 1)
+            if index in viral:
+                favorites = int(users * options['viral_favorites_share'])
+                comments = options['viral_comments']
+            else:
+                favorites = pareto_count(
+                    rng, options['favorites_mean'], options['favorites_alpha'], users)
+                comments = pareto_count(
+                    rng, options['comments_mean'], options['comments_alpha'],
+                    options['max_comments'])
+            title = self.sentence(6).capitalize()
+            description = self.sentence(15)
+            body = self.sentence(options['body_words'])
+            self.add(Article(
+                pk=pk, slug=f"{options['prefix']}article-{index}", title=title,
+                description=description, body=body, author_id=author_id,
+                created_at=created_at, updated_at=created_at, favorites_count=favorites,
+            ))
+            self.recent[author_id].append((pk, created_at))
+
+            for tag in tags.distinct(rng.randint(0, options['max_tags'])):
+                self.add(Article.tags.through(article_id=pk, tag_id=self.tag_ids[tag]))
+            for term, weight in article_terms(title, description, body).items():
+                self.add(ArticleTerm(article_id=pk, term=term, weight=weight))
+            for user in rng.sample(range(users), favorites):
+                self.add(Article.favorited_by.through(
+                    article_id=pk, user_id=self.first_user_id + user))
+            age = (self.until - created_at).total_seconds()
+            for _ in range(comments):
+                commented_at = created_at + timedelta(seconds=rng.random() * age)
+                self.add(Comment(
+                    article_id=pk, author_id=self.first_user_id + rng.randrange(users),
+                    body=self.sentence(20), created_at=commented_at, updated_at=commented_at,
+                ))
+
+    def generate_follows(self):
+        rng, users = self.rng, self.options['users']
+        Follow = User.following.through
+        for index, followers_count in enumerate(self.followers_counts):
+            author_id = self.first_user_id + index
+            followers = [
+                follower for follower in rng.sample(range(users), followers_count + 1)
+                if follower != index
+            ][:followers_count]
+            materialize = (
+                not self.options['skip_feed'] and followers_count <= settings.FEED_FANOUT_LIMIT)
+            for follower in followers:
+                follower_id = self.first_user_id + follower
+                self.add(Follow(from_user_id=follower_id, to_user_id=author_id))
+                if materialize:
+                    for article_id, created_at in self.recent[author_id]:
+                        self.add(FeedEntry(
+                            user_id=follower_id, article_id=article_id,
+                            author_id=author_id, created_at=created_at))
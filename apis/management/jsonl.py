@@ -0,0 +1,72 @@
+"""Shared pieces of the ``export_jsonl`` and ``import_jsonl`` commands."""
+import time
+from contextlib import contextmanager
+
+
+# Export order; importing in this order resolves every reference.
+RECORD_TYPES = ('user', 'tag', 'article', 'follow', 'favorite', 'comment')
+
+
+class Progress:
+    """Per-record-type row counts and throughput, written after every chunk."""
+
+    def __init__(self, stream, verb):
+        self.stream = stream
+        self.verb = verb
+        self.started = time.monotonic()
+        self.counts = {}
+
+    def add(self, record_type, rows):
+        self.counts[record_type] = self.counts.get(record_type, 0) + rows
+        self.stream.write(
+            f'{self.verb} {self.counts[record_type]} {record_type} row(s), '
+            f'{self.rate(sum(self.counts.values())):.0f} rows/s'
+        )
+
+    def rate(self, rows):
+        return rows / max(time.monotonic() - self.started, 1e-6)
+
+    def summary(self):
+        total = sum(self.counts.values())
+        parts = ', '.join(f'{count} {record_type}' for record_type, count in self.counts.items())
+        elapsed = time.monotonic() - self.started
+        return (f'{self.verb} {total} row(s) in {elapsed:.1f}s '
+                f'({self.rate(total):.0f} rows/s): {parts or "nothing"}')
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """
+    Turn off ``auto_now``/``auto_now_add`` so ``bulk_create`` keeps the
+    timestamps read from the dump instead of stamping the import time.
+    """
+    saved = []
+    for model in models:
+        for field in model._meta.concrete_fields:
+            if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+                saved.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def pk_chunks(queryset, chunk_size):
+    """
+    Yield the rows of ``queryset`` in primary key order, reading one keyset
+    chunk (``pk > last ORDER BY pk LIMIT chunk_size``) per query. Memory
+    stays bounded even where ``iterator()`` has no server-side cursor, as
+    with mysqlclient, which buffers whole result sets. ``values_list``
+    querysets must select ``pk`` first.
+    """
+    queryset = queryset.order_by('pk')
+    last = None
+    while True:
+        chunk = queryset if last is None else queryset.filter(pk__gt=last)
+        rows = list(chunk[:chunk_size])
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        last = rows[-1][0] if isinstance(rows[-1], tuple) else rows[-1].pk
@@ -0,0 +1,56 @@
+"""Scale presets and samplers of the ``seed_data`` command."""
+from bisect import bisect
+from itertools import accumulate
+
+
+# Default sizes per --scale; every distribution parameter has its own option.
+SCALES = {
+    'tiny': {'users': 20, 'articles': 100, 'tags': 10},
+    'small': {'users': 200, 'articles': 2000, 'tags': 50},
+    'medium': {'users': 2000, 'articles': 50000, 'tags': 500},
+    'large': {'users': 50000, 'articles': 1000000, 'tags': 5000},
+    'huge': {'users': 250000, 'articles': 5000000, 'tags': 20000},
+}
+
+WORDS = (
+    'django rest api python query index cache feed article comment profile tag '
+    'async latency throughput database cursor page render token follow favorite '
+    'deploy review release design pattern testing scale migration schema server'
+).split()
+
+
+class ZipfSampler:
+    """
+    Draw ``0 <= index < n`` with probability proportional to
+    ``1 / rank ** exponent``. Ranks are a seeded shuffle of the indexes, so
+    the popular items are spread over the whole range.
+    """
+
+    def __init__(self, rng, n, exponent):
+        self.rng = rng
+        self.ranked = list(range(n))
+        rng.shuffle(self.ranked)
+        self.cumulative = list(accumulate(1 / rank ** exponent for rank in range(1, n + 1)))
+        self.total = self.cumulative[-1] if n else 0
+
+    def __call__(self):
+        position = bisect(self.cumulative, self.rng.random() * self.total)
+        return self.ranked[min(position, len(self.ranked) - 1)]
+
+    def distinct(self, k):
+        """Up to ``k`` distinct indexes, most likely the popular ones."""
+        k = min(k, len(self.ranked))
+        chosen = set()
+        # Heavy heads make repeats likely; the attempt cap keeps this bounded.
+        for _ in range(k * 4):
+            chosen.add(self())
+            if len(chosen) == k:
+                break
+        return sorted(chosen)
+
+
+def pareto_count(rng, mean, alpha, cap):
+    """A heavy-tailed count with the given ``mean`` (for ``alpha > 1``), at most ``cap``."""
+    if mean <= 0 or cap <= 0:
+        return 0
+    return min(cap, int(mean * (alpha - 1) * (rng.paretovariate(alpha) - 1) + 0.5))
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:46
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_favorites_count(apps, schema_editor):
+    Article = apps.get_model('apis', 'Article')
+    Favorite = Article.favorited_by.through
+    counts = Favorite.objects.filter(
+        article_id=OuterRef('pk')
+    ).order_by().values('article_id').annotate(total=Count('*')).values('total')
+    Article.objects.update(favorites_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apis', '0004_user_following'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_favorites_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:47
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_feeds(apps, schema_editor):
+    User = apps.get_model('apis', 'User')
+    Article = apps.get_model('apis', 'Article')
+    FeedEntry = apps.get_model('apis', 'FeedEntry')
+    Follow = User.following.through
+
+    User.objects.annotate(
+        follower_total=Count('followers')
+    ).filter(follower_total__gt=settings.FEED_FANOUT_LIMIT).update(pull_feed=True)
+
+    batch = []
+    follows = Follow.objects.filter(to_user__pull_feed=False).values_list(
+        'from_user_id', 'to_user_id')
+    for user_id, author_id in follows.iterator(chunk_size=1000):
+        recent = Article.objects.filter(author_id=author_id).order_by(
+            '-created_at').values_list('pk', 'created_at')[:settings.FEED_BACKFILL_LIMIT]
+        batch.extend(
+            FeedEntry(user_id=user_id, article_id=article_id,
+                      author_id=author_id, created_at=created_at)
+            for article_id, created_at in recent
+        )
+        if len(batch) >= 1000:
+            FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apis', '0005_article_favorites_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='pull_feed',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField()),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='apis.article')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-created_at', '-article'], name='feed_user_created_idx'), models.Index(fields=['user', 'author'], name='feed_user_author_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'article'), name='unique_feed_entry')],
+            },
+        ),
+        migrations.RunPython(backfill_feeds, migrations.RunPython.noop),
+    ]
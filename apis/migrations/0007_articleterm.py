@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from apis.search import article_terms
+
+
+def index_articles(apps, schema_editor):
+    Article = apps.get_model('apis', 'Article')
+    ArticleTerm = apps.get_model('apis', 'ArticleTerm')
+    batch = []
+    articles = Article.objects.values_list('pk', 'title', 'description', 'body')
+    for pk, title, description, body in articles.iterator(chunk_size=500):
+        batch.extend(
+            ArticleTerm(article_id=pk, term=term, weight=weight)
+            for term, weight in article_terms(title, description, body).items()
+        )
+        if len(batch) >= 5000:
+            ArticleTerm.objects.bulk_create(batch)
+            batch = []
+    ArticleTerm.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apis', '0006_feedentry_user_pull_feed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticleTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('weight', models.PositiveIntegerField(default=1)),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='apis.article')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('term', 'article'), name='unique_article_term')],
+            },
+        ),
+        migrations.RunPython(index_articles, migrations.RunPython.noop),
+    ]
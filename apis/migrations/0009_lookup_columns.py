@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:02
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apis', '0008_throttlebucket'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tag',
+            name='name_lower',
+            field=models.GeneratedField(db_index=True, db_persist=True, expression=django.db.models.functions.text.Lower('name'), output_field=models.CharField(max_length=100)),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='email_lower',
+            field=models.GeneratedField(db_index=True, db_persist=True, expression=django.db.models.functions.text.Lower('email'), output_field=models.CharField(max_length=254)),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='username_lower',
+            field=models.GeneratedField(db_index=True, db_persist=True, expression=django.db.models.functions.text.Lower('username'), output_field=models.CharField(max_length=150)),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apis', '0009_lookup_columns'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['-created_at', '-id'], name='article_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['author', '-created_at'], name='article_author_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['article', '-created_at'], name='comment_article_created_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:13
+
+import apis.models.user
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_follow_counts(apps, schema_editor):
+    User = apps.get_model('apis', 'User')
+    Follow = User.following.through
+
+    def counts(column):
+        rows = Follow.objects.filter(**{column: OuterRef('pk')}).order_by().values(
+            column).annotate(total=Count('*')).values('total')
+        return Coalesce(Subquery(rows), 0)
+
+    User.objects.update(
+        followers_count=counts('to_user_id'),
+        following_count=counts('from_user_id'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apis', '0010_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='user',
+            managers=[
+                ('objects', apis.models.user.FollowCountsUserManager()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='following_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_follow_counts, migrations.RunPython.noop),
+    ]
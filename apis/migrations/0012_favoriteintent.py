@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:16
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apis', '0011_user_follow_counts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FavoriteIntent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('favorited', models.BooleanField()),
+                ('updated_at', models.DateTimeField()),
+                ('article', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='favorite_intents', to='apis.article')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='favorite_intents', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['updated_at'], name='favorite_intent_age_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'article'), name='unique_favorite_intent')],
+            },
+        ),
+    ]
@@ -2,10 +2,18 @@ from .user import User
 from .tag import Tag
 from .article import Article
 from .comment import Comment
+from .feed import FeedEntry
+from .search import ArticleTerm
+from .throttle import ThrottleBucket
+from .favorite import FavoriteIntent
 
 __all__ = [
     'User',
     'Tag', 
     'Article',
     'Comment',
+    'FeedEntry',
+    'ArticleTerm',
+    'ThrottleBucket',
+    'FavoriteIntent',
 ]
@@ -1,6 +1,98 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, Count, Exists, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
 from django.conf import settings
 
+from ..caching import bump_version
+
+
+class ArticleQuerySet(models.QuerySet):
+    def actual_favorites_count(self):
+        """Correlated subquery counting the favorite rows of the outer article."""
+        counts = Article.favorited_by.through.objects.filter(
+            article_id=OuterRef('pk')
+        ).order_by().values('article_id').annotate(total=Count('*')).values('total')
+        return Coalesce(Subquery(counts), 0)
+
+    def feed_for(self, user, has_pull_authors=None):
+        """
+        Articles in ``user``'s materialized feed, newest first. Articles of
+        followed pull-mode authors are merged in at read time. Async callers
+        pass ``has_pull_authors`` from ``pull_authors_of(user).aexists()``.
+        """
+        pull_authors = self.pull_authors_of(user)
+        if has_pull_authors is None:
+            has_pull_authors = pull_authors.exists()
+        if not has_pull_authors:
+            return self.filter(feed_entries__user=user).annotate(
+                feed_created_at=F('feed_entries__created_at')
+            ).order_by('-feed_created_at', '-pk')
+
+        pushed = user.feed_entries.values('article_id')
+        return self.filter(
+            Q(pk__in=pushed) | Q(author__in=pull_authors)
+        ).annotate(feed_created_at=F('created_at')).order_by('-feed_created_at', '-pk')
+
+    def pull_authors_of(self, user):
+        return user.following.filter(pull_feed=True).values('pk')
+
+    def followed_by(self, user):
+        """
+        Every article of the authors ``user`` follows, newest first, read
+        with a join over the follow rows. Complete beyond the materialized
+        feed's ``FEED_BACKFILL_LIMIT`` window.
+        """
+        return self.filter(author__in=user.following.values('pk')).annotate(
+            feed_created_at=F('created_at')
+        ).order_by('-feed_created_at', '-pk')
+
+    def with_viewer_state(self, user):
+        """
+        Annotate the viewer's favorited flag and whether the viewer follows
+        the author, so list pages need no per-row queries. With write-behind
+        favorites, the viewer's unflushed intents override the stored flag
+        and ``viewer_favorites_delta`` corrects ``favorites_count`` for them.
+        """
+        if user is None or not user.is_authenticated:
+            return self.annotate(
+                viewer_favorited=Value(False),
+                viewer_follows_author=Value(False),
+                viewer_favorites_delta=Value(0),
+            )
+
+        follows = Article.author.field.related_model.following.through
+        favorited = Exists(
+            Article.favorited_by.through.objects.filter(article_id=OuterRef('pk'), user_id=user.pk)
+        )
+        queryset = self.annotate(
+            viewer_follows_author=Exists(
+                follows.objects.filter(
+                    from_user_id=user.pk, to_user_id=OuterRef('author_id'))
+            ),
+        )
+        if not settings.FAVORITES_WRITE_BEHIND:
+            return queryset.annotate(
+                viewer_favorited=favorited,
+                viewer_favorites_delta=Value(0),
+            )
+
+        from .favorite import FavoriteIntent
+        pending = FavoriteIntent.objects.filter(
+            article_id=OuterRef('pk'), user_id=user.pk).values('favorited')[:1]
+        return queryset.annotate(
+            viewer_favorited_stored=favorited,
+            viewer_pending_favorite=Subquery(pending),
+        ).annotate(
+            viewer_favorited=Coalesce(
+                F('viewer_pending_favorite'), F('viewer_favorited_stored'),
+                output_field=models.BooleanField()),
+            viewer_favorites_delta=Case(
+                When(viewer_pending_favorite=True, viewer_favorited_stored=False, then=Value(1)),
+                When(viewer_pending_favorite=False, viewer_favorited_stored=True, then=Value(-1)),
+                default=Value(0),
+            ),
+        )
+
 
 class Article(models.Model):
     slug = models.SlugField(max_length=255, unique=True)
@@ -9,6 +101,7 @@ class Article(models.Model):
     body = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    favorites_count = models.PositiveIntegerField(default=0)
     
     # Relationships
     author = models.ForeignKey(settings.AUTH_USER_MODEL,
@@ -22,14 +115,42 @@ class Article(models.Model):
         related_name='favorited_articles'
     )
 
+    objects = ArticleQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='article_created_idx'),
+            models.Index(fields=['author', '-created_at'], name='article_author_created_idx'),
+        ]
+
     def __str__(self):
         return self.title
     
-    @property
-    def favorites_count(self):
-        return self.favorited_by.count()
-    
     def is_favorited_by(self, user):
         if user.is_anonymous:
             return False
         return self.favorited_by.filter(id=user.id).exists()
+
+    def favorite(self, user):
+        """Add ``user`` to the favorites. Returns True if a row was inserted."""
+        with transaction.atomic():
+            _, created = Article.favorited_by.through.objects.get_or_create(
+                article_id=self.pk, user_id=user.pk)
+            if created:
+                Article.objects.filter(pk=self.pk).update(
+                    favorites_count=F('favorites_count') + 1)
+        if created:
+            bump_version('favorites')
+        return created
+
+    def unfavorite(self, user):
+        """Remove ``user`` from the favorites. Returns True if a row was deleted."""
+        with transaction.atomic():
+            deleted, _ = Article.favorited_by.through.objects.filter(
+                article_id=self.pk, user_id=user.pk).delete()
+            if deleted:
+                Article.objects.filter(pk=self.pk, favorites_count__gt=0).update(
+                    favorites_count=F('favorites_count') - 1)
+        if deleted:
+            bump_version('favorites')
+        return bool(deleted)
@@ -1,7 +1,20 @@
 from django.db import models
+from django.db.models import Exists, OuterRef, Value
 from django.conf import settings
 
 
+class CommentQuerySet(models.QuerySet):
+    def with_viewer_state(self, user):
+        """Annotate whether the viewer follows each comment's author."""
+        if user is None or not user.is_authenticated:
+            return self.annotate(viewer_follows_author=Value(False))
+
+        follows = Comment.author.field.related_model.following.through
+        return self.annotate(viewer_follows_author=Exists(
+            follows.objects.filter(from_user_id=user.pk, to_user_id=OuterRef('author_id'))
+        ))
+
+
 class Comment(models.Model):
     body = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
@@ -19,8 +32,13 @@ class Comment(models.Model):
         related_name='comments'
     )
     
+    objects = CommentQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['article', '-created_at'], name='comment_article_created_idx'),
+        ]
         
     def __str__(self):
         return f"Comment by {self.author.username} on {self.article.title}"
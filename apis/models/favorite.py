@@ -0,0 +1,117 @@
+from collections import Counter, defaultdict
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db import connection, models, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+
+class FavoriteIntentManager(models.Manager):
+    def record(self, user, article, favorited):
+        """Upsert the latest favorite/unfavorite intent of ``user`` for ``article``."""
+        features = connection.features
+        self.bulk_create(
+            [self.model(user_id=user.pk, article_id=article.pk,
+                        favorited=favorited, updated_at=timezone.now())],
+            update_conflicts=True,
+            # MySQL's ON DUPLICATE KEY UPDATE takes no conflict target.
+            unique_fields=['user', 'article'] if features.supports_update_conflicts_with_target else None,
+            update_fields=['favorited', 'updated_at'],
+        )
+
+    def pending_for(self, user, article_ids):
+        """Map each of ``article_ids`` with an unflushed intent of ``user`` to it."""
+        return dict(self.filter(user_id=user.pk, article_id__in=article_ids).values_list(
+            'article_id', 'favorited'))
+
+    def apply_batch(self, limit):
+        """
+        Apply up to ``limit`` of the oldest intents to ``favorited_by`` in one
+        transaction, and move each affected article's ``favorites_count`` by
+        the net number of rows added or removed. Intents being applied by
+        another flusher are skipped. Returns the number applied.
+        """
+        Article = self.model.article.field.related_model
+        Favorite = Article.favorited_by.through
+        skip_locked = connection.features.has_select_for_update_skip_locked
+        with transaction.atomic():
+            intents = list(
+                self.select_for_update(skip_locked=skip_locked).order_by('updated_at')
+                .values_list('pk', 'user_id', 'article_id', 'favorited')[:limit]
+            )
+            if not intents:
+                return 0
+
+            existing = set(Favorite.objects.filter(
+                user_id__in={intent[1] for intent in intents},
+                article_id__in={intent[2] for intent in intents},
+            ).values_list('user_id', 'article_id'))
+            additions = [
+                (user_id, article_id) for _, user_id, article_id, favorited in intents
+                if favorited and (user_id, article_id) not in existing
+            ]
+            removals = [
+                (user_id, article_id) for _, user_id, article_id, favorited in intents
+                if not favorited and (user_id, article_id) in existing
+            ]
+
+            Favorite.objects.bulk_create([
+                Favorite(user_id=user_id, article_id=article_id)
+                for user_id, article_id in additions
+            ], ignore_conflicts=True)
+            if removals:
+                Favorite.objects.filter(reduce(or_, [
+                    Q(user_id=user_id, article_id=article_id) for user_id, article_id in removals
+                ])).delete()
+
+            deltas = Counter(article_id for _, article_id in additions)
+            deltas.subtract(article_id for _, article_id in removals)
+            by_delta = defaultdict(list)
+            for article_id, delta in deltas.items():
+                if delta:
+                    by_delta[delta].append(article_id)
+            for delta, article_ids in by_delta.items():
+                Article.objects.filter(pk__in=article_ids).update(
+                    favorites_count=F('favorites_count') + delta)
+            self.filter(pk__in=[intent[0] for intent in intents]).delete()
+        return len(intents)
+
+    def oldest(self):
+        return self.order_by('updated_at').values_list('updated_at', flat=True).first()
+
+
+class FavoriteIntent(models.Model):
+    """
+    The latest favorite toggle of a user on an article that has not been
+    written to ``Article.favorited_by`` yet (see ``apis.favorites``).
+    Repeated toggles overwrite the same row, so only the final state of
+    each (user, article) pair is ever applied.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='favorite_intents'
+    )
+    article = models.ForeignKey(
+        'Article',
+        on_delete=models.CASCADE,
+        related_name='favorite_intents'
+    )
+    favorited = models.BooleanField()
+    updated_at = models.DateTimeField()
+
+    objects = FavoriteIntentManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'article'], name='unique_favorite_intent'),
+        ]
+        indexes = [
+            models.Index(fields=['updated_at'], name='favorite_intent_age_idx'),
+        ]
+
+    def __str__(self):
+        state = 'favorite' if self.favorited else 'unfavorite'
+        return f"{self.user_id} {state}s {self.article_id}"
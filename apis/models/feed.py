@@ -0,0 +1,113 @@
+from django.conf import settings
+from django.db import models
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+
+FEED_BATCH_SIZE = 1000
+
+
+class FeedEntryManager(models.Manager):
+    def fan_out(self, article):
+        """
+        Push ``article`` into the feed of every follower of its author.
+
+        Authors with more followers than ``FEED_FANOUT_LIMIT`` are switched to
+        pull mode instead; their articles are merged into feeds at read time.
+        """
+        author = article.author
+        # The counters move through UPDATEs, so the instance may be stale (or
+        # a cached request.user without them); one primary key read.
+        author.refresh_from_db(fields=['pull_feed', 'followers_count'])
+        if author.pull_feed:
+            return 0
+        if author.followers_count > settings.FEED_FANOUT_LIMIT:
+            type(author).objects.filter(pk=author.pk).update(pull_feed=True)
+            author.pull_feed = True
+            return 0
+
+        Follow = author.following.through
+        followers = Follow.objects.filter(to_user_id=author.pk)
+
+        created = 0
+        batch = []
+        for follower_id in followers.values_list('from_user_id', flat=True).iterator(
+                chunk_size=FEED_BATCH_SIZE):
+            batch.append(self.model(
+                user_id=follower_id,
+                article_id=article.pk,
+                author_id=author.pk,
+                created_at=article.created_at,
+            ))
+            if len(batch) >= FEED_BATCH_SIZE:
+                created += len(self.bulk_create(batch, ignore_conflicts=True))
+                batch = []
+        if batch:
+            created += len(self.bulk_create(batch, ignore_conflicts=True))
+        return created
+
+    def backfill(self, user, author):
+        """Copy the most recent articles of ``author`` into ``user``'s feed."""
+        return self.backfill_many(user, [author])
+
+    def backfill_many(self, user, authors):
+        """``backfill`` for several authors with one read and one insert."""
+        author_ids = [author.pk for author in authors if not author.pull_feed]
+        if not author_ids:
+            return 0
+
+        Article = self.model.article.field.related_model
+        recent = Article.objects.filter(author_id__in=author_ids).annotate(
+            recency=Window(
+                RowNumber(), partition_by=F('author_id'), order_by=F('created_at').desc()),
+        ).filter(recency__lte=settings.FEED_BACKFILL_LIMIT).values_list(
+            'pk', 'author_id', 'created_at')
+        entries = [
+            self.model(user_id=user.pk, article_id=article_id,
+                       author_id=author_id, created_at=created_at)
+            for article_id, author_id, created_at in recent
+        ]
+        return len(self.bulk_create(entries, ignore_conflicts=True))
+
+    def prune(self, user, author):
+        """Drop every article of ``author`` from ``user``'s feed."""
+        deleted, _ = self.filter(user_id=user.pk, author_id=author.pk).delete()
+        return deleted
+
+
+class FeedEntry(models.Model):
+    """
+    One row per (follower, article) so the feed is read with an index range
+    scan on ``(user, -created_at)`` instead of a join over followed authors.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='feed_entries'
+    )
+    article = models.ForeignKey(
+        'Article',
+        on_delete=models.CASCADE,
+        related_name='feed_entries'
+    )
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    # Copied from the article so the feed can be ordered without a join.
+    created_at = models.DateTimeField()
+
+    objects = FeedEntryManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'article'], name='unique_feed_entry'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-article'], name='feed_user_created_idx'),
+            models.Index(fields=['user', 'author'], name='feed_user_author_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.article_id} in feed of {self.user_id}"
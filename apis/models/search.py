@@ -0,0 +1,43 @@
+from django.db import models, transaction
+
+from ..search import article_terms
+
+
+class ArticleTermManager(models.Manager):
+    def index_article(self, article):
+        """
+        Replace the indexed terms of ``article`` with its current text.
+        Returns whether they changed; unchanged terms are not rewritten.
+        """
+        terms = article_terms(article.title, article.description, article.body)
+        with transaction.atomic():
+            indexed = self.filter(article_id=article.pk)
+            if dict(indexed.values_list('term', 'weight')) == terms:
+                return False
+            indexed.delete()
+            self.bulk_create([
+                self.model(article_id=article.pk, term=term, weight=weight)
+                for term, weight in terms.items()
+            ])
+        return True
+
+
+class ArticleTerm(models.Model):
+    """Inverted index row: one per distinct term of an article."""
+    term = models.CharField(max_length=64)
+    article = models.ForeignKey(
+        'Article',
+        on_delete=models.CASCADE,
+        related_name='search_terms'
+    )
+    weight = models.PositiveIntegerField(default=1)
+
+    objects = ArticleTermManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['term', 'article'], name='unique_article_term'),
+        ]
+
+    def __str__(self):
+        return f"{self.term} in {self.article_id}"
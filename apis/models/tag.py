@@ -1,8 +1,15 @@
 from django.db import models
+from django.db.models.functions import Lower
 
 
 class Tag(models.Model):
     name = models.CharField(max_length=100, unique=True)
+    name_lower = models.GeneratedField(
+        expression=Lower('name'),
+        output_field=models.CharField(max_length=100),
+        db_persist=True,
+        db_index=True,
+    )
     
     def __str__(self):
         return self.name
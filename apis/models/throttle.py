@@ -0,0 +1,77 @@
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Greatest
+
+
+class ThrottleBucketManager(models.Manager):
+    def consume(self, key, now, num_requests, duration):
+        """
+        Spend one request from ``key``'s allowance using GCRA.
+
+        The only state is the theoretical arrival time (TAT) of the next
+        request. The check and the update happen in a single conditional
+        UPDATE, so concurrent workers never need a lock. Returns
+        ``(allowed, wait_seconds)``.
+        """
+        interval = duration / num_requests
+        for _ in range(2):
+            if self._advance(key, now, interval, duration).update(
+                    tat=self._next_tat(now, interval)):
+                return True, None
+            result = self._insert_or_wait(key, now, interval, duration)
+            if result is not None:
+                return result
+        return False, interval
+
+    async def aconsume(self, key, now, num_requests, duration):
+        """Async ``consume``; only a brand-new key leaves the event loop."""
+        interval = duration / num_requests
+        for _ in range(2):
+            if await self._advance(key, now, interval, duration).aupdate(
+                    tat=self._next_tat(now, interval)):
+                return True, None
+            result = await sync_to_async(self._insert_or_wait)(key, now, interval, duration)
+            if result is not None:
+                return result
+        return False, interval
+
+    def _advance(self, key, now, interval, duration):
+        tolerance = duration - interval
+        return self.filter(key=key, tat__lte=now + tolerance)
+
+    def _next_tat(self, now, interval):
+        return Greatest(F('tat'), Value(now, output_field=FloatField())) + interval
+
+    def _insert_or_wait(self, key, now, interval, duration):
+        """
+        Create the bucket for a new key. Returns ``None`` when the key was
+        created concurrently and the update should be retried.
+        """
+        try:
+            with transaction.atomic():
+                self.create(key=key, tat=now + interval)
+            return True, None
+        except IntegrityError:
+            # The row exists: either we are over the limit or another
+            # worker created it between our UPDATE and INSERT.
+            tolerance = duration - interval
+            tat = self.filter(key=key).values_list('tat', flat=True).first()
+            if tat is not None and tat > now + tolerance:
+                return False, tat - tolerance - now
+            return None
+
+    def prune(self, now):
+        """Delete buckets that have fully refilled and carry no state."""
+        deleted, _ = self.filter(tat__lt=now).delete()
+        return deleted
+
+
+class ThrottleBucket(models.Model):
+    key = models.CharField(max_length=255, primary_key=True)
+    tat = models.FloatField()
+
+    objects = ThrottleBucketManager()
+
+    def __str__(self):
+        return self.key
@@ -1,10 +1,51 @@
 from django.contrib.auth.models import AbstractUser, UserManager
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Lower
+
+from ..caching import bump_version
+from .feed import FeedEntry
+
+
+class FollowCountsUserManager(UserManager):
+    def actual_follow_count(self, column):
+        """
+        Correlated subquery counting follow rows whose ``column``
+        (``from_user_id`` or ``to_user_id``) is the outer user.
+        """
+        Follow = self.model.following.through
+        counts = Follow.objects.filter(**{column: OuterRef('pk')}).order_by().values(
+            column).annotate(total=Count('*')).values('total')
+        return Coalesce(Subquery(counts), 0)
+
+    def recount_follows(self, user_ids):
+        """Recompute the stored follow counters of ``user_ids`` from the follow rows."""
+        return self.filter(pk__in=user_ids).update(
+            followers_count=self.actual_follow_count('to_user_id'),
+            following_count=self.actual_follow_count('from_user_id'),
+        )
 
 
 class User(AbstractUser):
     bio = models.TextField(blank=True, null=True)
     image = models.URLField(blank=True, null=True)
+    # Set once the author has too many followers for fan-out on write; their
+    # articles are then merged into followers' feeds at read time.
+    pull_feed = models.BooleanField(default=False)
+    # Lowercased copies maintained by the database, so case-insensitive
+    # lookups are plain equality on an indexed column.
+    username_lower = models.GeneratedField(
+        expression=Lower('username'),
+        output_field=models.CharField(max_length=150),
+        db_persist=True,
+        db_index=True,
+    )
+    email_lower = models.GeneratedField(
+        expression=Lower('email'),
+        output_field=models.CharField(max_length=254),
+        db_persist=True,
+        db_index=True,
+    )
     
     # Relationships
     following = models.ManyToManyField(
@@ -14,7 +55,14 @@ class User(AbstractUser):
         blank=True
     )
     
-    objects = UserManager()
+    # Maintained by follow_many/unfollow_many in the same transaction as the
+    # follow rows.
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+    # Set on every save; article detail ETags include the author's value.
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = FollowCountsUserManager()
 
     def __str__(self):
         return self.username
@@ -23,9 +71,58 @@ class User(AbstractUser):
         return self.following.filter(id=user.id).exists()
     
     def follow(self, user):
-        if not self.is_following(user) and self != user:
-            self.following.add(user)
-    
+        return bool(self.follow_many([user]))
+
     def unfollow(self, user):
-        if self.is_following(user):
-            self.following.remove(user)
+        return bool(self.unfollow_many([user]))
+
+    def follow_many(self, users):
+        """
+        Follow every user in ``users`` that is not followed yet, with one
+        INSERT for the follow rows. Returns the newly followed users.
+        """
+        Follow = User.following.through
+        users = {user.pk: user for user in users if user.pk != self.pk}
+        with transaction.atomic():
+            # Follow rows only change through their follower, so locking the
+            # follower serializes concurrent calls and keeps the counts exact.
+            User.objects.select_for_update().filter(pk=self.pk).values_list('pk').first()
+            existing = set(Follow.objects.filter(
+                from_user_id=self.pk, to_user_id__in=users,
+            ).values_list('to_user_id', flat=True))
+            added = [user for pk, user in users.items() if pk not in existing]
+            if not added:
+                return []
+            Follow.objects.bulk_create([
+                Follow(from_user_id=self.pk, to_user_id=user.pk) for user in added
+            ], ignore_conflicts=True)
+            self.update_follow_counts(added, 1)
+            FeedEntry.objects.backfill_many(self, added)
+        bump_version(f'follows:{self.pk}')
+        return added
+
+    def unfollow_many(self, users):
+        """
+        Unfollow every followed user in ``users`` with one DELETE for the
+        follow rows. Returns the users that were unfollowed.
+        """
+        Follow = User.following.through
+        users = {user.pk: user for user in users}
+        with transaction.atomic():
+            User.objects.select_for_update().filter(pk=self.pk).values_list('pk').first()
+            follows = Follow.objects.filter(from_user_id=self.pk, to_user_id__in=users)
+            removed = [users[pk] for pk in follows.values_list('to_user_id', flat=True)]
+            if not removed:
+                return []
+            follows.delete()
+            self.update_follow_counts(removed, -1)
+            FeedEntry.objects.filter(
+                user_id=self.pk, author_id__in=[user.pk for user in removed]).delete()
+        bump_version(f'follows:{self.pk}')
+        return removed
+
+    def update_follow_counts(self, users, delta):
+        User.objects.filter(pk=self.pk).update(
+            following_count=F('following_count') + delta * len(users))
+        User.objects.filter(pk__in=[user.pk for user in users]).update(
+            followers_count=F('followers_count') + delta)
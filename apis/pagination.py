@@ -1,17 +1,275 @@
-from rest_framework.pagination import LimitOffsetPagination, PageNumberPagination
+import asyncio
+import base64
+import json
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, LimitOffsetPagination, PageNumberPagination
 from rest_framework.response import Response
 
+from .caching import VersionedCache
+from .renderers import StreamingJSONResponse
+
+
+class KeysetPaginationMixin:
+    """
+    Opt-in keyset pagination over a ``(timestamp, id)`` pair, enabled when
+    the ``cursor`` query parameter is present (an empty value requests the
+    first page). Cursors are opaque, stay stable when rows are inserted and
+    never require a ``COUNT(*)``. Results are always newest first, so a
+    queryset already ordered some other way (search rank, an ``ordering``
+    parameter) is rejected rather than silently re-ordered.
+    """
+    cursor_query_param = 'cursor'
+    keyset_fields = ('created_at', 'pk')
+    invalid_cursor_message = 'Invalid cursor'
+    ordered_cursor_message = (
+        'Cursor pages are always newest first and cannot be combined with '
+        'search or a different ordering.'
+    )
+
+    def use_cursor(self, request):
+        return self.cursor_query_param in request.query_params
+
+    def encode_cursor(self, instance, direction):
+        timestamp_field, id_field = self.keyset_fields
+        payload = {
+            't': getattr(instance, timestamp_field).isoformat(),
+            'i': getattr(instance, id_field),
+            'd': direction,
+        }
+        raw = json.dumps(payload, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, value):
+        try:
+            padded = value + '=' * (-len(value) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            direction = payload['d']
+            if direction not in ('n', 'p'):
+                raise ValueError(direction)
+            return datetime.fromisoformat(payload['t']), int(payload['i']), direction
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def paginate_keyset(self, queryset, request, limit):
+        queryset = self.get_keyset_queryset(queryset, request, limit)
+        return self.get_keyset_page(list(queryset), limit)
+
+    async def apaginate_keyset(self, queryset, request, limit):
+        queryset = self.get_keyset_queryset(queryset, request, limit)
+        return self.get_keyset_page([row async for row in queryset], limit)
+
+    def get_keyset_queryset(self, queryset, request, limit):
+        """Order and bound ``queryset`` by the cursor; fetches one extra row."""
+        timestamp_field, id_field = self.keyset_fields
+        newest_first = ('-' + timestamp_field, '-' + id_field)
+        ordering = tuple(queryset.query.order_by)
+        if ordering != newest_first[:len(ordering)]:
+            raise ValidationError({self.cursor_query_param: [self.ordered_cursor_message]})
+
+        value = request.query_params.get(self.cursor_query_param)
+        timestamp, pk, direction = self.decode_cursor(value) if value else (None, None, 'n')
+        self.direction = direction
+        self.has_cursor = timestamp is not None
+
+        if direction == 'n':
+            ordering = ('-' + timestamp_field, '-' + id_field)
+            lookups = ('lt', 'lt')
+        else:
+            ordering = (timestamp_field, id_field)
+            lookups = ('gt', 'gt')
 
-class ArticleLimitOffsetPagination(LimitOffsetPagination):
+        queryset = queryset.order_by(*ordering)
+        if timestamp is not None:
+            queryset = queryset.filter(
+                Q(**{f'{timestamp_field}__{lookups[0]}': timestamp}) |
+                Q(**{timestamp_field: timestamp, f'{id_field}__{lookups[1]}': pk})
+            )
+        return queryset[:limit + 1]
+
+    def get_keyset_page(self, rows, limit):
+        direction = self.direction
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if direction == 'p':
+            rows.reverse()
+
+        self.next_cursor = self.prev_cursor = None
+        if rows:
+            if direction == 'p' or has_more:
+                self.next_cursor = self.encode_cursor(rows[-1], 'n')
+            if (direction == 'n' and self.has_cursor) or (direction == 'p' and has_more):
+                self.prev_cursor = self.encode_cursor(rows[0], 'p')
+        return rows
+
+
+class ArticleLimitOffsetPagination(KeysetPaginationMixin, LimitOffsetPagination):
+    """
+    Limit/offset pagination whose ``articlesCount`` is cached under a key
+    built from the view's normalized filter parameters. Passing
+    ``count=estimated`` caps the count at ``ARTICLES_COUNT_ESTIMATE_CAP``
+    and reports whether the value is exact.
+    """
     default_limit = 20
     limit_query_param = 'limit'
     offset_query_param = 'offset'
     max_limit = 100
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.use_cursor(request)
+        if self.cursor_mode:
+            return self.paginate_keyset(queryset, request, self.get_limit(request))
+
+        self.setup_page(request)
+        self.count, self.count_exact = self.get_article_count(queryset, view)
+        return self.get_page(list(queryset[self.offset:self.offset + self.limit]))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Async ``paginate_queryset``; the page and the count run concurrently."""
+        self.cursor_mode = self.use_cursor(request)
+        if self.cursor_mode:
+            return await self.apaginate_keyset(queryset, request, self.get_limit(request))
+
+        self.setup_page(request)
+        window = queryset[self.offset:self.offset + self.limit]
+        (self.count, self.count_exact), rows = await asyncio.gather(
+            self.aget_article_count(queryset, view),
+            self.afetch(window),
+        )
+        return self.get_page(rows)
+
+    async def afetch(self, queryset):
+        return [row async for row in queryset]
+
+    def setup_page(self, request):
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.offset = self.get_offset(request)
+        self.estimate = request.query_params.get(self.count_query_param) == 'estimated'
+
+    def get_page(self, rows):
+        if self.count > self.limit and self.template is not None:
+            self.display_page_controls = True
+        if self.count_exact and (self.count == 0 or self.offset > self.count):
+            return []
+        return rows
+
+    def get_article_count(self, queryset, view):
+        """Return ``(count, exact)``, serving exact counts from the cache."""
+        count_cache, key, count = self.get_cached_count(view)
+        if count is not None:
+            return count, True
+
+        queryset = self.get_count_queryset(queryset, view)
+
+        if self.estimate:
+            count = self.get_estimate_queryset(queryset).count()
+        else:
+            count = self.get_count(queryset)
+        return self.store_count(count_cache, key, count)
+
+    async def aget_article_count(self, queryset, view):
+        count_cache, key, count = self.get_cached_count(view)
+        if count is not None:
+            return count, True
+
+        queryset = self.get_count_queryset(queryset, view)
+        if self.estimate:
+            count = await self.get_estimate_queryset(queryset).acount()
+        else:
+            count = await queryset.acount()
+        return self.store_count(count_cache, key, count)
+
+    def get_count_queryset(self, queryset, view):
+        if not hasattr(view, 'get_count_queryset'):
+            return queryset
+        return view.get_count_queryset(queryset)
+
+    def get_cached_count(self, view):
+        if not hasattr(view, 'get_count_cache_params'):
+            return None, None, None
+        params, namespaces = view.get_count_cache_params()
+        count_cache = VersionedCache(
+            'articles_count', timeout=settings.ARTICLES_COUNT_CACHE_TIMEOUT)
+        key = count_cache.make_key(params, namespaces)
+        return count_cache, key, count_cache.get(key)
+
+    def get_estimate_queryset(self, queryset):
+        return queryset.order_by()[:settings.ARTICLES_COUNT_ESTIMATE_CAP + 1]
+
+    def store_count(self, count_cache, key, count):
+        cap = settings.ARTICLES_COUNT_ESTIMATE_CAP
+        if self.estimate and count > cap:
+            return cap, False
+        if count_cache is not None:
+            count_cache.set(key, count)
+        return count, True
+
+    def get_paginated_response(self, data):
+        return Response({'articles': data, **self.get_page_metadata()})
+
+    def get_streaming_response(self, items, renderer):
+        """The page as a ``StreamingJSONResponse`` with the same bytes."""
+        return StreamingJSONResponse(renderer, 'articles', items, self.get_page_metadata())
+
+    def get_page_metadata(self):
+        """Everything in the response besides the ``articles`` list."""
+        if self.cursor_mode:
+            return {'next': self.next_cursor, 'prev': self.prev_cursor}
+        metadata = {'articlesCount': self.count}
+        if self.estimate:
+            metadata['articlesCountExact'] = self.count_exact
+        return metadata
+
+
+class CommentCursorPagination(KeysetPaginationMixin, BasePagination):
+    """
+    Keyset pages of an article's comments, newest first, with the total
+    ``commentsCount``. ``since`` (an ISO 8601 timestamp) restricts the pages
+    to comments created after it, so clients can poll for new ones.
+    """
+    default_limit = 20
+    limit_query_param = 'limit'
+    max_limit = 100
+    since_query_param = 'since'
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params[self.limit_query_param])
+        except (KeyError, ValueError):
+            return self.default_limit
+        return min(limit, self.max_limit) if limit > 0 else self.default_limit
+
+    def get_since(self, request):
+        value = request.query_params.get(self.since_query_param)
+        if not value:
+            return None
+        since = parse_datetime(value)
+        if since is None:
+            raise ValidationError({self.since_query_param: ['Expected an ISO 8601 timestamp.']})
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        return since
+
+    def paginate_queryset(self, queryset, request, view=None):
+        since = self.get_since(request)
+        self.count = queryset.order_by().count()
+        if since is not None:
+            queryset = queryset.filter(created_at__gt=since)
+        return self.paginate_keyset(queryset, request, self.get_limit(request))
 
     def get_paginated_response(self, data):
         return Response({
-            'articles': data,
-            'articlesCount': self.count
+            'comments': data,
+            'commentsCount': self.count,
+            'next': self.next_cursor,
+            'prev': self.prev_cursor,
         })
 
 
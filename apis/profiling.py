@@ -0,0 +1,120 @@
+import cProfile
+import os
+import pstats
+import random
+import time
+
+from django.conf import settings
+from django.utils.crypto import constant_time_compare
+
+PROFILE_TOKEN_HEADER = 'X-Profile-Token'
+AGGREGATE_PREFIX = 'aggregate-'
+
+
+def should_profile(request):
+    """
+    Whether ``request`` is profiled: it carries ``PROFILING_TOKEN`` in the
+    ``X-Profile-Token`` header, or it falls in the ``PROFILING_SAMPLE_RATE``
+    sample. Decided once per request.
+    """
+    decision = getattr(request, '_profile', None)
+    if decision is None:
+        token = settings.PROFILING_TOKEN
+        header = request.headers.get(PROFILE_TOKEN_HEADER)
+        if token and header:
+            decision = constant_time_compare(header, token)
+        else:
+            rate = settings.PROFILING_SAMPLE_RATE
+            decision = rate > 0 and random.random() < rate
+        request._profile = decision
+    return decision
+
+
+class ProfileStore:
+    """
+    Profiles under ``directory/<View.action>/``. Each process keeps its
+    ``max_files`` newest profiles per action as separate files and merges
+    older ones into its own ``aggregate-<pid>.prof``, so the directory
+    stays bounded while the totals keep accumulating.
+    """
+
+    def __init__(self, directory, max_files):
+        self.directory = str(directory)
+        self.max_files = max(max_files, 1)
+
+    @classmethod
+    def from_settings(cls):
+        return cls(settings.PROFILING_DIR, settings.PROFILING_MAX_FILES)
+
+    def save(self, name, profiler):
+        directory = os.path.join(self.directory, name)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'{time.time_ns()}-{os.getpid()}.prof')
+        profiler.dump_stats(path)
+        self.rotate(directory)
+        return path
+
+    def rotate(self, directory):
+        suffix = f'-{os.getpid()}.prof'
+        own = sorted(
+            filename for filename in os.listdir(directory)
+            if filename.endswith(suffix) and not filename.startswith(AGGREGATE_PREFIX)
+        )
+        stale = [os.path.join(directory, filename) for filename in own[:-self.max_files]]
+        if not stale:
+            return
+        aggregate = os.path.join(directory, f'{AGGREGATE_PREFIX}{os.getpid()}.prof')
+        sources = ([aggregate] if os.path.exists(aggregate) else []) + stale
+        pstats.Stats(*sources).dump_stats(aggregate)
+        for path in stale:
+            os.remove(path)
+
+    def actions(self):
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            name for name in os.listdir(self.directory)
+            if os.path.isdir(os.path.join(self.directory, name))
+        )
+
+    def files(self, name):
+        directory = os.path.join(self.directory, name)
+        return sorted(
+            os.path.join(directory, filename) for filename in os.listdir(directory)
+            if filename.endswith('.prof')
+        )
+
+
+class ProfiledDispatchMixin:
+    """
+    Run the whole DRF dispatch of profiled requests (see ``should_profile``)
+    under cProfile: authentication, permissions, throttles, filtering,
+    serialization and rendering. ``PROFILING_VIEWS`` restricts profiling to
+    the listed ``View.action`` names. Streamed bodies are encoded after the
+    view returns and are not part of the profile.
+    """
+
+    def get_profile_name(self, request):
+        method = request.method.lower()
+        action = getattr(self, 'action_map', {}).get(method, method)
+        return f'{type(self).__name__}.{action}'
+
+    def dispatch(self, request, *args, **kwargs):
+        if not should_profile(request):
+            return super().dispatch(request, *args, **kwargs)
+        name = self.get_profile_name(request)
+        if settings.PROFILING_VIEWS and name not in settings.PROFILING_VIEWS:
+            return super().dispatch(request, *args, **kwargs)
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            response = super().dispatch(request, *args, **kwargs)
+            # Render here so the renderer is profiled too; Django skips
+            # rendering a response that is already rendered.
+            if callable(getattr(response, 'render', None)):
+                response.render()
+        finally:
+            profiler.disable()
+        ProfileStore.from_settings().save(name, profiler)
+        return response
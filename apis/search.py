@@ -0,0 +1,42 @@
+import re
+from collections import Counter
+
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+MAX_TERM_LENGTH = 64
+
+# A hit in the title counts more than one in the description, which counts
+# more than one in the body.
+TITLE_WEIGHT = 3
+DESCRIPTION_WEIGHT = 2
+BODY_WEIGHT = 1
+
+STOP_WORDS = frozenset("""
+    a an and are as at be but by for from has have in is it its of on or that
+    the this to was were will with
+""".split())
+
+
+def tokenize(text):
+    """Split ``text`` into lowercase index terms, dropping stop words."""
+    terms = []
+    for token in TOKEN_RE.findall((text or '').lower()):
+        if token in STOP_WORDS:
+            continue
+        terms.append(token[:MAX_TERM_LENGTH])
+    return terms
+
+
+def article_terms(title, description, body):
+    """Return a ``{term: weight}`` mapping for an article's searchable text."""
+    weights = Counter()
+    fields = ((title, TITLE_WEIGHT), (description, DESCRIPTION_WEIGHT), (body, BODY_WEIGHT))
+    for text, weight in fields:
+        for term in tokenize(text):
+            weights[term] += weight
+    return weights
+
+
+def query_terms(search):
+    """Unique terms of a search string, in first-seen order."""
+    return list(dict.fromkeys(tokenize(search)))
@@ -1,4 +1,5 @@
 from .article_serializers import ArticleSerializer, ArticleListSerializer
 from .tag_serializers import TagSerializer
-from .user_serializers import ProfileSerializer
+from .user_serializers import ProfileSerializer, ProfileDetailSerializer
 from .comment_serializers import CommentSerializer, CommentCreateSerializer
+from .fast import ArticleRowSerializer, CommentRowSerializer
@@ -2,10 +2,11 @@ from rest_framework import serializers
 from ..models.article import Article
 from ..models.user import User
 from ..models.tag import Tag
+from .base import ViewerListSerializer, ViewerStateMixin
 from .user_serializers import ProfileSerializer
 
 
-class ArticleSerializer(serializers.ModelSerializer):
+class ArticleSerializer(ViewerStateMixin, serializers.ModelSerializer):
     author = ProfileSerializer(read_only=True)
     tagList = serializers.SerializerMethodField()
     createdAt = serializers.DateTimeField(source='created_at', read_only=True)
@@ -19,23 +20,26 @@ class ArticleSerializer(serializers.ModelSerializer):
             'slug', 'title', 'description', 'body', 'tagList',
             'createdAt', 'updatedAt', 'favorited', 'favoritesCount', 'author'
         ]
+        list_serializer_class = ViewerListSerializer
 
     def get_tagList(self, obj):
         return [tag.name for tag in obj.tags.all()]
     
     def get_favorited(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return obj.is_favorited_by(request.user)
-        return False
+        return self.get_viewer().has_favorited(obj.pk)
     
     def get_favoritesCount(self, obj):
-        return obj.favorites_count
-    
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        if 'context' in kwargs:
-            self.fields['author'].context = kwargs['context']
+        # Counts the viewer's own unflushed write-behind toggle, if any.
+        return obj.favorites_count + getattr(obj, 'viewer_favorites_delta', 0)
+
+    def get_viewer_ids(self, instance):
+        return (instance.author_id,), (instance.pk,)
+
+    def remember_viewer_state(self, instance, viewer):
+        if hasattr(instance, 'viewer_favorited'):
+            viewer.remember_favorited(instance.pk, instance.viewer_favorited)
+        if hasattr(instance, 'viewer_follows_author'):
+            viewer.remember_following(instance.author_id, instance.viewer_follows_author)
 
 
 class ArticleListSerializer(ArticleSerializer):
@@ -45,3 +49,4 @@ class ArticleListSerializer(ArticleSerializer):
             'slug', 'title', 'description', 'tagList',
             'createdAt', 'updatedAt', 'favorited', 'favoritesCount', 'author'
         ]
+        list_serializer_class = ViewerListSerializer
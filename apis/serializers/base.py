@@ -0,0 +1,53 @@
+from django.db import models
+from rest_framework import serializers
+
+from ..instrumentation import timed
+from ..viewer import viewer_context
+
+
+class ViewerListSerializer(serializers.ListSerializer):
+    """Primes the viewer context with every ID on the page before rendering it."""
+
+    def to_representation(self, data):
+        with timed('serialize'):
+            return super().to_representation(self.prime(data))
+
+    def iter_representation(self, data):
+        """Lazily represent ``data`` item by item; the viewer state is primed up front."""
+        items = self.prime(data)
+        return (self.child.to_representation(item) for item in items)
+
+    def prime(self, data):
+        items = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        viewer = self.child.get_viewer()
+        user_ids, article_ids = set(), set()
+        for item in items:
+            self.child.remember_viewer_state(item, viewer)
+            item_user_ids, item_article_ids = self.child.get_viewer_ids(item)
+            user_ids.update(item_user_ids)
+            article_ids.update(item_article_ids)
+        viewer.prime(user_ids, article_ids)
+        return items
+
+
+class ViewerStateMixin:
+    """
+    Serializers whose output depends on the viewer read it from the request's
+    ``ViewerContext``. Set ``list_serializer_class = ViewerListSerializer`` in
+    ``Meta`` so lists load the state in one batch.
+    """
+
+    def get_viewer(self):
+        return viewer_context(self.context.get('request'))
+
+    def get_viewer_ids(self, instance):
+        """The ``(user_ids, article_ids)`` whose state ``instance`` renders."""
+        return (), ()
+
+    def remember_viewer_state(self, instance, viewer):
+        """Copy viewer flags already annotated on ``instance`` into ``viewer``."""
+
+    def to_representation(self, instance):
+        with timed('serialize'):
+            self.remember_viewer_state(instance, self.get_viewer())
+            return super().to_representation(instance)
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from ..models.comment import Comment
+from .base import ViewerListSerializer, ViewerStateMixin
 from .user_serializers import ProfileSerializer
 
 
@@ -12,7 +13,7 @@ class CommentCreateSerializer(serializers.ModelSerializer):
         return Comment.objects.create(**validated_data)
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(ViewerStateMixin, serializers.ModelSerializer):
     author = ProfileSerializer(read_only=True)
     createdAt = serializers.DateTimeField(source='created_at', read_only=True)
     updatedAt = serializers.DateTimeField(source='updated_at', read_only=True)
@@ -21,8 +22,11 @@ class CommentSerializer(serializers.ModelSerializer):
         model = Comment
         fields = ['id', 'body', 'createdAt', 'updatedAt', 'author']
         read_only_fields = ['id', 'createdAt', 'updatedAt', 'author']
-    
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        if 'context' in kwargs:
-            self.fields['author'].context = kwargs['context']
+        list_serializer_class = ViewerListSerializer
+
+    def get_viewer_ids(self, instance):
+        return (instance.author_id,), ()
+
+    def remember_viewer_state(self, instance, viewer):
+        if hasattr(instance, 'viewer_follows_author'):
+            viewer.remember_following(instance.author_id, instance.viewer_follows_author)
@@ -1,8 +1,8 @@
 from rest_framework import serializers
-from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
 from rest_framework_simplejwt.tokens import RefreshToken
 from ..models.user import User
+from .base import ViewerListSerializer, ViewerStateMixin
 
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -14,7 +14,7 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         fields = ['username', 'email', 'password']
     
     def validate_email(self, value):
-        if User.objects.filter(email=value).exists():
+        if User.objects.filter(email_lower=value.lower()).exists():
             raise serializers.ValidationError("A user with this email already exists.")
         return value
     
@@ -24,11 +24,7 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         return value
     
     def create(self, validated_data):
-        password = validated_data.pop('password')
-        user = User.objects.create_user(**validated_data)
-        user.set_password(password)
-        user.save()
-        return user
+        return User.objects.create_user(**validated_data)
 
 
 class UserLoginSerializer(serializers.Serializer):
@@ -36,23 +32,10 @@ class UserLoginSerializer(serializers.Serializer):
     password = serializers.CharField(write_only=True)
     
     def validate(self, attrs):
-        email = attrs.get('email')
-        password = attrs.get('password')
-        
-        if email and password:
-            try:
-                user = User.objects.get(email=email)
-                user = authenticate(username=user.username, password=password)
-                if not user:
-                    raise serializers.ValidationError('Invalid credentials')
-                if not user.is_active:
-                    raise serializers.ValidationError('User account is disabled')
-                attrs['user'] = user
-            except User.DoesNotExist:
-                raise serializers.ValidationError('Invalid credentials')
-        else:
+        # Credentials are checked by UserLoginView, which looks the user up
+        # once and verifies the hash off the request thread.
+        if not attrs.get('email') or not attrs.get('password'):
             raise serializers.ValidationError('Must include email and password')
-        
         return attrs
 
 
@@ -78,7 +61,8 @@ class UserUpdateSerializer(serializers.ModelSerializer):
         fields = ['email', 'username', 'password', 'bio', 'image']
         
     def validate_email(self, value):
-        if value and User.objects.filter(email=value).exclude(pk=self.instance.pk).exists():
+        if value and User.objects.filter(
+                email_lower=value.lower()).exclude(pk=self.instance.pk).exists():
             raise serializers.ValidationError("A user with this email already exists.")
         return value
     
@@ -100,16 +84,28 @@ class UserUpdateSerializer(serializers.ModelSerializer):
         return instance
 
 
-class ProfileSerializer(serializers.ModelSerializer):
+class ProfileSerializer(ViewerStateMixin, serializers.ModelSerializer):
     following = serializers.SerializerMethodField()
     
     class Meta:
         model = User
         fields = ['username', 'bio', 'image', 'following']
-    
+        list_serializer_class = ViewerListSerializer
+
+    def get_viewer_ids(self, instance):
+        return (instance.pk,), ()
+
+    def remember_viewer_state(self, instance, viewer):
+        if hasattr(instance, 'viewer_following'):
+            viewer.remember_following(instance.pk, instance.viewer_following)
+
     def get_following(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return request.user.is_following(obj)
-        return False
+        return self.get_viewer().is_following(obj.pk)
+
+
+class ProfileDetailSerializer(ProfileSerializer):
+    followersCount = serializers.IntegerField(source='followers_count', read_only=True)
+    followingCount = serializers.IntegerField(source='following_count', read_only=True)
 
+    class Meta(ProfileSerializer.Meta):
+        fields = ProfileSerializer.Meta.fields + ['followersCount', 'followingCount']
@@ -0,0 +1,68 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .authentication import user_records
+from .caching import bump_version
+from .models.article import Article
+from .models.search import ArticleTerm
+from .models.tag import Tag
+from .models.user import User
+
+
+@receiver(post_save, sender=Article)
+def article_saved(sender, instance, created, **kwargs):
+    # Search and filter counts depend on the indexed text, not just on
+    # which articles exist.
+    if ArticleTerm.objects.index_article(instance) or created:
+        bump_version('articles')
+
+
+@receiver(post_delete, sender=Article)
+def article_deleted(sender, instance, **kwargs):
+    bump_version('articles')
+
+
+@receiver(m2m_changed, sender=Article.tags.through)
+def article_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear' and reverse:
+        # clear() passes no pk_set; remember which articles lose the tag.
+        instance._cleared_article_ids = list(instance.articles.values_list('pk', flat=True))
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        bump_version('articles')
+        bump_version('tags')
+        # Article detail ETags and cached bodies follow updated_at.
+        now = timezone.now()
+        if reverse:
+            if action == 'post_clear':
+                pk_set = instance.__dict__.pop('_cleared_article_ids', ())
+            Article.objects.filter(pk__in=pk_set or ()).update(updated_at=now)
+        else:
+            Article.objects.filter(pk=instance.pk).update(updated_at=now)
+            instance.updated_at = now
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def tag_changed(sender, instance, **kwargs):
+    bump_version('tags')
+
+
+@receiver(post_save, sender=Tag)
+@receiver(pre_delete, sender=Tag)
+def tag_renamed_or_deleted(sender, instance, created=False, **kwargs):
+    if not created:
+        Article.objects.filter(tags=instance).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'updated_at' not in update_fields:
+        # Partial saves, including those of the deferred request.user, skip
+        # auto_now fields; article detail ETags follow the author's value.
+        now = timezone.now()
+        User.objects.filter(pk=instance.pk).update(updated_at=now)
+        instance.updated_at = now
+    bump_version(f'profile:{instance.pk}')
+    user_records.evict(instance.pk)
@@ -1,3 +1,1630 @@
-from django.test import TestCase
+import importlib
+import json
+import os
+import pstats
+import re
+import tempfile
+import time
+import unittest
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.models import Count, Q
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import path
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+from rest_framework.views import exception_handler
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .authentication import user_records
+from .caching import VERSION_KEY_FORMAT, VersionedCache, bump_version, get_stats, reset_stats
+from .favorites import favorite_buffer
+from .hashing import hasher_pool
+from .instrumentation import RequestMetrics, collecting, query_shape
+from .management.benchmark import compare
+from .management.jsonl import pk_chunks
+from .management.synthetic import SCALES
+from .models import Article, ArticleTerm, Comment, FeedEntry, Tag, ThrottleBucket, User
+from .profiling import ProfileStore
+from .renderers import FastJSONRenderer
+from .serializers import (
+    ArticleListSerializer, ArticleRowSerializer, CommentRowSerializer, CommentSerializer,
+    ProfileSerializer,
+)
+from .views import ArticleViewSet, ProfileViewSet, TagViewSet
+
+
+def enveloped_exception_handler(exc, context):
+    """An EXCEPTION_HANDLER that wraps errors, to check views go through it."""
+    response = exception_handler(exc, context)
+    if response is not None:
+        response.data = {'errors': response.data}
+    return response
+
+
+def app_queries(ctx):
+    """Captured queries, minus the throttle bookkeeping every request does."""
+    table = ThrottleBucket._meta.db_table
+    return [
+        q for q in ctx.captured_queries
+        if table not in q['sql'] and 'SAVEPOINT' not in q['sql']
+    ]
+
+
+class ArticleListQueryCountTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.viewer = User.objects.create_user(
+            username='viewer', email='viewer@example.com', password='pass12345')
+        self.tag = Tag.objects.create(name='django')
+
+    def create_articles(self, start, stop):
+        for i in range(start, stop):
+            author = User.objects.create_user(
+                username=f'author{i}', email=f'author{i}@example.com', password='pass12345')
+            article = Article.objects.create(
+                slug=f'article-{i}', title=f'Article {i}', description='d', body='b', author=author)
+            article.tags.add(self.tag)
+            article.favorite(self.viewer)
+            self.viewer.follow(author)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(app_queries(ctx)), response.json()
+
+    def test_list_query_count_is_constant(self):
+        self.client.force_authenticate(self.viewer)
+        self.create_articles(0, 2)
+        small, _ = self.count_queries('/v1/api/articles/')
+        self.create_articles(2, 20)
+        large, data = self.count_queries('/v1/api/articles/')
+
+        self.assertEqual(small, large)
+        self.assertEqual(len(data['articles']), 20)
+        article = data['articles'][0]
+        self.assertTrue(article['favorited'])
+        self.assertEqual(article['favoritesCount'], 1)
+        self.assertTrue(article['author']['following'])
+
+    def test_feed_query_count_is_constant(self):
+        self.client.force_authenticate(self.viewer)
+        self.create_articles(0, 2)
+        small, _ = self.count_queries('/v1/api/articles/feed/')
+        self.create_articles(2, 20)
+        large, data = self.count_queries('/v1/api/articles/feed/')
+
+        self.assertEqual(small, large)
+        self.assertEqual(data['articlesCount'], 20)
+
+    def test_anonymous_list_flags(self):
+        self.create_articles(0, 3)
+        _, data = self.count_queries('/v1/api/articles/')
+        for article in data['articles']:
+            self.assertFalse(article['favorited'])
+            self.assertFalse(article['author']['following'])
+            self.assertEqual(article['favoritesCount'], 1)
+
+
+class FavoritesCounterTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='fan', email='fan@example.com', password='pass12345')
+        author = User.objects.create_user(
+            username='writer', email='writer@example.com', password='pass12345')
+        self.article = Article.objects.create(
+            slug='hot', title='Hot', description='d', body='b', author=author)
+        self.client.force_authenticate(self.user)
+
+    def test_favorite_updates_counter_once(self):
+        url = '/v1/api/articles/hot/favorite/'
+        self.assertEqual(self.client.post(url).data['article']['favoritesCount'], 1)
+        self.assertEqual(self.client.post(url).data['article']['favoritesCount'], 1)
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.favorites_count, 1)
+
+        response = self.client.delete(url)
+        self.assertFalse(response.data['article']['favorited'])
+        self.assertEqual(response.data['article']['favoritesCount'], 0)
+        self.assertEqual(self.client.delete(url).data['article']['favoritesCount'], 0)
+
+    def test_reconcile_command_fixes_drift(self):
+        self.article.favorited_by.add(self.user)
+        Article.objects.filter(pk=self.article.pk).update(favorites_count=42)
+
+        out = StringIO()
+        call_command('reconcile_favorites_count', '--chunk-size', '1', stdout=out)
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.favorites_count, 1)
+        self.assertIn('Reconciled 1', out.getvalue())
+
+
+class MaterializedFeedTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.reader = User.objects.create_user(
+            username='reader', email='reader@example.com', password='pass12345')
+        self.author = User.objects.create_user(
+            username='author', email='author@example.com', password='pass12345')
+
+    def publish(self, slug):
+        self.client.force_authenticate(self.author)
+        response = self.client.post('/v1/api/articles/', {
+            'slug': slug, 'title': slug, 'description': 'd', 'body': 'b'}, format='json')
+        self.assertEqual(response.status_code, 201)
+
+    def feed_slugs(self):
+        self.client.force_authenticate(self.reader)
+        response = self.client.get('/v1/api/articles/feed/')
+        return [article['slug'] for article in response.json()['articles']]
+
+    def test_follow_backfills_and_create_fans_out(self):
+        self.publish('old')
+        self.reader.follow(self.author)
+        self.publish('new')
+
+        self.assertEqual(FeedEntry.objects.filter(user=self.reader).count(), 2)
+        self.assertEqual(self.feed_slugs(), ['new', 'old'])
+
+        first = self.client.get('/v1/api/articles/feed/?cursor=&limit=1').json()
+        second = self.client.get(f"/v1/api/articles/feed/?cursor={first['next']}&limit=1").json()
+        self.assertEqual([a['slug'] for a in second['articles']], ['old'])
+
+    def test_unfollow_prunes_feed(self):
+        self.reader.follow(self.author)
+        self.publish('first')
+        self.reader.unfollow(self.author)
+
+        self.assertFalse(FeedEntry.objects.filter(user=self.reader).exists())
+        self.assertEqual(self.feed_slugs(), [])
+
+    @override_settings(FEED_BACKFILL_LIMIT=2)
+    def test_pages_beyond_the_backfill_window_are_complete(self):
+        for i in range(5):
+            self.publish(f'article-{i}')
+        self.reader.follow(self.author)
+        self.assertEqual(FeedEntry.objects.filter(user=self.reader).count(), 2)
+
+        self.client.force_authenticate(self.reader)
+        expected = [f'article-{i}' for i in reversed(range(5))]
+        first = self.client.get('/v1/api/articles/feed/?limit=2').json()
+        self.assertEqual(first['articlesCount'], 5)
+        second = self.client.get('/v1/api/articles/feed/?limit=2&offset=2').json()
+        self.assertEqual(
+            [a['slug'] for a in first['articles'] + second['articles']], expected[:4])
+
+        slugs, cursor = [], ''
+        while cursor is not None:
+            page = self.client.get(f'/v1/api/articles/feed/?cursor={cursor}&limit=2').json()
+            slugs += [a['slug'] for a in page['articles']]
+            cursor = page['next']
+        self.assertEqual(slugs, expected)
+
+    def test_fan_out_reads_the_stored_follower_count(self):
+        self.reader.follow(self.author)
+        article = Article.objects.create(
+            slug='counted', title='Counted', description='d', body='b', author=self.author)
+        follow_table = User.following.through._meta.db_table
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(FeedEntry.objects.fan_out(article), 1)
+        self.assertFalse([q for q in ctx.captured_queries
+                          if 'COUNT(' in q['sql'] and follow_table in q['sql']])
+
+    @override_settings(FEED_FANOUT_LIMIT=0)
+    def test_prolific_author_is_merged_at_read_time(self):
+        self.reader.follow(self.author)
+        self.publish('viral')
+
+        self.author.refresh_from_db()
+        self.assertTrue(self.author.pull_feed)
+        self.assertFalse(FeedEntry.objects.filter(user=self.reader).exists())
+        self.assertEqual(self.feed_slugs(), ['viral'])
+
+
+class KeysetPaginationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(
+            username='author', email='author@example.com', password='pass12345')
+        for i in range(5):
+            self.publish(f'article-{i}')
+
+    def publish(self, slug):
+        return Article.objects.create(
+            slug=slug, title=slug, description='d', body='b', author=self.author)
+
+    def get_page(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_cursor_pages_are_stable_under_inserts(self):
+        first = self.get_page('/v1/api/articles/?cursor=&limit=2')
+        self.assertNotIn('articlesCount', first)
+        self.assertIsNone(first['prev'])
+        self.assertEqual([a['slug'] for a in first['articles']], ['article-4', 'article-3'])
+
+        self.publish('article-5')
+        second = self.get_page(f"/v1/api/articles/?cursor={first['next']}&limit=2")
+        self.assertEqual([a['slug'] for a in second['articles']], ['article-2', 'article-1'])
+
+        back = self.get_page(f"/v1/api/articles/?cursor={second['prev']}&limit=2")
+        self.assertEqual([a['slug'] for a in back['articles']], ['article-4', 'article-3'])
+        self.assertIsNotNone(back['prev'])
+
+        last = self.get_page(f"/v1/api/articles/?cursor={second['next']}&limit=2")
+        self.assertEqual([a['slug'] for a in last['articles']], ['article-0'])
+        self.assertIsNone(last['next'])
+
+    def test_limit_offset_contract_is_unchanged(self):
+        data = self.get_page('/v1/api/articles/?limit=2&offset=1')
+        self.assertEqual(data['articlesCount'], 5)
+        self.assertEqual([a['slug'] for a in data['articles']], ['article-3', 'article-2'])
+
+    def test_invalid_cursor_is_not_found(self):
+        self.assertEqual(self.client.get('/v1/api/articles/?cursor=garbage').status_code, 404)
+
+    def test_cursor_rejects_search_and_other_orderings(self):
+        for query in ('search=article', 'ordering=updated_at', 'ordering=-updated_at'):
+            response = self.client.get(f'/v1/api/articles/?{query}&cursor=&limit=2')
+            self.assertEqual(response.status_code, 400, query)
+            self.assertIn('cursor', response.json())
+
+        data = self.get_page('/v1/api/articles/?ordering=-created_at&cursor=&limit=2')
+        self.assertEqual([a['slug'] for a in data['articles']], ['article-4', 'article-3'])
+        data = self.get_page('/v1/api/articles/?search=article&limit=2')
+        self.assertEqual(data['articlesCount'], 5)
+
+    def test_comment_cursor(self):
+        article = Article.objects.get(slug='article-0')
+        for i in range(3):
+            Comment.objects.create(body=f'c{i}', article=article, author=self.author)
+
+        first = self.get_page('/v1/api/articles/article-0/comments/?cursor=&limit=2')
+        self.assertEqual([c['body'] for c in first['comments']], ['c2', 'c1'])
+        second = self.get_page(f"/v1/api/articles/article-0/comments/?cursor={first['next']}&limit=2")
+        self.assertEqual([c['body'] for c in second['comments']], ['c0'])
+        self.assertIsNone(second['next'])
+
+
+class ArticlesCountCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(
+            username='author', email='author@example.com', password='pass12345')
+        self.tag = Tag.objects.create(name='django')
+        for i in range(3):
+            self.publish(f'article-{i}')
+
+    def publish(self, slug):
+        article = Article.objects.create(
+            slug=slug, title=slug, description='d', body='b', author=self.author)
+        article.tags.add(self.tag)
+        return article
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        counts = [q for q in ctx.captured_queries if 'COUNT(' in q['sql'].upper()]
+        return response.json(), len(counts)
+
+    def test_count_is_cached_per_normalized_filter(self):
+        data, counts = self.count_queries('/v1/api/articles/?tag=django')
+        self.assertEqual((data['articlesCount'], counts), (3, 1))
+
+        data, counts = self.count_queries('/v1/api/articles/?tag=Django&offset=1')
+        self.assertEqual((data['articlesCount'], counts), (3, 0))
+
+    def test_article_create_and_delete_invalidate_count(self):
+        self.count_queries('/v1/api/articles/?tag=django')
+        article = self.publish('article-3')
+        data, _ = self.count_queries('/v1/api/articles/?tag=django')
+        self.assertEqual(data['articlesCount'], 4)
+
+        article.delete()
+        data, _ = self.count_queries('/v1/api/articles/?tag=django')
+        self.assertEqual(data['articlesCount'], 3)
+
+    def test_favorite_invalidates_favorited_count(self):
+        self.count_queries('/v1/api/articles/?favorited=author')
+        Article.objects.get(slug='article-0').favorite(self.author)
+        data, _ = self.count_queries('/v1/api/articles/?favorited=author')
+        self.assertEqual(data['articlesCount'], 1)
+
+    @override_settings(ARTICLES_COUNT_ESTIMATE_CAP=2)
+    def test_estimated_count_is_capped(self):
+        data, _ = self.count_queries('/v1/api/articles/?count=estimated&offset=2')
+        self.assertEqual(data['articlesCount'], 2)
+        self.assertFalse(data['articlesCountExact'])
+        self.assertEqual(len(data['articles']), 1)
+
+        data, _ = self.count_queries('/v1/api/articles/?count=estimated&author=nobody')
+        self.assertEqual(data['articlesCount'], 0)
+        self.assertTrue(data['articlesCountExact'])
+
+
+class ArticleSearchTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(
+            username='author', email='author@example.com', password='pass12345')
+        self.tag = Tag.objects.create(name='python')
+        self.publish('body-hit', 'Cooking', 'Weekly notes', 'We tried django and rest apis')
+        self.publish('title-hit', 'Django REST tips', 'Notes', 'Plain text')
+        self.publish('miss', 'Gardening', 'Notes', 'Tomatoes')
+
+    def publish(self, slug, title, description, body):
+        return Article.objects.create(
+            slug=slug, title=title, description=description, body=body, author=self.author)
+
+    def search(self, query):
+        response = self.client.get('/v1/api/articles/', {'search': query})
+        self.assertEqual(response.status_code, 200)
+        return [article['slug'] for article in response.json()['articles']], response.json()
+
+    def test_results_are_ranked_and_require_every_term(self):
+        slugs, data = self.search('django REST')
+        self.assertEqual(slugs, ['title-hit', 'body-hit'])
+        self.assertEqual(data['articlesCount'], 2)
+        self.assertEqual(self.search('django tomatoes')[0], [])
+
+    def test_search_combines_with_filters(self):
+        Article.objects.get(slug='body-hit').tags.add(self.tag)
+        response = self.client.get('/v1/api/articles/', {'search': 'django', 'tag': 'python'})
+        self.assertEqual([a['slug'] for a in response.json()['articles']], ['body-hit'])
+
+    def test_index_follows_updates_and_rebuild(self):
+        self.assertEqual(self.search('django')[1]['articlesCount'], 2)
+        article = Article.objects.get(slug='miss')
+        article.body = 'Django in the garden'
+        article.save()
+        slugs, data = self.search('django')
+        self.assertIn('miss', slugs)
+        # The cached count of the same search is invalidated by the edit.
+        self.assertEqual(data['articlesCount'], 3)
+
+        ArticleTerm.objects.all().delete()
+        call_command('rebuild_search_index', '--chunk-size', '2', stdout=StringIO())
+        self.assertEqual(len(self.search('django')[0]), 3)
+
+
+class VersionedCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        reset_stats()
+
+    def test_tags_list_is_cached_and_invalidated_by_signals(self):
+        Tag.objects.create(name='django')
+        self.assertEqual(self.client.get('/v1/api/tags/').json(), {'tags': ['django']})
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get('/v1/api/tags/')
+        self.assertEqual(app_queries(ctx), [])
+
+        Tag.objects.create(name='python')
+        self.assertEqual(self.client.get('/v1/api/tags/').json(), {'tags': ['django', 'python']})
+        self.assertEqual(get_stats()['tags_list'], {'hits': 1, 'misses': 2})
+
+    def test_workers_without_a_shared_cache_converge(self):
+        Tag.objects.create(name='django')
+        self.client.get('/v1/api/tags/')
+        version_key = VERSION_KEY_FORMAT % 'tags'
+        # A second worker with its own LocMemCache never sees the bump made
+        # by the worker that saved the tag.
+        stale_version = cache.get(version_key)
+        Tag.objects.create(name='python')
+        cache.set(version_key, stale_version, None)
+        self.assertEqual(self.client.get('/v1/api/tags/').json(), {'tags': ['django']})
+
+        # Its entry still expires after VERSIONED_CACHE_TIMEOUT.
+        later = time.time() + settings.VERSIONED_CACHE_TIMEOUT + 1
+        with mock.patch('django.core.cache.backends.locmem.time') as clock:
+            clock.time.return_value = later
+            self.assertEqual(
+                self.client.get('/v1/api/tags/').json(), {'tags': ['django', 'python']})
+
+        # A worker whose version keys are gone (new or evicted) reseeds them
+        # and never reads entries written under the old versions.
+        Tag.objects.create(name='rust')
+        cache.set(version_key, stale_version, None)
+        cache.delete(version_key)
+        self.assertEqual(
+            self.client.get('/v1/api/tags/').json(), {'tags': ['django', 'python', 'rust']})
+
+    @unittest.skipIf(settings.CACHE_URL, 'Only the local-memory cache is sized in settings')
+    def test_local_cache_holds_more_than_the_django_default(self):
+        cache.set_many({f'entry:{i}': i for i in range(1000)})
+        self.assertEqual(cache.get('entry:0'), 0)
+
+    def test_bump_version_invalidates_dependent_keys(self):
+        region = VersionedCache('region', namespaces=['things'])
+        self.assertEqual(region.get_or_set(lambda: 1), 1)
+        self.assertEqual(region.get_or_set(lambda: 2), 1)
+        bump_version('things')
+        self.assertEqual(region.get_or_set(lambda: 3), 3)
+
+
+class ArticleDetailETagTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(
+            username='author', email='author@example.com', password='pass12345')
+        self.viewer = User.objects.create_user(
+            username='viewer', email='viewer@example.com', password='pass12345')
+        self.article = Article.objects.create(
+            slug='detail', title='Detail', description='d', body='b', author=self.author)
+        self.url = '/v1/api/articles/detail/'
+
+    def test_if_none_match_returns_304_without_serializing(self):
+        etag = self.client.get(self.url)['ETag']
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(len(app_queries(ctx)), 1)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_etag_changes_with_favorites_and_profile(self):
+        etag = self.client.get(self.url)['ETag']
+        self.article.favorite(self.viewer)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['article']['favoritesCount'], 1)
+
+        etag = response['ETag']
+        self.author.bio = 'New bio'
+        self.author.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['article']['author']['bio'], 'New bio')
+
+    def test_profile_updates_through_the_api_change_the_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        token = RefreshToken.for_user(self.author).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        response = self.client.put('/v1/api/user/', {'user': {'bio': 'New bio'}}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        self.client.credentials()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['article']['author']['bio'], 'New bio')
+
+    def test_etag_is_the_same_in_every_worker(self):
+        etag = self.client.get(self.url)['ETag']
+        # Another worker: nothing cached, no cache versions.
+        cache.clear()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_tag_changes_reach_the_cached_body(self):
+        tag = Tag.objects.create(name='django')
+        etag = self.client.get(self.url)['ETag']
+        self.article.tags.add(tag)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['article']['tagList'], ['django'])
+
+        etag = response['ETag']
+        tag.name = 'python'
+        tag.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['article']['tagList'], ['python'])
+
+    def test_clearing_a_tag_reaches_the_cached_body(self):
+        tag = Tag.objects.create(name='django')
+        self.article.tags.add(tag)
+        etag = self.client.get(self.url)['ETag']
+        tag.articles.clear()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['article']['tagList'], [])
+
+    def test_viewer_fields_are_overlaid_on_cached_body(self):
+        anonymous = self.client.get(self.url)
+        self.viewer.follow(self.author)
+        self.article.favorite(self.viewer)
+        self.client.force_authenticate(self.viewer)
+        response = self.client.get(self.url)
+
+        self.assertNotEqual(response['ETag'], anonymous['ETag'])
+        self.assertTrue(response.json()['article']['favorited'])
+        self.assertTrue(response.json()['article']['author']['following'])
+        self.assertEqual(list(response.json()['article']), list(anonymous.json()['article']))
+
+
+class GCRAThrottleTests(APITestCase):
+    def test_bucket_allows_burst_then_limits(self):
+        results = [ThrottleBucket.objects.consume('k', 1000.0, 3, 60)[0] for _ in range(4)]
+        self.assertEqual(results, [True, True, True, False])
+
+        allowed, wait = ThrottleBucket.objects.consume('k', 1000.0, 3, 60)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 20.0)
+        self.assertTrue(ThrottleBucket.objects.consume('k', 1020.0, 3, 60)[0])
+        self.assertEqual(ThrottleBucket.objects.count(), 1)
+
+    def test_login_scope_rate_is_enforced(self):
+        url = '/v1/api/users/login/'
+        payload = {'user': {'email': 'nobody@example.com', 'password': 'x'}}
+        statuses = [self.client.post(url, payload, format='json').status_code for _ in range(6)]
+        self.assertEqual(statuses, [400] * 5 + [429])
+
+    def test_article_create_scope_only_limits_creation(self):
+        user = User.objects.create_user(
+            username='writer', email='writer@example.com', password='pass12345')
+        self.client.force_authenticate(user)
+        for _ in range(15):
+            self.assertEqual(self.client.get('/v1/api/articles/').status_code, 200)
+
+
+class CachedUserJWTAuthenticationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        user_records.clear()
+        self.user = User.objects.create_user(
+            username='reader', email='reader@example.com', password='pass12345')
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def user_queries(self, method, url, data=None):
+        table = User._meta.db_table
+        with CaptureQueriesContext(connection) as ctx:
+            response = getattr(self.client, method)(url, data, format='json')
+        return response, [q for q in app_queries(ctx) if f'FROM "{table}"' in q['sql']]
+
+    def test_user_row_is_loaded_once(self):
+        response, queries = self.user_queries('get', '/v1/api/user/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 1)
+
+        response, queries = self.user_queries('get', '/v1/api/user/')
+        self.assertEqual(response.data['user']['email'], 'reader@example.com')
+        self.assertEqual(queries, [])
+
+    def test_update_invalidates_cached_record(self):
+        self.client.get('/v1/api/user/')
+        self.client.put('/v1/api/user/', {'user': {'bio': 'Updated'}}, format='json')
+        response = self.client.get('/v1/api/user/')
+        self.assertEqual(response.data['user']['bio'], 'Updated')
+
+    def test_update_writes_the_full_row(self):
+        self.client.get('/v1/api/user/')
+        before = User.objects.get(pk=self.user.pk).updated_at
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.put('/v1/api/user/', {'user': {'bio': 'Updated'}}, format='json')
+        self.assertEqual(response.status_code, 200)
+        table = User._meta.db_table
+        updates = [q['sql'] for q in app_queries(ctx) if q['sql'].startswith(f'UPDATE "{table}"')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('"updated_at"', updates[0])
+        self.assertGreater(User.objects.get(pk=self.user.pk).updated_at, before)
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.get('/v1/api/user/')
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/v1/api/user/').status_code, 401)
+
+    def test_records_expire_when_another_worker_deactivates_the_user(self):
+        self.client.get('/v1/api/user/')
+        # Deactivated by a worker whose version bump this process never sees.
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.client.get('/v1/api/user/').status_code, 200)
+
+        later = time.monotonic() + settings.AUTH_USER_CACHE_TIMEOUT + 1
+        with mock.patch('apis.authentication.time') as clock:
+            clock.monotonic.return_value = later
+            self.assertEqual(self.client.get('/v1/api/user/').status_code, 401)
+
+
+class AsyncPasswordViewTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+
+    def register(self, username, email, password='Str0ng-pass!'):
+        return self.client.post('/v1/api/users/', {'user': {
+            'username': username, 'email': email, 'password': password}}, format='json')
+
+    def login(self, email, password='Str0ng-pass!'):
+        return self.client.post('/v1/api/users/login/', {'user': {
+            'email': email, 'password': password}}, format='json')
+
+    def test_register_then_login(self):
+        response = self.register('jake', 'jake@example.com')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['user']['username'], 'jake')
+        self.assertTrue(User.objects.get(username='jake').check_password('Str0ng-pass!'))
+
+        response = self.login('jake@example.com')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('token', response.json()['user'])
+
+        response = self.login('jake@example.com', 'wrong')
+        self.assertEqual(response.json(), {'errors': {'non_field_errors': ['Invalid credentials']}})
+        self.assertEqual(self.register('jake', 'other@example.com').status_code, 400)
+
+    def test_errors_go_through_the_exception_handler(self):
+        handler = f'{__name__}.enveloped_exception_handler'
+        with self.settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'EXCEPTION_HANDLER': handler}):
+            response = self.client.post(
+                '/v1/api/users/login/', '{"user":', content_type='application/json')
+            self.assertEqual(response.status_code, 400)
+            self.assertTrue(response.json()['errors']['detail'].startswith('JSON parse error'))
+            response = self.client.post('/v1/api/users/', 'jake', content_type='text/plain')
+            self.assertEqual(response.status_code, 415)
+            self.assertIn('detail', response.json()['errors'])
+
+    def test_form_encoded_bodies_are_parsed(self):
+        required = ['This field is required.']
+        response = self.client.post(
+            '/v1/api/users/login/', 'email=jake%40example.com',
+            content_type='application/x-www-form-urlencoded')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'errors': {'email': required, 'password': required}})
+        response = self.client.post('/v1/api/users/', {'email': 'jake@example.com'}, format='multipart')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errors']['username'], required)
+
+    def test_login_rehashes_to_preferred_hasher(self):
+        with self.settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.PBKDF2PasswordHasher']):
+            User.objects.create_user(
+                username='jake', email='jake@example.com', password='Str0ng-pass!')
+        with self.settings(PASSWORD_HASHERS=[
+                'django.contrib.auth.hashers.MD5PasswordHasher',
+                'django.contrib.auth.hashers.PBKDF2PasswordHasher']):
+            self.assertEqual(self.login('jake@example.com').status_code, 200)
+        self.assertTrue(User.objects.get(username='jake').password.startswith('md5$'))
+
+    def test_full_hasher_queue_is_rejected(self):
+        hasher_pool.in_flight += 3
+        try:
+            with self.settings(PASSWORD_HASHER_WORKERS=1, PASSWORD_HASHER_MAX_QUEUE=2):
+                response = self.login('nobody@example.com')
+        finally:
+            hasher_pool.in_flight -= 3
+        self.assertEqual(response.status_code, 503)
+        self.assertGreaterEqual(hasher_pool.stats()['rejected'], 1)
+
+    @override_settings(REQUEST_METRICS_SAMPLE_RATE=1)
+    def test_pool_occupancy_is_logged_with_request_metrics(self):
+        User.objects.create_user(username='jake', email='jake@example.com', password='Str0ng-pass!')
+        with self.assertLogs('apis.instrumentation', 'INFO') as logs:
+            self.assertEqual(self.login('jake@example.com').status_code, 200)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'UserLoginView.post')
+        self.assertEqual(set(record['hasher']),
+                         {'workers', 'in_flight', 'queued', 'completed', 'rejected'})
+        self.assertGreaterEqual(record['hasher']['in_flight'], 1)
+
+
+@override_settings(ASYNC_READ_VIEWS=True)
+class AsyncReadPathTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        user_records.clear()
+        self.viewer = User.objects.create_user(
+            username='viewer', email='viewer@example.com', password='pass12345')
+        self.author = User.objects.create_user(
+            username='author', email='author@example.com', password='pass12345', bio='Hi')
+        tag = Tag.objects.create(name='django')
+        for i in range(3):
+            article = Article.objects.create(
+                slug=f'article-{i}', title=f'Article {i}', description='d', body='b',
+                author=self.author)
+            article.tags.add(tag)
+        Article.objects.get(slug='article-1').favorite(self.viewer)
+        self.viewer.follow(self.author)
+        token = RefreshToken.for_user(self.viewer).access_token
+        self.auth = f'Bearer {token}'
+        self.namespaces = ['articles', 'tags', 'favorites', f'follows:{self.viewer.pk}'] + [
+            f'profile:{user.pk}' for user in (self.viewer, self.author)]
+
+    def reset_cache(self):
+        # Pin cache versions so both paths compute the same ETags.
+        cache.clear()
+        cache.set_many({VERSION_KEY_FORMAT % namespace: 1 for namespace in self.namespaces}, None)
+
+    def render(self, viewset, actions, path, auth=None, **kwargs):
+        """Return status, ETag and body bytes of one request; ``sync`` forces the DRF path."""
+        if kwargs.pop('sync', False):
+            viewset = type(viewset.__name__, (viewset,), {'async_actions': ()})
+        view = viewset.as_view(actions)
+        headers = {'HTTP_AUTHORIZATION': auth} if auth else {}
+        request = APIRequestFactory().get(f'/v1{path}', **headers)
+        if iscoroutinefunction(view):
+            view = async_to_sync(view)
+        response = view(request, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        return response.status_code, response.get('ETag'), response.content
+
+    def assertSameResponse(self, viewset, actions, path, **kwargs):
+        for auth in (None, self.auth):
+            self.reset_cache()
+            expected = self.render(viewset, actions, path, auth, sync=True, **kwargs)
+            self.reset_cache()
+            self.assertEqual(self.render(viewset, actions, path, auth, **kwargs), expected)
+
+    def test_article_reads_match_sync_bytes(self):
+        self.assertSameResponse(ArticleViewSet, {'get': 'list'}, '/api/articles/')
+        self.assertSameResponse(ArticleViewSet, {'get': 'list'}, '/api/articles/?favorited=viewer')
+        self.assertSameResponse(ArticleViewSet, {'get': 'list'}, '/api/articles/?cursor=&limit=2')
+        self.assertSameResponse(
+            ArticleViewSet, {'get': 'retrieve'}, '/api/articles/article-1/', slug='article-1')
+        self.assertSameResponse(
+            ArticleViewSet, {'get': 'retrieve'}, '/api/articles/missing/', slug='missing')
+        self.assertSameResponse(ArticleViewSet, {'get': 'feed'}, '/api/articles/feed/')
+
+    def test_profile_and_tag_reads_match_sync_bytes(self):
+        self.assertSameResponse(
+            ProfileViewSet, {'get': 'retrieve'}, '/api/profiles/author/', username='author')
+        self.assertSameResponse(TagViewSet, {'get': 'list'}, '/api/tags/')
+
+    def test_async_path_over_the_client(self):
+        # The project URLconf was built with ASYNC_READ_VIEWS off.
+        class AsyncURLconf:
+            urlpatterns = [
+                path('v1/api/profiles/<username>/', ProfileViewSet.as_view({'get': 'retrieve'})),
+                path('v1/api/articles/feed/', ArticleViewSet.as_view({'get': 'feed'})),
+            ]
+
+        self.client.credentials(HTTP_AUTHORIZATION=self.auth)
+        with override_settings(ROOT_URLCONF=AsyncURLconf):
+            response = self.client.get('/v1/api/profiles/author/')
+            self.assertEqual(response.json(), {'profile': {
+                'username': 'author', 'bio': 'Hi', 'image': None, 'following': True,
+                'followersCount': 1, 'followingCount': 0}})
+            self.assertEqual(self.client.get('/v1/api/articles/feed/').json()['articlesCount'], 3)
+
+    def test_async_views_are_only_installed_where_they_pay_off(self):
+        self.assertTrue(iscoroutinefunction(
+            ArticleViewSet.as_view({'get': 'list', 'post': 'create'})))
+        self.assertFalse(iscoroutinefunction(
+            ArticleViewSet.as_view({'delete': 'delete_comment'})))
+        with override_settings(ASYNC_READ_VIEWS=False):
+            self.assertFalse(iscoroutinefunction(ArticleViewSet.as_view({'get': 'list'})))
+        self.client.credentials()
+        self.assertEqual(self.client.get('/v1/api/articles/feed/').status_code, 401)
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'Query plans are only checked on SQLite')
+class HotPathIndexTests(APITestCase):
+    """
+    Replay the SELECTs of the hot read paths through ``EXPLAIN QUERY PLAN``
+    and fail on any full table scan. SQLite plans from its index heuristics
+    rather than table statistics, so the plans are stable on tiny fixtures.
+
+    This gate is SQLite-only on purpose: MySQL's cost-based optimizer picks
+    full scans of fixture-sized tables whether or not an index exists, so
+    its EXPLAIN output says nothing about production plans there. The
+    indexes come from the same migrations on both backends; run the suite
+    with an SQLite settings module (e.g. realworld.settings_benchmark) to
+    check them.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(
+            username='Author', email='Author@example.com', password='pass12345')
+        self.reader = User.objects.create_user(
+            username='reader', email='reader@example.com', password='pass12345')
+        tag = Tag.objects.create(name='Django')
+        self.article = Article.objects.create(
+            slug='indexed', title='Indexed', description='d', body='b', author=self.author)
+        self.article.tags.add(tag)
+        self.article.favorite(self.reader)
+        Comment.objects.create(body='hi', article=self.article, author=self.reader)
+
+    def full_scans(self, method, url, data=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = getattr(self.client, method)(url, data, format='json')
+        self.assertLess(response.status_code, 400)
+        scans = []
+        with connection.cursor() as cursor:
+            for query in app_queries(ctx):
+                if not query['sql'].startswith('SELECT'):
+                    continue
+                cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+                scans += [
+                    (row[3], query['sql']) for row in cursor.fetchall()
+                    if re.fullmatch(r'SCAN \S+', row[3])
+                ]
+        return scans
+
+    def test_article_filters_use_indexes(self):
+        for params in ({'tag': 'DJANGO'}, {'author': 'author'}, {'favorited': 'reader'}, {}):
+            with self.subTest(params=params):
+                cache.clear()
+                self.assertEqual(self.full_scans('get', '/v1/api/articles/', params), [])
+
+    def test_detail_and_comments_use_indexes(self):
+        self.assertEqual(self.full_scans('get', '/v1/api/articles/indexed/'), [])
+        self.assertEqual(self.full_scans('get', '/v1/api/articles/indexed/comments/'), [])
+
+    def test_email_lookups_use_indexes(self):
+        scans = self.full_scans(
+            'post', '/v1/api/users/login/',
+            {'user': {'email': 'AUTHOR@example.com', 'password': 'pass12345'}})
+        self.assertEqual(scans, [])
+        scans = self.full_scans(
+            'post', '/v1/api/users/',
+            {'user': {'username': 'new', 'email': 'new@example.com', 'password': 'pass12345'}})
+        self.assertEqual(scans, [])
+
+    def test_lookups_are_case_insensitive(self):
+        response = self.client.get('/v1/api/articles/', {'tag': 'DJANGO', 'author': 'AUTHOR'})
+        self.assertEqual([a['slug'] for a in response.json()['articles']], ['indexed'])
+        response = self.client.post('/v1/api/users/', {'user': {
+            'username': 'other', 'email': 'READER@example.com', 'password': 'pass12345'}},
+            format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class BatchReadTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.viewer = User.objects.create_user(
+            username='viewer', email='viewer@example.com', password='pass12345')
+        self.authors = []
+        for i in range(6):
+            author = User.objects.create_user(
+                username=f'author{i}', email=f'author{i}@example.com', password='pass12345')
+            Article.objects.create(
+                slug=f'article-{i}', title=f'Article {i}', description='d', body='b',
+                author=author).tags.add(Tag.objects.get_or_create(name='django')[0])
+            self.authors.append(author)
+        self.viewer.follow(self.authors[1])
+        Article.objects.get(slug='article-1').favorite(self.viewer)
+        self.client.force_authenticate(self.viewer)
+
+    def get(self, url, params):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params)
+        return response, len(app_queries(ctx))
+
+    def test_articles_keep_request_order_and_mark_missing(self):
+        response, queries = self.get('/v1/api/articles/', {'slugs': 'article-1,missing,article-0'})
+        self.assertEqual(response.status_code, 200)
+        articles = response.json()['articles']
+        self.assertEqual([a['slug'] for a in articles], ['article-1', 'missing', 'article-0'])
+        self.assertEqual(articles[1], {'slug': 'missing', 'notFound': True})
+        self.assertEqual(articles[0]['body'], 'b')
+        self.assertTrue(articles[0]['favorited'])
+        self.assertTrue(articles[0]['author']['following'])
+
+        _, more_queries = self.get('/v1/api/articles/', {
+            'slugs': ','.join(f'article-{i}' for i in range(6))})
+        self.assertEqual(queries, more_queries)
+
+    def test_profiles_keep_request_order_and_mark_missing(self):
+        response, queries = self.get('/v1/api/profiles/', {'usernames': 'author1,nobody,author0'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'profiles': [
+            {'username': 'author1', 'bio': None, 'image': None, 'following': True,
+             'followersCount': 1, 'followingCount': 0},
+            {'username': 'nobody', 'notFound': True},
+            {'username': 'author0', 'bio': None, 'image': None, 'following': False,
+             'followersCount': 0, 'followingCount': 0},
+        ]})
+
+        _, more_queries = self.get('/v1/api/profiles/', {
+            'usernames': ','.join(f'author{i}' for i in range(6))})
+        self.assertEqual(queries, more_queries)
+
+    @override_settings(BATCH_READ_MAX_ITEMS=2)
+    def test_batch_size_is_bounded(self):
+        response, _ = self.get('/v1/api/articles/', {'slugs': 'a,b,c'})
+        self.assertEqual(response.status_code, 400)
+        response, _ = self.get('/v1/api/profiles/', {'usernames': ' , '})
+        self.assertEqual(response.status_code, 400)
+
+
+class JSONLImportExportTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(
+            username='author', email='author@example.com', password='pass12345', bio='Hi')
+        self.reader = User.objects.create_user(
+            username='reader', email='reader@example.com', password='pass12345')
+        self.article = Article.objects.create(
+            slug='exported', title='Exported article', description='d', body='Django text',
+            author=self.author)
+        self.article.tags.add(Tag.objects.create(name='django'))
+        self.article.favorite(self.reader)
+        self.reader.follow(self.author)
+        Comment.objects.create(body='Nice', article=self.article, author=self.reader)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = f'{directory.name}/dump.jsonl'
+
+    def export(self, path):
+        stderr = StringIO()
+        call_command('export_jsonl', path, '--chunk-size', '1', stderr=stderr)
+        return stderr.getvalue()
+
+    def test_round_trip_restores_rows_and_derived_state(self):
+        path = self.path
+        progress = self.export(path)
+        self.assertIn('Exported 2 user row(s)', progress)
+        self.assertIn('rows/s', progress)
+        created_at = self.article.created_at
+
+        Article.objects.all().delete()
+        Tag.objects.all().delete()
+        User.objects.all().delete()
+        stderr = StringIO()
+        call_command('import_jsonl', path, '--chunk-size', '1', stderr=stderr)
+        self.assertIn('Imported 7 row(s)', stderr.getvalue())
+
+        article = Article.objects.get(slug='exported')
+        reader = User.objects.get(username='reader')
+        self.assertEqual(article.created_at, created_at)
+        self.assertEqual(article.favorites_count, 1)
+        self.assertEqual([tag.name for tag in article.tags.all()], ['django'])
+        self.assertTrue(reader.check_password('pass12345'))
+        self.assertTrue(reader.is_following(article.author))
+        self.assertEqual(list(FeedEntry.objects.filter(user=reader).values_list(
+            'article__slug', flat=True)), ['exported'])
+        self.assertTrue(ArticleTerm.objects.filter(article=article, term='django').exists())
+        self.assertEqual(article.comments.get().body, 'Nice')
+
+    def test_export_reads_keyset_chunks(self):
+        for i in range(3):
+            Tag.objects.create(name=f'extra-{i}')
+        rows = Tag.objects.values_list('pk', 'name')
+        with CaptureQueriesContext(connection) as ctx:
+            names = [name for _, name in pk_chunks(rows, 2)]
+        self.assertEqual(names, ['django', 'extra-0', 'extra-1', 'extra-2'])
+        self.assertEqual(len(ctx.captured_queries), 3)
+        for query in ctx.captured_queries:
+            self.assertIn('LIMIT 2', query['sql'])
+
+    def test_import_is_idempotent_for_keyed_records(self):
+        path = self.path
+        self.export(path)
+        call_command('import_jsonl', path, stderr=StringIO())
+        self.assertEqual(User.objects.count(), 2)
+        self.assertEqual(Article.objects.get().favorites_count, 1)
+        self.assertEqual(Article.tags.through.objects.count(), 1)
+
+
+class CommentListingTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.viewer = User.objects.create_user(
+            username='viewer', email='viewer@example.com', password='pass12345')
+        author = User.objects.create_user(
+            username='author', email='author@example.com', password='pass12345')
+        self.article = Article.objects.create(
+            slug='busy', title='Busy', description='d', body='b', author=author)
+        self.url = '/v1/api/articles/busy/comments/'
+        self.client.force_authenticate(self.viewer)
+
+    def add_comments(self, count):
+        for i in range(count):
+            commenter = User.objects.create_user(
+                username=f'commenter{User.objects.count()}',
+                email=f'c{User.objects.count()}@example.com', password='pass12345')
+            if i % 2:
+                self.viewer.follow(commenter)
+            Comment.objects.create(body=f'c{i}', article=self.article, author=commenter)
+
+    def get(self, params=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json(), len(app_queries(ctx))
+
+    def test_pages_carry_total_count_and_following_flags(self):
+        self.add_comments(3)
+        data, queries = self.get({'limit': 2})
+        self.assertEqual(data['commentsCount'], 3)
+        self.assertEqual([c['body'] for c in data['comments']], ['c2', 'c1'])
+        self.assertEqual([c['author']['following'] for c in data['comments']], [False, True])
+        self.assertIsNotNone(data['next'])
+
+        self.add_comments(4)
+        data, more_queries = self.get()
+        self.assertEqual(len(data['comments']), 7)
+        self.assertEqual(queries, more_queries)
+
+    def test_since_returns_only_newer_comments(self):
+        self.add_comments(2)
+        latest = self.get()[0]['comments'][0]
+        self.assertEqual(self.get({'since': latest['createdAt']})[0]['comments'], [])
+
+        Comment.objects.create(body='new', article=self.article, author=self.viewer)
+        data = self.get({'since': latest['createdAt']})[0]
+        self.assertEqual([c['body'] for c in data['comments']], ['new'])
+        self.assertEqual(data['commentsCount'], 3)
+        self.assertEqual(self.client.get(self.url, {'since': 'yesterday'}).status_code, 400)
+
+
+class ViewerContextTests(APITestCase):
+    def setUp(self):
+        self.viewer = User.objects.create_user(
+            username='viewer', email='viewer@example.com', password='pass12345')
+        self.authors = [
+            User.objects.create_user(
+                username=f'author{i}', email=f'author{i}@example.com', password='pass12345')
+            for i in range(3)
+        ]
+        self.viewer.follow(self.authors[0])
+        for i in range(10):
+            article = Article.objects.create(
+                slug=f'article-{i}', title='t', description='d', body='b',
+                author=self.authors[i % 3])
+            Comment.objects.create(body='c', article=article, author=self.authors[i % 3])
+        Article.objects.get(slug='article-3').favorite(self.viewer)
+        self.request = Request(APIRequestFactory().get('/'))
+        self.request.user = self.viewer
+
+    def serialize(self, serializer_class, instance, many=False):
+        with CaptureQueriesContext(connection) as ctx:
+            data = serializer_class(instance, many=many, context={'request': self.request}).data
+        return data, len(ctx.captured_queries)
+
+    def test_lists_load_each_kind_of_state_once(self):
+        comments = list(Comment.objects.select_related('author').order_by('pk'))
+        data, queries = self.serialize(CommentSerializer, comments, many=True)
+        self.assertEqual(queries, 1)
+        self.assertEqual([c['author']['following'] for c in data[:3]], [True, False, False])
+
+        articles = list(Article.objects.select_related('author').prefetch_related(
+            'tags').order_by('pk'))
+        data, queries = self.serialize(ArticleListSerializer, articles, many=True)
+        # Following state is already known; only favorites are loaded.
+        self.assertEqual(queries, 1)
+        self.assertEqual([a['slug'] for a in data if a['favorited']], ['article-3'])
+        self.assertEqual([a['author']['following'] for a in data[:3]], [True, False, False])
+
+    def test_standalone_profiles_share_the_request_context(self):
+        self.assertTrue(self.serialize(ProfileSerializer, self.authors[0])[0]['following'])
+        data, queries = self.serialize(ProfileSerializer, self.authors[0])
+        self.assertTrue(data['following'])
+        self.assertEqual(queries, 0)
+
+    def test_anonymous_viewer_never_queries(self):
+        self.request.user = AnonymousUser()
+        data, queries = self.serialize(
+            CommentSerializer, list(Comment.objects.select_related('author')), many=True)
+        self.assertEqual(queries, 0)
+        self.assertFalse(any(c['author']['following'] for c in data))
+
+
+class BulkFollowTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.viewer = User.objects.create_user(
+            username='viewer', email='viewer@example.com', password='pass12345')
+        self.authors = [
+            User.objects.create_user(
+                username=f'author{i}', email=f'author{i}@example.com', password='pass12345')
+            for i in range(4)
+        ]
+        for author in self.authors:
+            Article.objects.create(
+                slug=f'by-{author.username}', title='t', description='d', body='b', author=author)
+        self.client.force_authenticate(self.viewer)
+        self.url = '/v1/api/user/following/'
+
+    def counts(self, user):
+        user.refresh_from_db(fields=['followers_count', 'following_count'])
+        return user.followers_count, user.following_count
+
+    def test_bulk_follow_is_idempotent_and_maintains_counts(self):
+        usernames = ['author0', 'author1', 'nobody', 'viewer']
+        response = self.client.post(self.url, {'usernames': usernames}, format='json')
+        self.assertEqual(response.status_code, 200)
+        profiles = response.json()['profiles']
+        self.assertEqual([p.get('following') for p in profiles], [True, True, None, False])
+        self.assertEqual(profiles[2], {'username': 'nobody', 'notFound': True})
+        self.assertEqual(profiles[0]['followersCount'], 1)
+
+        self.client.post(self.url, {'usernames': ['author1', 'author2']}, format='json')
+        self.assertEqual(self.counts(self.viewer), (0, 3))
+        self.assertEqual(self.counts(self.authors[1]), (1, 0))
+        self.assertEqual(FeedEntry.objects.filter(user=self.viewer).count(), 3)
+
+        response = self.client.delete(self.url, {'usernames': ['author0', 'author3']}, format='json')
+        self.assertFalse(response.json()['profiles'][0]['following'])
+        self.assertEqual(self.counts(self.viewer), (0, 2))
+        self.assertEqual(self.counts(self.authors[0]), (0, 0))
+        self.assertFalse(FeedEntry.objects.filter(user=self.viewer, author=self.authors[0]).exists())
+
+    def test_bulk_follow_uses_one_insert(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post(self.url, {
+                'usernames': [author.username for author in self.authors]}, format='json')
+        follow_table = User.following.through._meta.db_table
+        inserts = [q for q in ctx.captured_queries
+                   if q['sql'].startswith(f'INSERT') and follow_table in q['sql']]
+        self.assertEqual(len(inserts), 1)
+
+    def test_bulk_route_does_not_shadow_a_user_named_follow(self):
+        User.objects.create_user(
+            username='follow', email='follow@example.com', password='pass12345')
+        response = self.client.get('/v1/api/profiles/follow/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['profile']['username'], 'follow')
+        response = self.client.post('/v1/api/profiles/follow/follow/')
+        self.assertTrue(response.json()['profile']['following'])
+
+    def test_single_follow_endpoint_reports_counts(self):
+        response = self.client.post('/v1/api/profiles/author0/follow/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['profile']['followersCount'], 1)
+        response = self.client.delete('/v1/api/profiles/author0/follow/')
+        self.assertEqual(response.json()['profile']['followersCount'], 0)
+        self.assertFalse(response.json()['profile']['following'])
+
+    def test_bulk_follow_validates_usernames(self):
+        response = self.client.post(self.url, {'usernames': 'author0'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.client.force_authenticate(None)
+        response = self.client.post(self.url, {'usernames': ['author0']}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+
+@override_settings(FAVORITES_WRITE_BEHIND=True)
+class WriteBehindFavoritesTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        favorite_buffer.reset()
+        self.viewer = User.objects.create_user(
+            username='viewer', email='viewer@example.com', password='pass12345')
+        author = User.objects.create_user(
+            username='author', email='author@example.com', password='pass12345')
+        self.article = Article.objects.create(
+            slug='viral', title='Viral', description='d', body='b', author=author)
+        self.url = '/v1/api/articles/viral/favorite/'
+        self.client.force_authenticate(self.viewer)
+
+    def detail(self):
+        return self.client.get('/v1/api/articles/viral/').json()['article']
+
+    def test_toggles_are_buffered_and_visible_to_the_viewer(self):
+        response = self.client.post(self.url)
+        self.assertTrue(response.json()['article']['favorited'])
+        self.assertEqual(response.json()['article']['favoritesCount'], 1)
+        self.assertFalse(self.article.favorited_by.exists())
+
+        article = self.detail()
+        self.assertEqual((article['favorited'], article['favoritesCount']), (True, 1))
+        listed = self.client.get('/v1/api/articles/').json()['articles'][0]
+        self.assertEqual((listed['favorited'], listed['favoritesCount']), (True, 1))
+        self.client.force_authenticate(None)
+        self.assertEqual(self.detail()['favoritesCount'], 0)
+
+    def test_own_favorites_listing_includes_pending_toggles(self):
+        other = Article.objects.create(
+            slug='older', title='Older', description='d', body='b', author=self.article.author)
+        other.favorite(self.viewer)
+        url = '/v1/api/articles/?favorited=viewer'
+        self.assertEqual(self.client.get(url).json()['articlesCount'], 1)
+
+        self.client.post(self.url)
+        self.client.delete('/v1/api/articles/older/favorite/')
+        response = self.client.get(url).json()
+        self.assertEqual([a['slug'] for a in response['articles']], ['viral'])
+        self.assertEqual(response['articlesCount'], 1)
+
+        # Other readers see the flushed state until the next flush.
+        self.client.force_authenticate(None)
+        response = self.client.get(url).json()
+        self.assertEqual([a['slug'] for a in response['articles']], ['older'])
+        favorite_buffer.flush()
+        response = self.client.get(url).json()
+        self.assertEqual([a['slug'] for a in response['articles']], ['viral'])
+
+    def test_flush_applies_only_the_final_state(self):
+        other = User.objects.create_user(
+            username='other', email='other@example.com', password='pass12345')
+        self.client.post(self.url)
+        self.client.delete(self.url)
+        self.client.post(self.url)
+        favorite_buffer.record(other, self.article, True)
+        self.assertEqual(favorite_buffer.stats()['depth'], 2)
+
+        stdout = StringIO()
+        call_command('flush_favorites', stdout=stdout)
+        self.assertIn('Applied 2 favorite intent(s)', stdout.getvalue())
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.favorites_count, 2)
+        self.assertEqual(favorite_buffer.stats()['depth'], 0)
+
+        self.client.delete(self.url)
+        self.assertEqual(self.detail()['favoritesCount'], 1)
+        favorite_buffer.flush()
+        self.assertFalse(self.article.favorited_by.filter(pk=self.viewer.pk).exists())
+
+    def test_requests_never_flush(self):
+        for _ in range(5):
+            self.client.post(self.url)
+            self.client.delete(self.url)
+        self.client.post(self.url)
+        self.assertFalse(self.article.favorited_by.exists())
+        self.assertEqual(favorite_buffer.stats()['flushes'], 0)
+        self.assertEqual(favorite_buffer.stats()['recorded'], 11)
+
+    def test_flush_moves_counts_by_net_delta(self):
+        fans = [
+            User.objects.create_user(
+                username=f'fan{i}', email=f'fan{i}@example.com', password='pass12345')
+            for i in range(4)
+        ]
+        self.article.favorite(fans[0])
+        self.article.favorite(fans[1])
+        # Drifted on purpose: a delta keeps the drift, a recount would not.
+        Article.objects.filter(pk=self.article.pk).update(favorites_count=10)
+        favorite_buffer.record(fans[0], self.article, False)
+        favorite_buffer.record(fans[1], self.article, True)
+        favorite_buffer.record(fans[2], self.article, True)
+        favorite_buffer.record(fans[3], self.article, True)
+        favorite_buffer.record(self.viewer, self.article, False)
+
+        favorite_table = Article.favorited_by.through._meta.db_table
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(favorite_buffer.flush(), 5)
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.favorites_count, 11)
+        self.assertEqual(set(self.article.favorited_by.values_list('username', flat=True)),
+                         {'fan1', 'fan2', 'fan3'})
+        self.assertFalse(any(
+            'COUNT' in q['sql'] and favorite_table in q['sql'] for q in ctx.captured_queries))
+
+
+class FastJSONRendererTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.viewer = User.objects.create_user(
+            username='viewer', email='viewer@example.com', password='pass12345')
+        author = User.objects.create_user(
+            username='author', email='author@example.com', password='pass12345')
+        for i in range(3):
+            article = Article.objects.create(
+                slug=f'article-{i}', title=f'Art\u00edcle {i}\u2028', description='d', body='b',
+                author=author)
+            article.tags.add(Tag.objects.get_or_create(name='django')[0])
+        self.viewer.follow(author)
+        self.client.force_authenticate(self.viewer)
+
+    def test_matches_drf_json_renderer(self):
+        data = {
+            'text': 'na\u00efve \u2028 "quoted"',
+            'lazy': gettext_lazy('Not found.'),
+            'utc': datetime(2024, 5, 1, 12, 30, 15, 120, tzinfo=dt_timezone.utc),
+            'offset': datetime(2024, 5, 1, 12, 30, tzinfo=dt_timezone(timedelta(hours=2))),
+            'decimal': Decimal('1.5'),
+            'nested': [{'a': None, 'b': True}, (1, 2.5)],
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+        self.assertEqual(
+            FastJSONRenderer().render(data, 'application/json; indent=2'),
+            JSONRenderer().render(data, 'application/json; indent=2'))
+
+    def fetch(self, url, min_items):
+        with override_settings(STREAMING_LIST_MIN_ITEMS=min_items):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        if response.streaming:
+            return True, b''.join(response.streaming_content)
+        return False, response.content
+
+    def test_large_pages_stream_the_same_bytes(self):
+        for url in ('/v1/api/articles/', '/v1/api/articles/?count=estimated',
+                    '/v1/api/articles/?cursor=&limit=2', '/v1/api/articles/feed/'):
+            streamed, body = self.fetch(url, 2)
+            self.assertTrue(streamed, url)
+            self.assertEqual((False, body), self.fetch(url, 0), url)
+        self.assertFalse(self.fetch('/v1/api/articles/?limit=1', 2)[0])
+
+    def test_browsable_api_is_not_streamed(self):
+        # Pinned: production-based settings leave the browsable renderer out.
+        renderers = [FastJSONRenderer, BrowsableAPIRenderer]
+        with mock.patch.object(ArticleViewSet, 'renderer_classes', renderers):
+            streamed, body = self.fetch('/v1/api/articles/?format=api', 2)
+        self.assertFalse(streamed)
+        self.assertIn(b'<html', body)
+
+    def test_production_settings_leave_out_browsable_api(self):
+        production = importlib.import_module('realworld.settings_production')
+        self.assertEqual(
+            production.REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'],
+            ('apis.renderers.FastJSONRenderer',))
+
+
+class RowSerializerParityTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.viewer = User.objects.create_user(
+            username='viewer', email='viewer@example.com', password='pass12345')
+        authors = [
+            User.objects.create_user(
+                username=f'author{i}', email=f'author{i}@example.com', password='pass12345',
+                bio='Writes things' if i else None, image='https://example.com/a.png' if i else None)
+            for i in range(2)
+        ]
+        tags = [Tag.objects.create(name=name) for name in ('django', 'python', 'rest')]
+        for i in range(5):
+            article = Article.objects.create(
+                slug=f'article-{i}', title=f'Article {i}', description='déjà', body='b',
+                author=authors[i % 2])
+            article.tags.add(*tags[:i % 4])
+            Comment.objects.create(body=f'comment {i}', article=article, author=authors[i % 2])
+        Article.objects.get(slug='article-1').favorite(self.viewer)
+        Article.objects.get(slug='article-2').favorite(authors[0])
+        self.viewer.follow(authors[1])
+        self.client.force_authenticate(self.viewer)
+
+    def assertParity(self, row_serializer, queryset):
+        for user in (AnonymousUser(), self.viewer):
+            request = Request(APIRequestFactory().get('/'))
+            request.user = user
+            queryset = queryset.with_viewer_state(user).order_by('-created_at')
+            expected = row_serializer.serializer_class(
+                queryset, many=True, context={'request': request}).data
+            rows = row_serializer.rows(queryset)
+            self.assertEqual(row_serializer(rows).data, expected)
+
+    def test_articles_match_drf_serializer(self):
+        self.assertParity(
+            ArticleRowSerializer, Article.objects.select_related('author').prefetch_related('tags'))
+
+    @override_settings(FAVORITES_WRITE_BEHIND=True)
+    def test_articles_match_with_pending_favorites(self):
+        favorite_buffer.reset()
+        self.client.post('/v1/api/articles/article-3/favorite/')
+        self.client.delete('/v1/api/articles/article-1/favorite/')
+        self.assertParity(
+            ArticleRowSerializer, Article.objects.select_related('author').prefetch_related('tags'))
+
+    def test_comments_match_drf_serializer(self):
+        self.assertParity(CommentRowSerializer, Comment.objects.select_related('author'))
+
+    def test_endpoints_match_drf_serializers(self):
+        for url in ('/v1/api/articles/', '/v1/api/articles/?cursor=&limit=2',
+                    '/v1/api/articles/feed/', '/v1/api/articles/article-1/comments/'):
+            with override_settings(FAST_READ_SERIALIZERS=True):
+                fast = self.client.get(url)
+            cache.clear()
+            with override_settings(FAST_READ_SERIALIZERS=False):
+                drf = self.client.get(url)
+            cache.clear()
+            self.assertEqual(fast.status_code, 200, url)
+            self.assertEqual(fast.content, drf.content, url)
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'The benchmark only runs on SQLite')
+class BenchmarkCommandTests(APITestCase):
+    def test_compare_flags_query_and_latency_regressions(self):
+        baseline = {'tiny': {
+            'feed': {'p50_ms': 10.0, 'p90_ms': 12.0, 'queries_max': 4},
+            'tags': {'p50_ms': 10.0, 'p90_ms': 12.0, 'queries_max': 2},
+        }}
+        results = {'tiny': {
+            'feed': {'p50_ms': 11.0, 'p90_ms': 13.0, 'queries_max': 5},
+            'tags': {'p50_ms': 20.0, 'p90_ms': 12.0, 'queries_max': 2},
+            'login': {'p50_ms': 500.0, 'p90_ms': 500.0, 'queries_max': 2},
+        }}
+        self.assertEqual(compare(results, baseline, 0.25), [
+            'tiny/feed: queries 4 -> 5',
+            'tiny/tags: p50_ms 10.00 -> 20.00',
+        ])
+
+    def test_runs_scenarios_and_writes_results(self):
+        with tempfile.TemporaryDirectory() as directory:
+            baseline = f'{directory}/baseline.json'
+            call_command(
+                'benchmark', scale=['tiny'], iterations=2, warmup=0, output=baseline,
+                scenarios=['login', 'articles_list', 'feed', 'favorite', 'comments'],
+                stderr=StringIO())
+            with open(baseline) as source:
+                results = json.load(source)['results']['tiny']
+            call_command(
+                'benchmark', scale=['tiny'], iterations=2, warmup=0,
+                output=f'{directory}/results.json', scenarios=['articles_list'],
+                baseline=baseline, tolerance=100, stderr=StringIO())
+
+        self.assertEqual(
+            set(results), {'login', 'articles_list', 'feed', 'favorite', 'comments'})
+        self.assertEqual(results['articles_list']['iterations'], 2)
+        self.assertGreater(results['feed']['queries_max'], 0)
+        self.assertEqual(Article.objects.count(), SCALES['tiny']['articles'])
+
+
+class SeedDataCommandTests(APITestCase):
+    def seed(self, prefix, seed=3):
+        call_command(
+            'seed_data', scale='tiny', seed=seed, prefix=prefix, viral_comments=40,
+            batch_size=50, stderr=StringIO())
+        users = User.objects.filter(username__startswith=f'{prefix}user')
+        articles = Article.objects.filter(slug__startswith=f'{prefix}article-')
+        return {
+            'followers': list(users.order_by('pk').values_list('followers_count', flat=True)),
+            'favorites': list(articles.order_by('pk').values_list('favorites_count', flat=True)),
+            'comments': list(articles.order_by('pk').annotate(
+                total=Count('comments')).values_list('total', flat=True)),
+            'tags': list(articles.order_by('pk').values_list('tags__name', flat=True)),
+        }
+
+    def test_same_seed_generates_the_same_data(self):
+        first = self.seed('a-')
+        self.assertEqual(
+            [name and name[2:] for name in first['tags']],
+            [name and name[2:] for name in self.seed('b-')['tags']])
+        self.assertEqual({**first, 'tags': None}, {**self.seed('c-'), 'tags': None})
+        self.assertNotEqual(first['favorites'], self.seed('d-', seed=4)['favorites'])
+        with self.assertRaises(CommandError):
+            self.seed('a-')
+
+    def test_counters_feeds_and_search_are_consistent(self):
+        self.seed('')
+        self.assertEqual(User.objects.count(), SCALES['tiny']['users'])
+        self.assertEqual(Article.objects.count(), SCALES['tiny']['articles'])
+        for user in User.objects.annotate(
+                followers_total=Count('followers', distinct=True),
+                following_total=Count('following', distinct=True)):
+            self.assertEqual(user.followers_count, user.followers_total)
+            self.assertEqual(user.following_count, user.following_total)
+        self.assertFalse(Article.objects.exclude(
+            favorites_count=Article.objects.actual_favorites_count()).exists())
+        # One viral article, commented viral_comments times.
+        self.assertEqual(Article.objects.annotate(total=Count('comments')).filter(
+            total=40).count(), 1)
+
+        viewer = User.objects.order_by('-following_count').first()
+        self.assertTrue(viewer.check_password('password'))
+        self.client.force_authenticate(viewer)
+        feed = self.client.get('/v1/api/articles/feed/?limit=1').json()
+        expected = Article.objects.filter(author__followers=viewer).count()
+        self.assertEqual(feed['articlesCount'], expected)
+        self.assertEqual(
+            self.client.get('/v1/api/articles/?search=django').json()['articlesCount'],
+            Article.objects.filter(
+                Q(title__icontains='django') | Q(description__icontains='django')
+                | Q(body__icontains='django')).count())
+
+
+class RequestMetricsTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.viewer = User.objects.create_user(
+            username='viewer', email='viewer@example.com', password='pass12345')
+        for i in range(6):
+            Article.objects.create(
+                slug=f'article-{i}', title=f'Article {i}', description='d', body='b',
+                author=self.viewer)
+        self.client.force_authenticate(self.viewer)
+
+    @override_settings(REQUEST_METRICS_SAMPLE_RATE=1)
+    def test_sampled_request_reports_timings(self):
+        with self.assertLogs('apis.instrumentation', 'INFO') as logs:
+            response = self.client.get('/v1/api/articles/')
+        self.assertEqual(response.status_code, 200)
+        timing = response['Server-Timing']
+        for phase in ('db;dur=', 'serialize;dur=', 'render;dur=', 'total;dur='):
+            self.assertIn(phase, timing)
+
+        self.assertEqual(len(logs.records), 1)
+        self.assertEqual(logs.records[0].levelname, 'INFO')
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'ArticleViewSet.list')
+        self.assertEqual(record['status'], 200)
+        self.assertGreater(record['queries'], 0)
+        self.assertIn(f'desc="{record["queries"]} queries"', timing)
+        self.assertEqual(record['repeated_queries'], [])
+
+    @override_settings(REQUEST_METRICS_SAMPLE_RATE=0)
+    def test_unsampled_request_is_not_measured(self):
+        with self.assertNoLogs('apis.instrumentation'):
+            response = self.client.get('/v1/api/articles/')
+        self.assertNotIn('Server-Timing', response)
+
+    def test_repeated_query_shapes_are_flagged(self):
+        articles = list(Article.objects.order_by('pk'))
+        with collecting(RequestMetrics()) as metrics:
+            for article in articles:
+                article.is_favorited_by(self.viewer)
+            list(Article.objects.filter(pk__in=[1, 2, 3]))
+            list(Article.objects.filter(pk__in=[4, 5]))
+        (shape, count), = metrics.repeated_queries()
+        self.assertEqual(count, len(articles))
+        self.assertIn('apis_article_favorited_by', shape)
+        self.assertEqual(metrics.queries, len(articles) + 2)
+        self.assertEqual(query_shape('SELECT 1 FROM t WHERE id IN (%s, %s) LIMIT 21'),
+                         'SELECT ? FROM t WHERE id IN (%s...) LIMIT ?')
+
+
+class ProfilingTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.viewer = User.objects.create_user(
+            username='viewer', email='viewer@example.com', password='pass12345')
+        for i in range(3):
+            Article.objects.create(
+                slug=f'article-{i}', title=f'Article {i}', description='d', body='b',
+                author=self.viewer)
+        temporary = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary.cleanup)
+        self.directory = temporary.name
+        self.store = ProfileStore(self.directory, 2)
+
+    def profile_settings(self, **overrides):
+        values = {
+            'PROFILING_DIR': self.directory, 'PROFILING_SAMPLE_RATE': 0,
+            'PROFILING_TOKEN': 'secret', 'PROFILING_MAX_FILES': 2, 'PROFILING_VIEWS': [],
+        }
+        values.update(overrides)
+        return override_settings(**values)
+
+    def test_token_header_profiles_the_whole_dispatch(self):
+        with self.profile_settings():
+            response = self.client.get('/v1/api/articles/', HTTP_X_PROFILE_TOKEN='secret')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['articlesCount'], 3)
+            self.client.get('/v1/api/articles/', HTTP_X_PROFILE_TOKEN='wrong')
+            self.client.get('/v1/api/tags/')
+
+        self.assertEqual(self.store.actions(), ['ArticleViewSet.list'])
+        files = self.store.files('ArticleViewSet.list')
+        self.assertEqual(len(files), 1)
+        functions = {name for filename, line, name in pstats.Stats(*files).stats}
+        for expected in ('perform_authentication', 'check_throttles', 'filter_queryset',
+                         'paginate_queryset', 'render'):
+            self.assertIn(expected, functions)
+
+    def test_sampled_profiles_are_rotated_into_an_aggregate(self):
+        self.client.force_authenticate(self.viewer)
+        with self.profile_settings(PROFILING_SAMPLE_RATE=1,
+                                   PROFILING_VIEWS=['ArticleViewSet.feed']):
+            for _ in range(5):
+                self.assertEqual(self.client.get('/v1/api/articles/feed/').status_code, 200)
+            self.client.get('/v1/api/articles/')
+
+        self.assertEqual(self.store.actions(), ['ArticleViewSet.feed'])
+        files = [os.path.basename(path) for path in self.store.files('ArticleViewSet.feed')]
+        self.assertEqual(len(files), 3)
+        aggregate = os.path.join(
+            self.directory, 'ArticleViewSet.feed', f'aggregate-{os.getpid()}.prof')
+        self.assertIn(os.path.basename(aggregate), files)
+        dispatches = [
+            stats for (filename, line, name), stats in pstats.Stats(aggregate).stats.items()
+            if name == 'dispatch' and filename.endswith('rest_framework/views.py')
+        ]
+        # The three rotated-out requests are merged into the aggregate.
+        self.assertEqual(dispatches[0][1], 3)
+
+    def test_summary_lists_hotspots_per_action(self):
+        with self.profile_settings(PROFILING_SAMPLE_RATE=1):
+            self.client.get('/v1/api/articles/')
+            self.client.get('/v1/api/tags/')
+        out = StringIO()
+        call_command('profile_summary', dir=self.directory, limit=5, sort='cumtime', stdout=out)
+        output = out.getvalue()
+        self.assertIn('ArticleViewSet.list (1 profile file(s))', output)
+        self.assertIn('TagViewSet.list (1 profile file(s))', output)
+        self.assertIn('All views', output)
+        self.assertIn('rest_framework/views.py', output)
+        self.assertIn('(dispatch)', output)
+
+        with self.assertRaises(CommandError):
+            call_command('profile_summary', dir=self.directory, view=['ArticleViewSet.feed'],
+                         stdout=StringIO())
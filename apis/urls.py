@@ -15,6 +15,11 @@ urlpatterns = [
     path('api/users/', UserRegistrationView.as_view(), name='user-registration'),
     path('api/users/login/', UserLoginView.as_view(), name='user-login'),
     path('api/user/', CurrentUserView.as_view(), name='current-user'),
+    path(
+      'api/user/following/',
+      ProfileViewSet.as_view({'post': 'follow_many', 'delete': 'follow_many'}),
+      name='user-following',
+    ),
     path(
       'api/articles/<slug:slug>/comments/<int:comment_id>/',
       ArticleViewSet.as_view({'delete': 'delete_comment'}),
@@ -0,0 +1,69 @@
+from django.conf import settings
+
+from .models.article import Article
+from .models.favorite import FavoriteIntent
+from .models.user import User
+
+
+class ViewerContext:
+    """
+    The requesting user's follow and favorite state, memoized for one
+    request. Serializers ``prime`` it with the IDs on the page so each kind
+    of flag costs at most one query, however often a user or article repeats.
+    """
+
+    def __init__(self, user):
+        self.user = user if user is not None and user.is_authenticated else None
+        self.following = {}
+        self.favorited = {}
+
+    def prime(self, user_ids=(), article_ids=()):
+        if self.user is None:
+            return
+        missing = set(user_ids) - self.following.keys()
+        if missing:
+            found = set(User.following.through.objects.filter(
+                from_user_id=self.user.pk, to_user_id__in=missing,
+            ).values_list('to_user_id', flat=True))
+            self.following.update((user_id, user_id in found) for user_id in missing)
+
+        missing = set(article_ids) - self.favorited.keys()
+        if missing:
+            found = set(Article.favorited_by.through.objects.filter(
+                user_id=self.user.pk, article_id__in=missing,
+            ).values_list('article_id', flat=True))
+            self.favorited.update((article_id, article_id in found) for article_id in missing)
+            if settings.FAVORITES_WRITE_BEHIND:
+                self.favorited.update(FavoriteIntent.objects.pending_for(self.user, missing))
+
+    def is_following(self, user_id):
+        if self.user is None:
+            return False
+        if user_id not in self.following:
+            self.prime(user_ids=[user_id])
+        return self.following[user_id]
+
+    def has_favorited(self, article_id):
+        if self.user is None:
+            return False
+        if article_id not in self.favorited:
+            self.prime(article_ids=[article_id])
+        return self.favorited[article_id]
+
+    def remember_following(self, user_id, following):
+        if self.user is not None:
+            self.following[user_id] = following
+
+    def remember_favorited(self, article_id, favorited):
+        if self.user is not None:
+            self.favorited[article_id] = favorited
+
+
+def viewer_context(request):
+    """The ``ViewerContext`` of ``request``, created on first use."""
+    if request is None:
+        return ViewerContext(None)
+    context = getattr(request, '_viewer_context', None)
+    if context is None:
+        context = request._viewer_context = ViewerContext(request.user)
+    return context
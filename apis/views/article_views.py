@@ -1,34 +1,59 @@
+import hashlib
+
+from django.conf import settings
+from django.db.models import Q
+from django.http import Http404
+from django.utils.http import parse_etags, quote_etag
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import OrderingFilter, SearchFilter
+from rest_framework.filters import OrderingFilter
 
+from ..caching import VersionedCache
+from ..favorites import favorite_buffer
 from ..models.article import Article
 from ..models.comment import Comment
+from ..models.feed import FeedEntry
 from ..models.user import User
 from ..serializers.article_serializers import ArticleSerializer, ArticleListSerializer
 from ..serializers.comment_serializers import CommentSerializer, CommentCreateSerializer
+from ..serializers.fast import ArticleRowSerializer, CommentRowSerializer
+from ..renderers import FastJSONRenderer
+from ..profiling import ProfiledDispatchMixin
 from ..permissions import IsAuthorOrReadOnly
-from ..filters import ArticleFilter
-from ..pagination import ArticleLimitOffsetPagination
-from ..throttles import ArticleCreateThrottle
+from ..filters import ArticleFilter, ArticleSearchFilter, viewer_has_pending_favorites
+from ..pagination import ArticleLimitOffsetPagination, CommentCursorPagination
+from ..search import query_terms
+from ..throttles import AnonRateThrottle, ArticleCreateThrottle, UserRateThrottle
+from .async_base import AsyncReadMixin
+from .batch import BatchReadMixin
+
+
+# Viewer-independent article bodies, keyed by the article's and its author's
+# updated_at (tag changes touch the article's), so every worker computes the
+# same keys and ETags from the database alone.
+article_detail_cache = VersionedCache('article_detail')
 
 
-class ArticleViewSet(viewsets.ModelViewSet):
+class ArticleViewSet(ProfiledDispatchMixin, AsyncReadMixin, BatchReadMixin, viewsets.ModelViewSet):
     queryset = Article.objects.all().select_related(
         'author').prefetch_related('tags')
     serializer_class = ArticleListSerializer
     lookup_field = 'slug'
     permission_classes = [AllowAny]
-    filter_backends = [DjangoFilterBackend, OrderingFilter, SearchFilter]
+    filter_backends = [DjangoFilterBackend, OrderingFilter, ArticleSearchFilter]
     filterset_class = ArticleFilter
     ordering_fields = ['created_at', 'updated_at']
     ordering = ['-created_at']
-    search_fields = ['title', 'description', 'body']
     pagination_class = ArticleLimitOffsetPagination
-    throttle_classes = [ArticleCreateThrottle]
+    throttle_classes = [AnonRateThrottle, UserRateThrottle, ArticleCreateThrottle]
+    async_actions = ('list', 'retrieve', 'feed')
+    batch_query_param = 'slugs'
+    batch_field = 'slug'
+    batch_response_key = 'articles'
+    batch_serializer_class = ArticleSerializer
 
     def get_permissions(self):
         if self.action in ['create', 'update', 'partial_update', 'destroy']:
@@ -40,79 +65,290 @@ class ArticleViewSet(viewsets.ModelViewSet):
 
         return [permission() for permission in permission_classes]
 
+    def get_queryset(self):
+        return super().get_queryset().with_viewer_state(self.request.user)
+
+    def get_count_cache_params(self):
+        """Normalized parameters and invalidation namespaces for articlesCount."""
+        if self.action == 'feed':
+            user_id = self.request.user.pk
+            return {'feed': user_id}, ['articles', f'follows:{user_id}']
+
+        query_params = self.request.query_params
+        params = {
+            'tag': query_params.get('tag', '').strip().lower(),
+            'author': query_params.get('author', '').strip().lower(),
+            'favorited': query_params.get('favorited', '').strip(),
+            'search': query_terms(query_params.get('search', '')),
+        }
+        namespaces = ['articles']
+        if params['favorited']:
+            namespaces.append('favorites')
+            user = self.request.user
+            if viewer_has_pending_favorites(user, params['favorited']):
+                namespaces.append(f'favorites:{user.pk}')
+        return params, namespaces
+
     def get_serializer_class(self):
         if self.action == 'retrieve':
             return ArticleSerializer
         return ArticleListSerializer
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        article = serializer.save(author=self.request.user)
+        FeedEntry.objects.fan_out(article)
 
     def list(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset())
+        keys = self.get_batch_keys()
+        if keys is not None:
+            return self.batch_response(keys, self.get_batch_queryset(keys))
+
+        queryset = self.get_article_rows(self.filter_queryset(self.get_queryset()))
         page = self.paginate_queryset(queryset)
         if page is not None:
-            serializer = self.get_serializer(
-                page, many=True, context={'request': request})
-            return self.get_paginated_response(serializer.data)
+            return self.paginated_articles_response(page)
 
-        serializer = self.get_serializer(
-            queryset, many=True, context={'request': request})
+        serializer = self.get_page_serializer(queryset)
         return Response({
             'articles': serializer.data,
             'articlesCount': queryset.count()
         })
 
+    async def alist(self, request, *args, **kwargs):
+        keys = self.get_batch_keys()
+        if keys is not None:
+            articles = [article async for article in self.get_batch_queryset(keys)]
+            return self.batch_response(keys, articles)
+
+        queryset = self.get_article_rows(self.filter_queryset(self.get_queryset()))
+        return await self.apaginated_articles(queryset)
+
+    async def apaginated_articles(self, queryset):
+        # ArticleLimitOffsetPagination always paginates, so unlike the sync
+        # actions there is no unpaginated branch to mirror.
+        page = await self.paginator.apaginate_queryset(queryset, self.request, view=self)
+        serializer = self.get_page_serializer(page)
+        if isinstance(serializer, ArticleRowSerializer):
+            await serializer.aload(page)
+        return self.paginated_articles_response(page, serializer)
+
+    def get_article_rows(self, queryset):
+        """``queryset`` as rows for ``ArticleRowSerializer`` when ``FAST_READ_SERIALIZERS`` is on."""
+        if not settings.FAST_READ_SERIALIZERS:
+            return queryset
+        return ArticleRowSerializer.rows(queryset, self.paginator.keyset_fields)
+
+    def get_page_serializer(self, page):
+        if settings.FAST_READ_SERIALIZERS:
+            return ArticleRowSerializer(page)
+        return self.get_serializer(page, many=True, context={'request': self.request})
+
+    def paginated_articles_response(self, page, serializer=None):
+        if serializer is None:
+            serializer = self.get_page_serializer(page)
+        if self.should_stream(page):
+            return self.paginator.get_streaming_response(
+                serializer.iter_representation(page), self.request.accepted_renderer)
+        return self.get_paginated_response(serializer.data)
+
+    def should_stream(self, page):
+        """Stream pages of at least ``STREAMING_LIST_MIN_ITEMS`` rendered as plain JSON."""
+        renderer = self.request.accepted_renderer
+        return (
+            0 < settings.STREAMING_LIST_MIN_ITEMS <= len(page)
+            and isinstance(renderer, FastJSONRenderer)
+            and renderer.can_stream(self.request.accepted_media_type)
+        )
+
     def retrieve(self, request, *args, **kwargs):
-        instance = self.get_object()
-        serializer = ArticleSerializer(instance, context={'request': request})
-        return Response({'article': serializer.data})
+        state = self.get_detail_state()
+        etag = self.get_detail_etag(state)
+        if self.is_not_modified(request, etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+        key = self.get_detail_cache_key(state)
+        body = article_detail_cache.get(key)
+        if body is None:
+            body = self.build_detail_body(state['pk'])
+            article_detail_cache.set(key, body)
+        return self.detail_response(state, body, etag)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        state = await self.aget_detail_state()
+        etag = self.get_detail_etag(state)
+        if self.is_not_modified(request, etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+        key = self.get_detail_cache_key(state)
+        body = article_detail_cache.get(key)
+        if body is None:
+            body = await self.abuild_detail_body(state['pk'])
+            article_detail_cache.set(key, body)
+        return self.detail_response(state, body, etag)
+
+    def is_not_modified(self, request, etag):
+        if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+        return etag in if_none_match or '*' in if_none_match
+
+    def detail_response(self, state, body, etag):
+        article = dict(body)
+        article['favorited'] = state['viewer_favorited']
+        article['favoritesCount'] = state['favorites_count']
+        article['author'] = dict(body['author'], following=state['viewer_follows_author'])
+        return Response({'article': article}, headers={'ETag': etag})
+
+    def get_detail_cache_key(self, state):
+        return article_detail_cache.make_key({
+            'pk': state['pk'],
+            'updated_at': state['updated_at'],
+            'author_updated_at': state['author__updated_at'],
+        })
+
+    def get_detail_state_queryset(self):
+        """Just the columns that decide whether the detail changed."""
+        lookup = {self.lookup_field: self.kwargs[self.lookup_url_kwarg or self.lookup_field]}
+        return Article.objects.filter(**lookup).with_viewer_state(self.request.user).values(
+            'pk', 'updated_at', 'author__updated_at', 'favorites_count',
+            'viewer_favorited', 'viewer_follows_author', 'viewer_favorites_delta',
+        )
+
+    def get_detail_state(self):
+        return self.finish_detail_state(self.get_detail_state_queryset().first())
+
+    async def aget_detail_state(self):
+        return self.finish_detail_state(await self.get_detail_state_queryset().afirst())
+
+    def finish_detail_state(self, state):
+        if state is None:
+            raise Http404
+        state['favorites_count'] += state.pop('viewer_favorites_delta')
+        return state
+
+    def get_detail_etag(self, state):
+        parts = [
+            state['pk'], state['updated_at'].isoformat(), state['author__updated_at'].isoformat(),
+            state['favorites_count'], state['viewer_favorited'], state['viewer_follows_author'],
+        ]
+        digest = hashlib.sha1(':'.join(str(part) for part in parts).encode()).hexdigest()
+        return quote_etag(digest)
+
+    def get_detail_body_queryset(self):
+        return Article.objects.select_related('author').prefetch_related('tags')
+
+    def build_detail_body(self, pk):
+        instance = self.get_detail_body_queryset().get(pk=pk)
+        return dict(ArticleSerializer(instance).data)
+
+    async def abuild_detail_body(self, pk):
+        instance = await self.get_detail_body_queryset().aget(pk=pk)
+        return dict(ArticleSerializer(instance).data)
 
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
     def feed(self, request):
-        following_users = request.user.following.all()
-        queryset = Article.objects.filter(author__in=following_users).select_related(
-            'author').prefetch_related('tags').order_by('-created_at')
-        
+        materialized = Article.objects.feed_for(request.user)
+        preceding = self.get_feed_preceding(materialized)
+        if not isinstance(preceding, int):
+            preceding = preceding.count()
+        queryset = self.get_feed_queryset(
+            self.choose_feed_source(request.user, materialized, preceding))
+
         page = self.paginate_queryset(queryset)
         if page is not None:
-            serializer = self.get_serializer(page, many=True, context={'request': request})
-            return self.get_paginated_response(serializer.data)
+            return self.paginated_articles_response(page)
 
-        serializer = self.get_serializer(queryset, many=True, context={'request': request})
+        serializer = self.get_page_serializer(queryset)
         return Response({
             'articles': serializer.data,
             'articlesCount': queryset.count()
         })
 
+    async def afeed(self, request, *args, **kwargs):
+        user = request.user
+        has_pull_authors = await Article.objects.pull_authors_of(user).aexists()
+        materialized = Article.objects.feed_for(user, has_pull_authors)
+        preceding = self.get_feed_preceding(materialized)
+        if not isinstance(preceding, int):
+            preceding = await preceding.acount()
+        queryset = self.get_feed_queryset(
+            self.choose_feed_source(user, materialized, preceding))
+        return await self.apaginated_articles(queryset)
+
+    def get_feed_preceding(self, materialized):
+        """
+        How many feed rows come before the requested page: the offset, or
+        for cursor pages a queryset counting the materialized rows up to and
+        including the cursor, bounded by ``FEED_BACKFILL_LIMIT``.
+        """
+        paginator, request = self.paginator, self.request
+        if not paginator.use_cursor(request):
+            return paginator.get_offset(request)
+        value = request.query_params.get(paginator.cursor_query_param)
+        if not value:
+            return 0
+        timestamp, pk, direction = paginator.decode_cursor(value)
+        before = Q(feed_created_at__gt=timestamp) | Q(feed_created_at=timestamp, pk__gte=pk)
+        return materialized.filter(before).order_by()[:settings.FEED_BACKFILL_LIMIT]
+
+    def choose_feed_source(self, user, materialized, preceding):
+        """
+        Following an author copies only their newest ``FEED_BACKFILL_LIMIT``
+        articles into the materialized feed, so it matches the full feed for
+        that many positions. Pages reaching past them, or whose one extra
+        row (keyset pages fetch it to find the next cursor) would, are read
+        with a join.
+        """
+        limit = self.paginator.get_limit(self.request)
+        if preceding + limit < settings.FEED_BACKFILL_LIMIT:
+            return materialized
+        return Article.objects.followed_by(user)
+
+    def get_count_queryset(self, queryset):
+        """What articlesCount counts; the feed's total includes articles outside the window."""
+        if self.action == 'feed':
+            return Article.objects.followed_by(self.request.user)
+        return queryset
+
+    def get_feed_queryset(self, queryset):
+        self.paginator.keyset_fields = ('feed_created_at', 'pk')
+        return self.get_article_rows(queryset.select_related('author').prefetch_related(
+            'tags').with_viewer_state(self.request.user))
+
     @action(detail=True, methods=['post', 'delete'], url_path='favorite', permission_classes=[IsAuthenticated])
     def favorite(self, request, slug=None):
         article = self.get_object()
         user = request.user
+        favorited = request.method == 'POST'
 
-        if request.method == 'POST':
-            if not article.is_favorited_by(user):
-                article.favorited_by.add(user)
+        if favorite_buffer.enabled:
+            # Answer with the intended state; the flush applies it later.
+            favorite_buffer.record(user, article, favorited)
+            article.viewer_favorites_delta = int(favorited) - int(article.viewer_favorited_stored)
+        elif favorited:
+            if article.favorite(user):
+                article.refresh_from_db(fields=['favorites_count'])
+        elif article.unfavorite(user):
+            article.refresh_from_db(fields=['favorites_count'])
+        article.viewer_favorited = favorited
 
-            serializer = ArticleSerializer(
-                article, context={'request': request})
-            return Response({'article': serializer.data})
-        elif request.method == 'DELETE':
-            if article.is_favorited_by(user):
-                article.favorited_by.remove(user)
-
-            serializer = ArticleSerializer(
-                article, context={'request': request})
-            return Response({'article': serializer.data})
+        serializer = ArticleSerializer(
+            article, context={'request': request})
+        return Response({'article': serializer.data})
 
     @action(detail=True, methods=['get', 'post'], url_path='comments')
     def comments(self, request, slug=None):
         article = self.get_object()
         if request.method == 'GET':
-            comments = Comment.objects.filter(
-                article=article).select_related('author')
-            serializer = CommentSerializer(comments, many=True, context={'request': request})
-            return Response({'comments': serializer.data})
+            comments = Comment.objects.filter(article=article).select_related(
+                'author').with_viewer_state(request.user)
+            paginator = CommentCursorPagination()
+            if settings.FAST_READ_SERIALIZERS:
+                comments = CommentRowSerializer.rows(comments, paginator.keyset_fields)
+            page = paginator.paginate_queryset(comments, request, view=self)
+            if settings.FAST_READ_SERIALIZERS:
+                serializer = CommentRowSerializer(page)
+            else:
+                serializer = CommentSerializer(page, many=True, context={'request': request})
+            return paginator.get_paginated_response(serializer.data)
 
         elif request.method == 'POST':
             if not request.user.is_authenticated:
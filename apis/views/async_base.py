@@ -0,0 +1,195 @@
+import functools
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils.decorators import classonlymethod
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from ..profiling import should_profile
+from ..renderers import FastJSONRenderer
+
+
+class AsyncAPIView(View):
+    """
+    A minimal async counterpart of DRF's ``APIView`` for endpoints that must
+    not hold a worker thread: request bodies parsed by ``parser_classes``,
+    DRF throttle classes, errors sent through the configured exception
+    handler, and responses rendered by ``FastJSONRenderer`` so the bytes
+    match the synchronous views.
+    """
+    parser_classes = api_settings.DEFAULT_PARSER_CLASSES
+    throttle_classes = ()
+    renderer = FastJSONRenderer()
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            wait = await sync_to_async(self.check_throttles)(request)
+            if wait is not None:
+                raise exceptions.Throttled(wait)
+            self.data = self.parse_body(request)
+            return await super().dispatch(request, *args, **kwargs)
+        except Exception as exc:
+            return self.handle_exception(exc)
+
+    def check_throttles(self, request):
+        """Return the longest wait of the failing throttles, or None."""
+        durations = []
+        for throttle in [throttle() for throttle in self.throttle_classes]:
+            if not throttle.allow_request(request, self):
+                durations.append(throttle.wait())
+        if not durations:
+            return None
+        return max((duration for duration in durations if duration is not None), default=0)
+
+    def parse_body(self, request):
+        """``request.data`` as DRF would parse it with ``parser_classes``."""
+        if request.method not in ('POST', 'PUT', 'PATCH'):
+            return {}
+        return Request(request, parsers=[parser() for parser in self.parser_classes]).data
+
+    def handle_exception(self, exc):
+        """Render ``exc`` like ``APIView.handle_exception`` does."""
+        context = {'view': self, 'args': self.args, 'kwargs': self.kwargs,
+                   'request': getattr(self, 'request', None)}
+        response = api_settings.EXCEPTION_HANDLER(exc, context)
+        if response is None:
+            raise exc
+        headers = {
+            header: value for header, value in response.items()
+            if header.lower() != 'content-type'
+        }
+        return self.render(response.data, response.status_code, headers)
+
+    def render(self, data, status_code=status.HTTP_200_OK, headers=None):
+        return HttpResponse(
+            self.renderer.render(data),
+            status=status_code,
+            content_type=self.renderer.media_type,
+            headers=headers,
+        )
+
+
+class AsyncReadMixin:
+    """
+    Serve the viewset actions listed in ``async_actions`` from coroutines
+    named ``a<action>`` (``alist``, ``aretrieve``...) so GET requests under
+    ASGI never leave the event loop. Authentication, permissions and
+    throttles run as in ``APIView.initial``; authenticators and throttles
+    with an async method (``aauthenticate``, ``aallow_request``) are awaited
+    directly, others run in a worker thread. Requests negotiated to a
+    renderer that is not a ``JSONRenderer`` (the browsable API) fall back
+    to the synchronous view, so both paths produce the same bytes, and so
+    do profiled requests, whose dispatch runs under cProfile in one thread.
+
+    The async view is only installed when ``ASYNC_READ_VIEWS`` is on (as
+    ``realworld/asgi.py`` does) and the route has an async action; under
+    WSGI it would only add an ``async_to_sync`` and a ``sync_to_async`` hop
+    to every request.
+    """
+    async_actions = ()
+
+    @classonlymethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+        if not settings.ASYNC_READ_VIEWS or not set(actions.values()) & set(cls.async_actions):
+            return view
+        sync_view = sync_to_async(view)
+
+        async def async_view(request, *args, **kwargs):
+            action = actions.get(request.method.lower())
+            if (request.method != 'GET' or action not in cls.async_actions
+                    or should_profile(request)):
+                return await sync_view(request, *args, **kwargs)
+
+            self = cls(**initkwargs)
+            self.action_map = actions
+            for method, handler_name in actions.items():
+                setattr(self, method, getattr(self, handler_name))
+            self.setup(request, *args, **kwargs)
+            self.action = action
+            self.format_kwarg = self.get_format_suffix(**kwargs)
+            self.headers = self.default_response_headers
+
+            drf_request = self.initialize_request(request, *args, **kwargs)
+            self.request = drf_request
+            try:
+                renderer, media_type = self.perform_content_negotiation(drf_request)
+            except Exception:
+                return await sync_view(request, *args, **kwargs)
+            if not isinstance(renderer, JSONRenderer):
+                return await sync_view(request, *args, **kwargs)
+            drf_request.accepted_renderer = renderer
+            drf_request.accepted_media_type = media_type
+            return await self.adispatch(drf_request, *args, **kwargs)
+
+        functools.update_wrapper(async_view, view)
+        return async_view
+
+    async def adispatch(self, request, *args, **kwargs):
+        try:
+            version, scheme = self.determine_version(request, *args, **kwargs)
+            request.version, request.versioning_scheme = version, scheme
+            await self.aperform_authentication(request)
+            self.check_permissions(request)
+            await self.acheck_throttles(request)
+            handler = getattr(self, 'a' + self.action)
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        response = self.finalize_response(request, response, *args, **kwargs)
+        if not isinstance(response, Response):
+            return response
+        # Render here and hand Django a plain response: a DRF Response would
+        # be rendered again through a sync_to_async hop by the handler.
+        response.render()
+        rendered = HttpResponse(response.content, status=response.status_code)
+        for header, value in response.items():
+            rendered[header] = value
+        return rendered
+
+    async def aperform_authentication(self, request):
+        for authenticator in request.authenticators:
+            if hasattr(authenticator, 'aauthenticate'):
+                user_auth_tuple = await authenticator.aauthenticate(request)
+            else:
+                user_auth_tuple = await sync_to_async(authenticator.authenticate)(request)
+            if user_auth_tuple is not None:
+                request._authenticator = authenticator
+                request.user, request.auth = user_auth_tuple
+                return
+        request._not_authenticated()
+
+    async def acheck_throttles(self, request):
+        durations = []
+        for throttle in self.get_throttles():
+            if hasattr(throttle, 'aallow_request'):
+                allowed = await throttle.aallow_request(request, self)
+            else:
+                allowed = await sync_to_async(throttle.allow_request)(request, self)
+            if not allowed:
+                durations.append(throttle.wait())
+        if durations:
+            durations = [duration for duration in durations if duration is not None]
+            self.throttled(request, max(durations, default=None))
+
+    async def aget_object(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        obj = await queryset.filter(
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}).afirst()
+        if obj is None:
+            raise Http404
+        self.check_object_permissions(self.request, obj)
+        return obj
@@ -0,0 +1,51 @@
+from django.conf import settings
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+
+class BatchReadMixin:
+    """
+    Answer ``?<batch_query_param>=a,b,c`` with every requested object in one
+    response. Results keep the request order; keys that match nothing are
+    returned as ``{<batch_field>: key, 'notFound': true}``.
+    """
+    batch_query_param = None
+    batch_field = None
+    batch_response_key = None
+    batch_serializer_class = None
+
+    def get_batch_keys(self):
+        """The requested keys, or None when the request is not a batch read."""
+        value = self.request.query_params.get(self.batch_query_param)
+        if value is None:
+            return None
+        return self.validate_batch_keys([key.strip() for key in value.split(',') if key.strip()])
+
+    def get_batch_body_keys(self):
+        """The keys listed under ``batch_query_param`` in the request body."""
+        keys = self.request.data.get(self.batch_query_param)
+        if not isinstance(keys, list) or not all(isinstance(key, str) for key in keys):
+            raise ValidationError({self.batch_query_param: ['Expected a list of strings.']})
+        return self.validate_batch_keys([key.strip() for key in keys if key.strip()])
+
+    def validate_batch_keys(self, keys):
+        if not keys:
+            raise ValidationError({self.batch_query_param: ['At least one value is required.']})
+        if len(keys) > settings.BATCH_READ_MAX_ITEMS:
+            raise ValidationError({self.batch_query_param: [
+                f'At most {settings.BATCH_READ_MAX_ITEMS} values are allowed.']})
+        return keys
+
+    def get_batch_queryset(self, keys):
+        return self.get_queryset().filter(**{f'{self.batch_field}__in': set(keys)})
+
+    def batch_response(self, keys, instances):
+        serializer_class = self.batch_serializer_class or self.get_serializer_class()
+        serializer = serializer_class(
+            instances, many=True, context=self.get_serializer_context())
+        found = {item[self.batch_field]: item for item in serializer.data}
+        results = [
+            found.get(key) or {self.batch_field: key, 'notFound': True}
+            for key in keys
+        ]
+        return Response({self.batch_response_key: results})
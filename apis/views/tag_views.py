@@ -1,26 +1,38 @@
 from rest_framework import viewsets
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
-from django.core.cache import cache
 
+from ..caching import VersionedCache
 from ..models.tag import Tag
+from ..profiling import ProfiledDispatchMixin
 from ..serializers.tag_serializers import TagSerializer
+from .async_base import AsyncReadMixin
 
 
-class TagViewSet(viewsets.ModelViewSet):
+# Invalidated through the 'tags' version; VERSIONED_CACHE_TIMEOUT bounds
+# staleness in workers that do not share the cache.
+tags_cache = VersionedCache('tags_list', namespaces=['tags'])
+
+
+class TagViewSet(ProfiledDispatchMixin, AsyncReadMixin, viewsets.ModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = [AllowAny]
+    async_actions = ('list',)
 
     def list(self, request, *args, **kwargs):
-        cache_key = "tags_list"
-        cached_data = cache.get(cache_key)
-        if cached_data:
-            return Response(cached_data)
+        return Response(tags_cache.get_or_set(self.build_tags_list))
+
+    async def alist(self, request, *args, **kwargs):
+        return Response(await tags_cache.aget_or_set(self.abuild_tags_list))
+
+    def build_tags_list(self):
+        return self.tags_list(self.get_queryset())
+
+    async def abuild_tags_list(self):
+        return self.tags_list([tag async for tag in self.get_queryset()])
 
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
+    def tags_list(self, tags):
+        serializer = self.get_serializer(tags, many=True)
         tag_names = [tag['name'] for tag in serializer.data]
-        response_data = {'tags': tag_names}
-        cache.set(cache_key, response_data, 300)  # Cache for 5 minutes
-        return Response(response_data)
+        return {'tags': tag_names}
@@ -1,54 +1,107 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.db.models import Exists, OuterRef
 from rest_framework import status, viewsets
-from rest_framework.decorators import api_view, permission_classes, action
+from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken
 
+from ..hashing import HasherPoolFull, ahash_password, averify_password
 from ..models.user import User
+from ..profiling import ProfiledDispatchMixin
 from ..serializers.user_serializers import (
     UserRegistrationSerializer,
     UserLoginSerializer, 
     UserSerializer,
     UserUpdateSerializer,
-    ProfileSerializer
+    ProfileDetailSerializer,
 )
 from ..throttles import LoginRateThrottle, RegisterRateThrottle
+from ..viewer import viewer_context
+from .async_base import AsyncAPIView, AsyncReadMixin
+from .batch import BatchReadMixin
 
 
-class UserRegistrationView(APIView):
-    permission_classes = [AllowAny]
+class PasswordHashingView(AsyncAPIView):
+    """Async base for endpoints that hash passwords on the hasher pool."""
+
+    def get_user_data(self):
+        return self.data.get('user', {}) if isinstance(self.data, dict) else {}
+
+    def render_busy(self):
+        return self.render(
+            {'detail': 'Too many concurrent password operations, retry shortly.'},
+            status.HTTP_503_SERVICE_UNAVAILABLE,
+            {'Retry-After': '1'},
+        )
+
+
+class UserRegistrationView(PasswordHashingView):
     throttle_classes = [RegisterRateThrottle]
-    
-    def post(self, request):
-        user_data = request.data.get('user', {})
+
+    async def post(self, request):
+        user_data = self.get_user_data()
         serializer = UserRegistrationSerializer(data=user_data)
-        
-        if serializer.is_valid():
-            user = serializer.save()
-            user_serializer = UserSerializer(user)
-            return Response({'user': user_serializer.data}, status=status.HTTP_201_CREATED)
-        
-        return Response({'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
 
+        if not await sync_to_async(serializer.is_valid)():
+            return self.render({'errors': serializer.errors}, status.HTTP_400_BAD_REQUEST)
 
-class UserLoginView(APIView):
-    permission_classes = [AllowAny]
+        validated_data = dict(serializer.validated_data)
+        try:
+            password = await ahash_password(validated_data.pop('password'))
+        except HasherPoolFull:
+            return self.render_busy()
+        user = User(
+            username=User.normalize_username(validated_data['username']),
+            email=User.objects.normalize_email(validated_data['email']),
+            password=password,
+        )
+        await user.asave()
+        user_serializer = UserSerializer(user)
+        return self.render({'user': user_serializer.data}, status.HTTP_201_CREATED)
+
+
+class UserLoginView(PasswordHashingView):
     throttle_classes = [LoginRateThrottle]
-    
-    def post(self, request):
-        user_data = request.data.get('user', {})
+
+    async def post(self, request):
+        user_data = self.get_user_data()
         serializer = UserLoginSerializer(data=user_data)
-        
-        if serializer.is_valid():
-            user = serializer.validated_data['user']
-            user_serializer = UserSerializer(user)
-            return Response({'user': user_serializer.data}, status=status.HTTP_200_OK)
-        
-        return Response({'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
 
+        if not serializer.is_valid():
+            return self.render({'errors': serializer.errors}, status.HTTP_400_BAD_REQUEST)
+
+        email = serializer.validated_data['email']
+        password = serializer.validated_data['password']
+        # One lookup by email; the hash check runs on the hasher pool.
+        user = await User.objects.filter(email_lower=email.lower()).afirst()
+        try:
+            if user is None:
+                # Hash anyway so unknown emails take as long as wrong passwords.
+                await ahash_password(password)
+                valid = False
+            else:
+                valid = await averify_password(user, password)
+        except HasherPoolFull:
+            return self.render_busy()
 
-class CurrentUserView(APIView):
+        if not valid:
+            return self.render_error('Invalid credentials')
+        if not user.is_active:
+            return self.render_error('User account is disabled')
+
+        user_serializer = UserSerializer(user)
+        return self.render({'user': user_serializer.data}, status.HTTP_200_OK)
+
+    def render_error(self, message):
+        errors = {api_settings.NON_FIELD_ERRORS_KEY: [message]}
+        return self.render({'errors': errors}, status.HTTP_400_BAD_REQUEST)
+
+
+class CurrentUserView(ProfiledDispatchMixin, APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
@@ -57,7 +110,10 @@ class CurrentUserView(APIView):
     
     def put(self, request):
         user_data = request.data.get('user', {})
-        serializer = UserUpdateSerializer(request.user, data=user_data, partial=True)
+        # request.user only carries the cached columns and saving it would
+        # skip every other field, so write through the full row.
+        user = User.objects.get(pk=request.user.pk)
+        serializer = UserUpdateSerializer(user, data=user_data, partial=True)
         
         if serializer.is_valid():
             user = serializer.save()
@@ -67,24 +123,58 @@ class CurrentUserView(APIView):
         return Response({'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
 
 
-class ProfileViewSet(viewsets.ModelViewSet):
+class ProfileViewSet(ProfiledDispatchMixin, AsyncReadMixin, BatchReadMixin, viewsets.ReadOnlyModelViewSet):
     queryset = User.objects.all()
-    serializer_class = ProfileSerializer
+    serializer_class = ProfileDetailSerializer
     lookup_field = 'username'
     permission_classes = [AllowAny]
-    http_method_names = ['get']
+    async_actions = ('retrieve',)
+    batch_query_param = 'usernames'
+    batch_field = 'username'
+    batch_response_key = 'profiles'
 
     def get_permissions(self):
-        if self.action in ['follow']:
+        if self.action in ['follow', 'follow_many']:
             permission_classes = [IsAuthenticated]
         else:
             permission_classes = [AllowAny]
         return [permission() for permission in permission_classes]
 
+    def list(self, request, *args, **kwargs):
+        keys = self.get_batch_keys()
+        if keys is None:
+            return super().list(request, *args, **kwargs)
+        return self.batch_response(keys, self.get_batch_queryset(keys))
+
+    def get_batch_queryset(self, keys):
+        queryset = super().get_batch_queryset(keys)
+        user = self.request.user
+        if not user.is_authenticated:
+            return queryset
+        # One EXISTS per row instead of a follow query per profile.
+        return queryset.annotate(viewer_following=Exists(
+            User.following.through.objects.filter(
+                from_user_id=user.pk, to_user_id=OuterRef('pk'))
+        ))
+
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
         serializer = self.get_serializer(instance, context={'request': request})
         return Response({'profile': serializer.data})
+
+    async def aretrieve(self, request, *args, **kwargs):
+        # The profile and the viewer's follow flag are independent lookups.
+        if request.user.is_authenticated:
+            username = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+            instance, following = await asyncio.gather(
+                self.aget_object(),
+                request.user.following.filter(username=username).aexists(),
+            )
+            instance.viewer_following = following
+        else:
+            instance = await self.aget_object()
+        serializer = self.get_serializer(instance, context={'request': request})
+        return Response({'profile': serializer.data})
     
     @action(detail=True, methods=['post', 'delete'], url_path='follow', permission_classes=[IsAuthenticated])
     def follow(self, request, username=None):
@@ -99,10 +189,22 @@ class ProfileViewSet(viewsets.ModelViewSet):
         
         if request.method == 'POST':
             user.follow(profile)
-            serializer = ProfileSerializer(profile, context={'request': request})
-            return Response({'profile': serializer.data})
-            
         elif request.method == 'DELETE':
             user.unfollow(profile)
-            serializer = ProfileSerializer(profile, context={'request': request})
-            return Response({'profile': serializer.data})
+        viewer_context(request).remember_following(profile.pk, request.method == 'POST')
+        profile.refresh_from_db(fields=['followers_count', 'following_count'])
+        serializer = self.get_serializer(profile)
+        return Response({'profile': serializer.data})
+
+    def follow_many(self, request):
+        """
+        Follow (POST) or unfollow (DELETE) every profile in ``usernames``.
+        Routed at ``user/following/`` so it cannot shadow a profile.
+        """
+        keys = self.get_batch_body_keys()
+        profiles = list(User.objects.filter(username__in=set(keys)).only('pk', 'pull_feed'))
+        if request.method == 'POST':
+            request.user.follow_many(profiles)
+        else:
+            request.user.unfollow_many(profiles)
+        return self.batch_response(keys, self.get_batch_queryset(keys))
@@ -11,7 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
 from datetime import timedelta
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -46,6 +46,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'apis.instrumentation.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -74,6 +75,11 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'realworld.wsgi.application'
 
+# Serve the async read actions (AsyncReadMixin) from coroutines. Only worth
+# it under ASGI, so realworld/asgi.py turns it on; under WSGI an async view
+# costs every request two thread hops.
+ASYNC_READ_VIEWS = config('ASYNC_READ_VIEWS', default=False, cast=bool)
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
@@ -108,6 +114,11 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing for login/registration runs on a bounded thread pool;
+# requests beyond PASSWORD_HASHER_MAX_QUEUE waiting jobs get a 503.
+PASSWORD_HASHER_WORKERS = config('PASSWORD_HASHER_WORKERS', default=4, cast=int)
+PASSWORD_HASHER_MAX_QUEUE = config('PASSWORD_HASHER_MAX_QUEUE', default=64, cast=int)
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
@@ -137,14 +148,14 @@ AUTH_USER_MODEL = 'apis.User'
 # REST Framework configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apis.authentication.CachedUserJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
     'DEFAULT_RENDERER_CLASSES': (
-        'rest_framework.renderers.JSONRenderer',
+        'apis.renderers.FastJSONRenderer',
         'rest_framework.renderers.BrowsableAPIRenderer',
     ),
     'DEFAULT_PARSER_CLASSES': (
@@ -160,8 +171,8 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle'
+        'apis.throttles.AnonRateThrottle',
+        'apis.throttles.UserRateThrottle'
     ],
     'DEFAULT_THROTTLE_RATES': {
         'anon': '100/hour',
@@ -199,9 +210,106 @@ SIMPLE_JWT = {
 }
 
 # Caching configuration
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
+# Cache versions (apis/caching.py) only invalidate entries across workers
+# when every worker shares the cache, so set CACHE_URL (redis://... or
+# memcached://host:port) in any deployment running more than one process.
+# Without it each process has a private LocMemCache, and
+# VERSIONED_CACHE_TIMEOUT bounds how long another worker's change can go
+# unseen. The LocMemCache holds per-user version keys, per-filter counts and
+# article bodies, so it is sized with LOCAL_CACHE_MAX_ENTRIES rather than
+# Django's default of 300, which would cull on almost every write.
+CACHE_URL = config('CACHE_URL', default='')
+LOCAL_CACHE_MAX_ENTRIES = config('LOCAL_CACHE_MAX_ENTRIES', default=50000, cast=int)
+if CACHE_URL.startswith(('redis://', 'rediss://')):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
+    }
+elif CACHE_URL.startswith('memcached://'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+            'LOCATION': CACHE_URL.removeprefix('memcached://'),
+        }
     }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'unique-snowflake',
+            'OPTIONS': {'MAX_ENTRIES': LOCAL_CACHE_MAX_ENTRIES},
+        }
+    }
+VERSIONED_CACHE_TIMEOUT = config('VERSIONED_CACHE_TIMEOUT', default=300, cast=int)
+
+# Materialized feed
+# Authors with more followers than this are read with pull-based merging
+# instead of fanning each new article out to every follower.
+FEED_FANOUT_LIMIT = config('FEED_FANOUT_LIMIT', default=10000, cast=int)
+# Number of recent articles copied into a feed when following an author.
+FEED_BACKFILL_LIMIT = config('FEED_BACKFILL_LIMIT', default=200, cast=int)
+
+# articlesCount caching for article listings
+ARTICLES_COUNT_CACHE_TIMEOUT = config('ARTICLES_COUNT_CACHE_TIMEOUT', default=300, cast=int)
+# Upper bound counted when a listing is requested with count=estimated.
+ARTICLES_COUNT_ESTIMATE_CAP = config('ARTICLES_COUNT_ESTIMATE_CAP', default=1000, cast=int)
+
+# Per-process LRU of user records used by CachedUserJWTAuthentication.
+# Saves invalidate records in other workers only through a shared cache
+# (CACHE_URL); without one, a deactivated user or changed profile is seen by
+# other workers once their records expire, so the default lifetime is short.
+AUTH_USER_CACHE_SIZE = config('AUTH_USER_CACHE_SIZE', default=10000, cast=int)
+AUTH_USER_CACHE_TIMEOUT = config(
+    'AUTH_USER_CACHE_TIMEOUT', default=300 if CACHE_URL else 5, cast=int)
+
+# Write-behind favorites: toggles are buffered as FavoriteIntent rows and
+# applied in batches outside the request path by `manage.py flush_favorites
+# --loop`, every FAVORITES_FLUSH_INTERVAL seconds (see apis/favorites.py).
+FAVORITES_WRITE_BEHIND = config('FAVORITES_WRITE_BEHIND', default=False, cast=bool)
+FAVORITES_FLUSH_INTERVAL = config('FAVORITES_FLUSH_INTERVAL', default=2.0, cast=float)
+FAVORITES_FLUSH_BATCH_SIZE = config('FAVORITES_FLUSH_BATCH_SIZE', default=1000, cast=int)
+
+# List endpoints (articles, feed, comments) serialize values() rows with the
+# row serializers of apis/serializers/fast.py instead of DRF serializers.
+FAST_READ_SERIALIZERS = config('FAST_READ_SERIALIZERS', default=True, cast=bool)
+
+# Article pages with at least this many items are streamed to JSON clients
+# one article at a time; 0 always renders them in one piece.
+STREAMING_LIST_MIN_ITEMS = config('STREAMING_LIST_MIN_ITEMS', default=50, cast=int)
+
+# Per-request metrics (apis/instrumentation.py): this fraction of requests
+# gets a Server-Timing header and a JSON log line; query shapes repeated at
+# least REQUEST_METRICS_REPEAT_THRESHOLD times in one request are flagged.
+# Off unless enabled from the environment, e.g. REQUEST_METRICS_SAMPLE_RATE=0.01
+# in production.
+REQUEST_METRICS_SAMPLE_RATE = config('REQUEST_METRICS_SAMPLE_RATE', default=0.0, cast=float)
+REQUEST_METRICS_REPEAT_THRESHOLD = config('REQUEST_METRICS_REPEAT_THRESHOLD', default=5, cast=int)
+
+# On-demand profiling (apis/profiling.py): this fraction of requests, plus any
+# request whose X-Profile-Token header matches PROFILING_TOKEN, runs its DRF
+# dispatch under cProfile. Profiles are written to PROFILING_DIR per view
+# action; each process keeps PROFILING_MAX_FILES of them per action and merges
+# older ones into an aggregate. PROFILING_VIEWS limits profiling to the listed
+# actions (e.g. ArticleViewSet.list,ArticleViewSet.feed). Summarize them with
+# the profile_summary command.
+PROFILING_SAMPLE_RATE = config('PROFILING_SAMPLE_RATE', default=0.0, cast=float)
+PROFILING_TOKEN = config('PROFILING_TOKEN', default='')
+PROFILING_DIR = config('PROFILING_DIR', default=str(BASE_DIR / 'profiles'))
+PROFILING_MAX_FILES = config('PROFILING_MAX_FILES', default=20, cast=int)
+PROFILING_VIEWS = config('PROFILING_VIEWS', default='', cast=Csv())
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'apis.instrumentation': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
 }
+
+# Largest number of slugs/usernames accepted by the batch read endpoints.
+BATCH_READ_MAX_ITEMS = config('BATCH_READ_MAX_ITEMS', default=100, cast=int)
@@ -0,0 +1,29 @@
+"""
+Benchmark settings for realworld project.
+
+Select with DJANGO_SETTINGS_MODULE=realworld.settings_benchmark (or
+``manage.py benchmark --settings=realworld.settings_benchmark``). Runs the
+production settings offline against a local SQLite file. Only the
+database differs, so the test suite passes here too; the benchmark command
+raises throttle rates itself while it measures.
+"""
+
+import os
+
+from decouple import config
+
+# The MySQL settings read DB_NAME unconditionally; they are replaced below.
+os.environ.setdefault('DB_NAME', 'benchmark')
+
+from .settings_production import *  # noqa: E402,F401,F403
+from .settings_production import BASE_DIR  # noqa: E402
+
+ALLOWED_HOSTS = ['testserver', 'localhost', '127.0.0.1']
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': config('BENCHMARK_DB_PATH', default=str(BASE_DIR / 'benchmark.sqlite3')),
+    }
+}
+
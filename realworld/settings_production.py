@@ -0,0 +1,25 @@
+"""
+Production settings for realworld project.
+
+Select with DJANGO_SETTINGS_MODULE=realworld.settings_production. The base
+settings apply, with DEBUG off by default and only the JSON renderer: the
+browsable API is not served, so every response takes the fast paths.
+Request metrics and profiling stay off until their sample rates are set in
+the environment (REQUEST_METRICS_SAMPLE_RATE, PROFILING_SAMPLE_RATE).
+"""
+
+from decouple import Csv, config
+
+from .settings import *  # noqa: F401,F403
+from .settings import REST_FRAMEWORK
+
+DEBUG = config('DEBUG', default=False, cast=bool)
+
+ALLOWED_HOSTS = config('ALLOWED_HOSTS', default='', cast=Csv())
+
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    'DEFAULT_RENDERER_CLASSES': (
+        'apis.renderers.FastJSONRenderer',
+    ),
+}